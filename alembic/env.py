@@ -16,6 +16,9 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 from src.app.core.database import Base  # Use the central Base
 from src.app.models.user import User  # Ensure User model is imported
 from src.app.models.medical_record import MedicalRecord # Import MedicalRecord model
+from src.app.models.anchor_batch import AnchorBatch
+from src.app.models.chain_index import ChainIndexCheckpoint, RecordAccessGrant, RecordAnchor
+from src.app.models.reencryption_checkpoint import ReencryptionCheckpoint, ReencryptionFailure
 from src.app.core.config import DATABASE_CONFIG
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,37 @@
+"""add_blockchain_status_to_medical_records
+
+Revision ID: 5c2f8a1d7e44
+Revises: 3de4df08967a
+Create Date: 2026-10-18 09:12:40.114522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2f8a1d7e44'
+down_revision: Union[str, None] = '3de4df08967a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('medical_records', sa.Column('blockchain_status', sa.String(length=20), nullable=True))
+    op.add_column('medical_records', sa.Column('blockchain_tx_hash', sa.String(length=66), nullable=True))
+    op.create_index(op.f('ix_medical_records_blockchain_tx_hash'), 'medical_records', ['blockchain_tx_hash'], unique=False)
+    # Records anchored before this migration were confirmed synchronously
+    op.execute(
+        "UPDATE medical_records SET blockchain_status = 'CONFIRMED', blockchain_tx_hash = blockchain_record_id "
+        "WHERE blockchain_record_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_medical_records_blockchain_tx_hash'), table_name='medical_records')
+    op.drop_column('medical_records', 'blockchain_tx_hash')
+    op.drop_column('medical_records', 'blockchain_status')
@@ -0,0 +1,51 @@
+"""add_merkle_anchor_batches
+
+Revision ID: 8b1e6f0c2d93
+Revises: 5c2f8a1d7e44
+Create Date: 2026-10-18 11:02:17.530881
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e6f0c2d93'
+down_revision: Union[str, None] = '5c2f8a1d7e44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('anchor_batches',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('merkle_root', sa.String(length=66), nullable=False),
+    sa.Column('leaf_count', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('transaction_hash', sa.String(length=66), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('anchored_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('merkle_root')
+    )
+    op.create_index(op.f('ix_anchor_batches_transaction_hash'), 'anchor_batches', ['transaction_hash'], unique=False)
+    op.add_column('medical_records', sa.Column('anchor_batch_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('medical_records', sa.Column('merkle_leaf_index', sa.Integer(), nullable=True))
+    op.add_column('medical_records', sa.Column('merkle_proof', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.create_index(op.f('ix_medical_records_anchor_batch_id'), 'medical_records', ['anchor_batch_id'], unique=False)
+    op.create_foreign_key('fk_medical_records_anchor_batch_id', 'medical_records', 'anchor_batches', ['anchor_batch_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_medical_records_anchor_batch_id', 'medical_records', type_='foreignkey')
+    op.drop_index(op.f('ix_medical_records_anchor_batch_id'), table_name='medical_records')
+    op.drop_column('medical_records', 'merkle_proof')
+    op.drop_column('medical_records', 'merkle_leaf_index')
+    op.drop_column('medical_records', 'anchor_batch_id')
+    op.drop_index(op.f('ix_anchor_batches_transaction_hash'), table_name='anchor_batches')
+    op.drop_table('anchor_batches')
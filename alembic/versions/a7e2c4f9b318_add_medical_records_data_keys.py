@@ -0,0 +1,36 @@
+"""add_medical_records_data_keys
+
+Revision ID: a7e2c4f9b318
+Revises: e5b3d7a1c924
+Create Date: 2026-10-18 20:12:09.413872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e2c4f9b318'
+down_revision: Union[str, None] = 'e5b3d7a1c924'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable: existing records stay encrypted directly with the key-encryption key
+    op.add_column('medical_records', sa.Column('wrapped_data_key', sa.LargeBinary(), nullable=True))
+    op.add_column('medical_records', sa.Column('key_version', sa.Integer(), nullable=True))
+    # Existing records were encrypted with the original key (version 1); record it so they
+    # still decrypt after the current version is bumped
+    op.execute("UPDATE medical_records SET key_version = 1 WHERE key_version IS NULL")
+    op.create_index(op.f('ix_medical_records_key_version'), 'medical_records', ['key_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_medical_records_key_version'), table_name='medical_records')
+    op.drop_column('medical_records', 'key_version')
+    op.drop_column('medical_records', 'wrapped_data_key')
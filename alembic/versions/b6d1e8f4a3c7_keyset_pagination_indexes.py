@@ -0,0 +1,63 @@
+"""keyset_pagination_indexes
+
+Revision ID: b6d1e8f4a3c7
+Revises: f3c9a4b7d512
+Create Date: 2026-10-18 15:11:48.230716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1e8f4a3c7'
+down_revision: Union[str, None] = 'f3c9a4b7d512'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AUDIT_INDEX = 'ix_audit_data_access_logs_owner_user_id_timestamp_id'
+AUDIT_INDEX_COLUMNS = 'owner_user_id, "timestamp" DESC, id DESC'
+
+
+def _audit_partitions():
+    return op.get_bind().execute(sa.text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'audit_data_access_logs' ORDER BY child.relname"
+    )).scalars().all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY is not supported on a partitioned table: create the parent index
+    # ON ONLY (invalid until every partition has one), build each partition's index
+    # concurrently and attach it. Partitions created later get the index on ATTACH.
+    op.execute(f"CREATE INDEX IF NOT EXISTS {AUDIT_INDEX} ON ONLY audit_data_access_logs ({AUDIT_INDEX_COLUMNS})")
+    with op.get_context().autocommit_block():
+        for partition in _audit_partitions():
+            partition_index = f"{partition}_owner_cursor_idx"
+            op.execute(f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition} ({AUDIT_INDEX_COLUMNS})")
+            op.execute(f"ALTER INDEX {AUDIT_INDEX} ATTACH PARTITION {partition_index}")
+
+        # Superseded by the (owner_user_id, timestamp DESC, id DESC) index
+        op.drop_index('ix_audit_data_access_logs_owner_user_id_timestamp', table_name='audit_data_access_logs')
+
+        op.create_index(
+            'ix_medical_records_patient_id_created_at_id', 'medical_records', ['patient_id', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_medical_records_patient_id_created_at_id', table_name='medical_records',
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.create_index('ix_audit_data_access_logs_owner_user_id_timestamp', 'audit_data_access_logs', ['owner_user_id', 'timestamp'], unique=False)
+    # Dropping the parent index drops the attached partition indexes
+    op.drop_index(AUDIT_INDEX, table_name='audit_data_access_logs')
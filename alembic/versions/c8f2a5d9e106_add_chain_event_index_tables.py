@@ -0,0 +1,69 @@
+"""add_chain_event_index_tables
+
+Revision ID: c8f2a5d9e106
+Revises: b6d1e8f4a3c7
+Create Date: 2026-10-18 16:40:12.775203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f2a5d9e106'
+down_revision: Union[str, None] = 'b6d1e8f4a3c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('record_anchors',
+    sa.Column('record_hash', sa.String(length=66), nullable=False),
+    sa.Column('patient_did_hash', sa.String(length=66), nullable=False),
+    sa.Column('record_type', sa.String(length=100), nullable=True),
+    sa.Column('submitter', sa.String(length=42), nullable=False),
+    sa.Column('anchored_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('block_number', sa.BigInteger(), nullable=False),
+    sa.Column('log_index', sa.Integer(), nullable=False),
+    sa.Column('transaction_hash', sa.String(length=66), nullable=False),
+    sa.PrimaryKeyConstraint('record_hash')
+    )
+    op.create_index(op.f('ix_record_anchors_patient_did_hash'), 'record_anchors', ['patient_did_hash'], unique=False)
+    op.create_index(op.f('ix_record_anchors_block_number'), 'record_anchors', ['block_number'], unique=False)
+
+    op.create_table('record_access_grants',
+    sa.Column('block_number', sa.BigInteger(), nullable=False),
+    sa.Column('log_index', sa.Integer(), nullable=False),
+    sa.Column('record_hash', sa.String(length=66), nullable=False),
+    sa.Column('owner_address', sa.String(length=42), nullable=False),
+    sa.Column('doctor_address', sa.String(length=42), nullable=False),
+    sa.Column('granted', sa.Boolean(), nullable=False),
+    sa.Column('transaction_hash', sa.String(length=66), nullable=False),
+    sa.PrimaryKeyConstraint('block_number', 'log_index')
+    )
+    op.create_index(
+        'ix_record_access_grants_record_hash_doctor_block', 'record_access_grants',
+        ['record_hash', 'doctor_address', 'block_number', 'log_index'], unique=False,
+    )
+
+    op.create_table('chain_index_checkpoints',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('block_number', sa.BigInteger(), nullable=False),
+    sa.Column('block_hash', sa.String(length=66), nullable=False),
+    sa.Column('head_block_number', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('chain_index_checkpoints')
+    op.drop_index('ix_record_access_grants_record_hash_doctor_block', table_name='record_access_grants')
+    op.drop_table('record_access_grants')
+    op.drop_index(op.f('ix_record_anchors_block_number'), table_name='record_anchors')
+    op.drop_index(op.f('ix_record_anchors_patient_did_hash'), table_name='record_anchors')
+    op.drop_table('record_anchors')
@@ -0,0 +1,37 @@
+"""add_reencryption_checkpoints
+
+Revision ID: d2f6b9e4a751
+Revises: a7e2c4f9b318
+Create Date: 2026-10-18 21:03:27.640219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b9e4a751'
+down_revision: Union[str, None] = 'a7e2c4f9b318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reencryption_checkpoints',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('key_version', sa.Integer(), nullable=False),
+    sa.Column('last_record_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('records_done', sa.BigInteger(), nullable=False),
+    sa.Column('records_failed', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('reencryption_checkpoints')
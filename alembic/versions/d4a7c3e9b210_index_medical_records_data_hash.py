@@ -0,0 +1,45 @@
+"""index_medical_records_data_hash
+
+Revision ID: d4a7c3e9b210
+Revises: 8b1e6f0c2d93
+Create Date: 2026-10-18 12:20:05.318407
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c3e9b210'
+down_revision: Union[str, None] = '8b1e6f0c2d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block and does not
+    # lock the table against writes while the index is built.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_medical_records_data_hash', 'medical_records', ['data_hash'],
+            unique=False, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_medical_records_patient_id_data_hash', 'medical_records', ['patient_id', 'data_hash'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_medical_records_patient_id_data_hash', table_name='medical_records',
+            postgresql_concurrently=True, if_exists=True,
+        )
+        op.drop_index(
+            'ix_medical_records_data_hash', table_name='medical_records',
+            postgresql_concurrently=True, if_exists=True,
+        )
@@ -0,0 +1,33 @@
+"""add_medical_records_encryption_format
+
+Revision ID: e5b3d7a1c924
+Revises: c8f2a5d9e106
+Create Date: 2026-10-18 19:05:41.208331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b3d7a1c924'
+down_revision: Union[str, None] = 'c8f2a5d9e106'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing blobs are all nonce + ciphertext + tag (format 1). A constant default
+    # does not rewrite the table on PostgreSQL 11+.
+    op.add_column(
+        'medical_records',
+        sa.Column('encryption_format', sa.Integer(), nullable=False, server_default='1'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('medical_records', 'encryption_format')
@@ -0,0 +1,49 @@
+"""add_audit_log_transaction_hash
+
+Revision ID: e8a1c6f3b295
+Revises: d2f6b9e4a751
+Create Date: 2026-10-19 09:12:41.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a1c6f3b295'
+down_revision: Union[str, None] = 'd2f6b9e4a751'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AUDIT_INDEX = 'ix_audit_data_access_logs_transaction_hash'
+AUDIT_INDEX_DEFINITION = '(transaction_hash) WHERE transaction_hash IS NOT NULL'
+
+
+def _audit_partitions():
+    return op.get_bind().execute(sa.text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'audit_data_access_logs' ORDER BY child.relname"
+    )).scalars().all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable without a default: no table rewrite
+    op.add_column('audit_data_access_logs', sa.Column('transaction_hash', sa.String(length=66), nullable=True))
+    # Same ON ONLY + CONCURRENTLY + ATTACH sequence as b6d1e8f4a3c7
+    op.execute(f"CREATE INDEX IF NOT EXISTS {AUDIT_INDEX} ON ONLY audit_data_access_logs {AUDIT_INDEX_DEFINITION}")
+    with op.get_context().autocommit_block():
+        for partition in _audit_partitions():
+            partition_index = f"{partition}_tx_hash_idx"
+            op.execute(f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition} {AUDIT_INDEX_DEFINITION}")
+            op.execute(f"ALTER INDEX {AUDIT_INDEX} ATTACH PARTITION {partition_index}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(AUDIT_INDEX, table_name='audit_data_access_logs', if_exists=True)
+    op.drop_column('audit_data_access_logs', 'transaction_hash')
@@ -0,0 +1,37 @@
+"""add_reencryption_failures
+
+Revision ID: f3c9a2d7b184
+Revises: e8a1c6f3b295
+Create Date: 2026-10-19 11:47:05.203916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9a2d7b184'
+down_revision: Union[str, None] = 'e8a1c6f3b295'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reencryption_failures',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('record_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('failed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['name'], ['reencryption_checkpoints.name'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['record_id'], ['medical_records.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('name', 'record_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('reencryption_failures')
@@ -0,0 +1,103 @@
+"""partition_audit_data_access_logs
+
+Revision ID: f3c9a4b7d512
+Revises: d4a7c3e9b210
+Create Date: 2026-10-18 14:02:37.904512
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9a4b7d512'
+down_revision: Union[str, None] = 'd4a7c3e9b210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions are created up to this many months ahead; src.app.jobs.audit_partitions
+# keeps them coming afterwards.
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, \"timestamp\", actor_user_id, owner_user_id, record_id, action_type, ip_address, target_address, details"
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _audit_columns():
+    return [
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('timestamp', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('actor_user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('owner_user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('record_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('medical_records.id'), nullable=True),
+        sa.Column('action_type', sa.String(length=50), nullable=False),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('target_address', sa.String(length=42), nullable=True),
+        sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the old table aside until its rows are copied; its index names are freed first
+    op.rename_table('audit_data_access_logs', 'audit_data_access_logs_unpartitioned')
+    op.execute("ALTER TABLE audit_data_access_logs_unpartitioned RENAME CONSTRAINT audit_data_access_logs_pkey TO audit_data_access_logs_unpartitioned_pkey")
+    for column in ('actor_user_id', 'owner_user_id', 'record_id', 'timestamp'):
+        op.drop_index(f'ix_audit_data_access_logs_{column}', table_name='audit_data_access_logs_unpartitioned')
+
+    # The partition key must be part of the primary key
+    op.create_table(
+        'audit_data_access_logs',
+        *_audit_columns(),
+        sa.PrimaryKeyConstraint('id', 'timestamp', name='audit_data_access_logs_pkey'),
+        postgresql_partition_by='RANGE ("timestamp")',
+    )
+    op.create_index('ix_audit_data_access_logs_owner_user_id_timestamp', 'audit_data_access_logs', ['owner_user_id', 'timestamp'], unique=False)
+    op.create_index(op.f('ix_audit_data_access_logs_actor_user_id'), 'audit_data_access_logs', ['actor_user_id'], unique=False)
+    op.create_index(op.f('ix_audit_data_access_logs_record_id'), 'audit_data_access_logs', ['record_id'], unique=False)
+    op.create_index(op.f('ix_audit_data_access_logs_timestamp'), 'audit_data_access_logs', ['timestamp'], unique=False)
+
+    # One partition per month from the oldest existing row up to MONTHS_AHEAD months from now
+    oldest = op.get_bind().execute(sa.text('SELECT min("timestamp") FROM audit_data_access_logs_unpartitioned')).scalar()
+    now = datetime.now(timezone.utc)
+    month = date((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_data_access_logs_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF audit_data_access_logs "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+    op.execute("CREATE TABLE audit_data_access_logs_default PARTITION OF audit_data_access_logs DEFAULT")
+
+    op.execute(f"INSERT INTO audit_data_access_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_data_access_logs_unpartitioned")
+    op.drop_table('audit_data_access_logs_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table(
+        'audit_data_access_logs_unpartitioned',
+        *_audit_columns(),
+        sa.PrimaryKeyConstraint('id', name='audit_data_access_logs_unpartitioned_pkey'),
+    )
+    # Includes partitions moved to an archive schema only if they were re-attached first
+    op.execute(f"INSERT INTO audit_data_access_logs_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM audit_data_access_logs")
+    # Dropping the partitioned table drops all attached partitions
+    op.drop_table('audit_data_access_logs')
+
+    op.rename_table('audit_data_access_logs_unpartitioned', 'audit_data_access_logs')
+    op.execute("ALTER TABLE audit_data_access_logs RENAME CONSTRAINT audit_data_access_logs_unpartitioned_pkey TO audit_data_access_logs_pkey")
+    op.create_index(op.f('ix_audit_data_access_logs_actor_user_id'), 'audit_data_access_logs', ['actor_user_id'], unique=False)
+    op.create_index(op.f('ix_audit_data_access_logs_owner_user_id'), 'audit_data_access_logs', ['owner_user_id'], unique=False)
+    op.create_index(op.f('ix_audit_data_access_logs_record_id'), 'audit_data_access_logs', ['record_id'], unique=False)
+    op.create_index(op.f('ix_audit_data_access_logs_timestamp'), 'audit_data_access_logs', ['timestamp'], unique=False)
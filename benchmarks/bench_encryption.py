@@ -0,0 +1,73 @@
+"""
+Benchmark for per-record AES-GCM overhead.
+
+Compares building a new AESGCM(key) for every record (what encrypt_data/decrypt_data
+did before CipherContext) with one CipherContext reused for the whole batch.
+No database or network is needed.
+
+    python -m benchmarks.bench_encryption --records 100000 --size 512 --rounds 5
+"""
+import argparse
+import os
+import statistics
+import time
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from src.app.core.encryption import AES_NONCE_SIZE, CipherContext, generate_encryption_key
+
+
+def encrypt_with_new_cipher(data, key):
+    if not isinstance(key, bytes) or len(key) != 32:
+        raise ValueError("Encryption key must be 32 bytes.")
+    nonce = os.urandom(AES_NONCE_SIZE)
+    return nonce + AESGCM(key).encrypt(nonce, data.encode('utf-8'), None)
+
+
+def decrypt_with_new_cipher(blob, key):
+    if not isinstance(key, bytes) or len(key) != 32:
+        raise ValueError("Decryption key must be 32 bytes.")
+    return AESGCM(key).decrypt(blob[:AES_NONCE_SIZE], blob[AES_NONCE_SIZE:], None).decode('utf-8')
+
+
+def time_rounds(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def report(name, timings, records):
+    median = statistics.median(timings)
+    print(f"{name:>22}: median {median * 1000:9.2f} ms  {median / records * 1e6:7.2f} us/record  "
+          f"{records / median:12,.0f} records/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--size", type=int, default=512, help="Plaintext bytes per record")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    key = generate_encryption_key()
+    records = ["x" * args.size] * args.records
+    context = CipherContext(key)
+
+    blobs, timings = time_rounds(lambda: [encrypt_with_new_cipher(data, key) for data in records], args.rounds)
+    report("encrypt, new cipher", timings, args.records)
+    _, timings = time_rounds(lambda: context.encrypt_many(records), args.rounds)
+    report("encrypt, CipherContext", timings, args.records)
+
+    old_plaintexts, timings = time_rounds(lambda: [decrypt_with_new_cipher(blob, key) for blob in blobs], args.rounds)
+    report("decrypt, new cipher", timings, args.records)
+    new_plaintexts, timings = time_rounds(lambda: context.decrypt_many(blobs), args.rounds)
+    report("decrypt, CipherContext", timings, args.records)
+
+    print(f"decrypted data matches: {old_plaintexts == new_plaintexts == records}")
+
+
+if __name__ == "__main__":
+    main()
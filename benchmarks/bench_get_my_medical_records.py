@@ -0,0 +1,104 @@
+"""
+Benchmark for the record lookup behind GET /medical-records/patient/me.
+
+Compares the former per-hash lookup (one query per on-chain hash, then slicing the
+page in Python) with the set-based lookup that paginates in SQL.
+
+Runs against the database in DATABASE_URL (PostgreSQL, migrated with alembic).
+All rows are created inside a transaction that is rolled back at the end.
+
+    python -m benchmarks.bench_get_my_medical_records --records 2000 --rounds 5
+"""
+import argparse
+import hashlib
+import statistics
+import time
+import uuid
+
+from src.app.core.database import SessionLocal
+from src.app.crud import crud_medical_record
+from src.app.models.medical_record import MedicalRecord, RecordType
+from src.app.models.user import User
+from src.app.schemas.user import UserRole
+
+
+def seed(db, record_count):
+    patient = User(
+        id=uuid.uuid4(),
+        email=f"bench-{uuid.uuid4().hex[:8]}@example.com",
+        username=f"bench_{uuid.uuid4().hex[:8]}",
+        hashed_password="not-a-real-hash",
+        did=f"did:bench:{uuid.uuid4()}",
+        role=UserRole.PATIENT,
+    )
+    db.add(patient)
+    db.flush()
+
+    hashes = []
+    for i in range(record_count):
+        data_hash = hashlib.sha256(f"bench-record-{patient.id}-{i}".encode()).hexdigest()
+        db.add(MedicalRecord(
+            patient_id=patient.id,
+            record_type=RecordType.LAB_RESULT,
+            encrypted_data=b"\0" * 64,
+            data_hash=data_hash,
+        ))
+        hashes.append("0x" + data_hash)
+    db.flush()
+    return patient, hashes
+
+
+def per_hash_lookup(db, patient_id, chain_hashes, skip, limit):
+    records = []
+    for record_hash in chain_hashes:
+        record = db.query(MedicalRecord).filter(
+            MedicalRecord.data_hash == record_hash[2:],
+            MedicalRecord.patient_id == patient_id,
+        ).first()
+        if record:
+            records.append(record)
+    return records[skip:skip + limit]
+
+
+def set_based_lookup(db, patient_id, chain_hashes, skip, limit):
+    found = crud_medical_record.get_existing_data_hashes(db, patient_id, [h[2:] for h in chain_hashes])
+    return crud_medical_record.get_anchored_medical_records_by_patient_id(db, patient_id, found, skip=skip, limit=limit)
+
+
+def time_lookup(lookup, db, patient_id, chain_hashes, skip, limit, rounds):
+    timings = []
+    for _ in range(rounds):
+        db.expire_all()
+        start = time.perf_counter()
+        page = lookup(db, patient_id, chain_hashes, skip, limit)
+        timings.append(time.perf_counter() - start)
+    return page, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--skip", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        patient, chain_hashes = seed(db, args.records)
+        results = {}
+        for name, lookup in (("per-hash", per_hash_lookup), ("set-based", set_based_lookup)):
+            page, timings = time_lookup(lookup, db, patient.id, chain_hashes, args.skip, args.limit, args.rounds)
+            results[name] = page
+            print(f"{name:>10}: median {statistics.median(timings) * 1000:8.2f} ms  "
+                  f"min {min(timings) * 1000:8.2f} ms  ({len(page)} records)")
+
+        same = {r.id for r in results["per-hash"]} == {r.id for r in results["set-based"]}
+        print(f"pages contain the same records: {same}")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
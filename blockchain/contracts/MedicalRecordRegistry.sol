@@ -18,12 +18,23 @@ contract MedicalRecordRegistry {
     // Mapping for access control: recordHash => doctorAddress => accessStatus
     mapping(bytes32 => mapping(address => bool)) internal recordAccessList;
 
+    // Merkle roots of record hash batches anchored with anchorBatch()
+    struct BatchMetadata {
+        uint256 leafCount;
+        uint256 timestamp;
+        address submitter;
+    }
+
+    mapping(bytes32 => BatchMetadata) private batchMetadataMap;
+
     event RecordAdded(bytes32 indexed recordHash, string indexed patientDid, string recordType, uint256 timestamp, address indexed submitter);
     event AccessGranted(bytes32 indexed recordHash, address indexed ownerAddress, address indexed doctorAddress, uint256 timestamp);
     event AccessRevoked(bytes32 indexed recordHash, address indexed ownerAddress, address indexed doctorAddress, uint256 timestamp);
+    event BatchAnchored(bytes32 indexed merkleRoot, uint256 leafCount, uint256 timestamp, address indexed submitter);
 
     error RecordAlreadyExists(bytes32 recordHash);
     error NotRecordOwner(bytes32 recordHash, address caller);
+    error BatchAlreadyAnchored(bytes32 merkleRoot);
 
     // Modified addRecord to align with existing tests and integrate new functionality
     function addRecord(bytes32 recordHash, string calldata patientDid, string calldata recordType) external {
@@ -80,4 +91,35 @@ contract MedicalRecordRegistry {
     function getRecordHashesByPatient(string calldata patientDid) external view returns (bytes32[] memory) {
         return patientRecordHashes[patientDid];
     }
+
+    // Anchors many record hashes with a single transaction by committing their Merkle root.
+    // Leaves are keccak256(recordHash); parents are keccak256 of the sorted child pair.
+    function anchorBatch(bytes32 merkleRoot, uint256 leafCount) external {
+        if (batchMetadataMap[merkleRoot].submitter != address(0)) {
+            revert BatchAlreadyAnchored(merkleRoot);
+        }
+        require(leafCount > 0, "Batch cannot be empty");
+
+        batchMetadataMap[merkleRoot] = BatchMetadata(leafCount, block.timestamp, msg.sender);
+        emit BatchAnchored(merkleRoot, leafCount, block.timestamp, msg.sender);
+    }
+
+    function getBatchMetadata(bytes32 merkleRoot) external view returns (BatchMetadata memory) {
+        return batchMetadataMap[merkleRoot];
+    }
+
+    // Returns true if recordHash is included in an anchored batch with the given root
+    function verifyBatchedRecord(bytes32 recordHash, bytes32[] calldata proof, bytes32 merkleRoot) external view returns (bool) {
+        if (batchMetadataMap[merkleRoot].submitter == address(0)) {
+            return false;
+        }
+        bytes32 computedHash = keccak256(abi.encodePacked(recordHash));
+        for (uint256 i = 0; i < proof.length; i++) {
+            bytes32 sibling = proof[i];
+            computedHash = computedHash < sibling
+                ? keccak256(abi.encodePacked(computedHash, sibling))
+                : keccak256(abi.encodePacked(sibling, computedHash));
+        }
+        return computedHash == merkleRoot;
+    }
 }
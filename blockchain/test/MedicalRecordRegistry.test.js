@@ -303,4 +303,49 @@ describe("MedicalRecordRegistry", function () {
             });
         });
     });
+
+    describe("anchorBatch", function () {
+        const recordHashA = ethers.encodeBytes32String("batchedRecordA");
+        const recordHashB = ethers.encodeBytes32String("batchedRecordB");
+        const hashPair = (a, b) => a < b
+            ? ethers.solidityPackedKeccak256(["bytes32", "bytes32"], [a, b])
+            : ethers.solidityPackedKeccak256(["bytes32", "bytes32"], [b, a]);
+        const leafA = ethers.keccak256(recordHashA);
+        const leafB = ethers.keccak256(recordHashB);
+        const merkleRoot = hashPair(leafA, leafB);
+
+        it("Should anchor a Merkle root and emit BatchAnchored", async function () {
+            const tx = await medicalRecordRegistry.connect(addr1).anchorBatch(merkleRoot, 2);
+            const receipt = await tx.wait();
+            const timestamp = (await ethers.provider.getBlock(receipt.blockNumber)).timestamp;
+
+            await expect(tx)
+                .to.emit(medicalRecordRegistry, "BatchAnchored")
+                .withArgs(merkleRoot, 2, timestamp, addr1.address);
+
+            const metadata = await medicalRecordRegistry.getBatchMetadata(merkleRoot);
+            expect(metadata.leafCount).to.equal(2);
+            expect(metadata.submitter).to.equal(addr1.address);
+        });
+
+        it("Should revert if the root was already anchored", async function () {
+            await medicalRecordRegistry.anchorBatch(merkleRoot, 2);
+            await expect(medicalRecordRegistry.anchorBatch(merkleRoot, 2))
+                .to.be.revertedWithCustomError(medicalRecordRegistry, "BatchAlreadyAnchored")
+                .withArgs(merkleRoot);
+        });
+
+        it("Should verify inclusion proofs of batched records", async function () {
+            await medicalRecordRegistry.anchorBatch(merkleRoot, 2);
+
+            expect(await medicalRecordRegistry.verifyBatchedRecord(recordHashA, [leafB], merkleRoot)).to.be.true;
+            expect(await medicalRecordRegistry.verifyBatchedRecord(recordHashB, [leafA], merkleRoot)).to.be.true;
+            const otherHash = ethers.encodeBytes32String("notInBatch");
+            expect(await medicalRecordRegistry.verifyBatchedRecord(otherHash, [leafB], merkleRoot)).to.be.false;
+        });
+
+        it("Should not verify against a root that was never anchored", async function () {
+            expect(await medicalRecordRegistry.verifyBatchedRecord(recordHashA, [leafB], merkleRoot)).to.be.false;
+        });
+    });
 });
@@ -1,10 +1,12 @@
 import uuid
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.core.database import get_db
+from src.app.core.database import get_async_db
+from src.app.core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, decode_cursor, encode_cursor
 from src.app.models.user import User
 from src.app.api.endpoints.auth import get_current_active_user
 from src.app.crud import crud_audit_log
@@ -16,19 +18,41 @@ router = APIRouter()
     "/my-record-access-history",
     response_model=List[AuditLogResponse],
     summary="Get access history for the current user's records",
-    description="Retrieves a list of audit log entries where the current user is the owner of the data/record.",
+    description=(
+        "Retrieves a list of audit log entries where the current user is the owner of the data/record. "
+        f"If more entries follow, the {NEXT_CURSOR_HEADER} response header holds the cursor for the next page."
+    ),
 )
-def get_my_record_access_history(
-    db: Session = Depends(get_db),
+async def get_my_record_access_history(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
     skip: int = Query(0, ge=0, description="Number of records to skip for pagination"),
     limit: int = Query(100, ge=1, le=200, description="Maximum number of records to return"),
+    since: Optional[datetime] = Query(
+        None,
+        description=(
+            "Only return entries at or after this time. Without it the whole history is returned; "
+            "setting it lets the query skip the older monthly partitions."
+        ),
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description=f"Continuation token from the {NEXT_CURSOR_HEADER} header of the previous page. Use instead of skip for deep pages.",
+    ),
 ):
     """
     Fetches the audit log entries related to records owned by the currently authenticated user.
     This allows users to see who has accessed their data.
     """
-    logs = crud_audit_log.get_audit_logs_by_owner(
-        db=db, owner_user_id=current_user.id, skip=skip, limit=limit
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    logs = await crud_audit_log.get_audit_logs_by_owner_async(
+        db=db, owner_user_id=current_user.id, skip=skip, limit=limit, since=since, after=after
     )
+    # A full page may have a successor; an empty follow-up page ends the iteration
+    if len(logs) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(logs[-1].timestamp, logs[-1].id)
     return logs
@@ -1,10 +1,10 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
-from ...core.database import get_db
+from ...core.database import get_async_db
 from ...core.security import create_access_token, verify_password, decode_access_token
 from ...core.utils import generate_did
 from ...core.blockchain import get_blockchain_service
@@ -23,10 +23,10 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_new_user(
     user_in: UserCreate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Check if email already exists
-    db_user_by_email = crud_user.get_user_by_email(db, email=user_in.email)
+    db_user_by_email = await crud_user.get_user_by_email_async(db, email=user_in.email)
     if db_user_by_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -34,7 +34,7 @@ async def register_new_user(
         )
     
     # Check if username already exists
-    db_user_by_username = crud_user.get_user_by_username(db, username=user_in.username)
+    db_user_by_username = await crud_user.get_user_by_username_async(db, username=user_in.username)
     if db_user_by_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -61,7 +61,7 @@ async def register_new_user(
         )
     
     # Create user in database with the generated UUID and DID
-    created_user = crud_user.create_user(
+    created_user = await crud_user.create_user_async(
         db=db, 
         user_in=user_in, 
         did=user_did,
@@ -73,13 +73,13 @@ async def register_new_user(
 @router.post("/login", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Try to find user by username first
-    user = crud_user.get_user_by_username(db, username=form_data.username)
+    user = await crud_user.get_user_by_username_async(db, username=form_data.username)
     # If not found by username, try email
     if not user:
-        user = crud_user.get_user_by_email(db, email=form_data.username)
+        user = await crud_user.get_user_by_email_async(db, email=form_data.username)
 
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
@@ -98,13 +98,13 @@ async def login_for_access_token(
 @router.post("/login/json", response_model=Token)
 async def login_for_access_token_json(
     user_credentials: UserLogin, # UserLogin is not defined in the file, but I will keep it as is.
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Try to find user by username first
-    user = crud_user.get_user_by_username(db, username=user_credentials.username_or_email)
+    user = await crud_user.get_user_by_username_async(db, username=user_credentials.username_or_email)
     # If not found by username, try email
     if not user:
-        user = crud_user.get_user_by_email(db, email=user_credentials.username_or_email)
+        user = await crud_user.get_user_by_email_async(db, email=user_credentials.username_or_email)
 
     if not user or not verify_password(user_credentials.password, user.hashed_password):
         raise HTTPException(
@@ -122,7 +122,7 @@ async def login_for_access_token_json(
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -138,7 +138,7 @@ async def get_current_user(
     if username is None:
         raise credentials_exception
     
-    user = crud_user.get_user_by_username(db, username=username)
+    user = await crud_user.get_user_by_username_async(db, username=username)
     if user is None:
         raise credentials_exception
     return user
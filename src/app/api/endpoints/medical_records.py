@@ -3,35 +3,49 @@ import logging # Added import for logging
 from typing import List, Optional
 from datetime import datetime # Added import for datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.crud import crud_audit_log # For audit logging
 # Removed: from src.app import models as app_models
 from src.app.api.endpoints.auth import get_current_active_user
 from src.app.core import security
-from src.app.core.blockchain import BlockchainService, get_blockchain_service
-# Import the specific ORM model directly
-from src.app.models.medical_record import MedicalRecord as MedicalRecordORM
-from src.app.core.config import JWT_CONFIG
-from src.app.core.database import get_db
-from src.app.core.encryption import encrypt_data, decrypt_data, hash_data
-from src.app.crud import crud_medical_record
+from src.app.core.blockchain import BlockchainService, get_blockchain_service, ANCHORING_MODE_BATCHED, TX_STATUS_PENDING
+from src.app.core.merkle import verify_proof
+from src.app.core.config import BLOCKCHAIN_CONFIG, JWT_CONFIG
+from src.app.core.database import get_async_db
+from src.app.core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, decode_cursor, encode_cursor
+from src.app.core.encryption import decrypt_data_async, encrypt_and_hash_async
+from src.app.core.envelope import data_key_manager
+from src.app.crud import crud_medical_record, crud_user
 from src.app.models.medical_record import (
     MedicalRecordCreate,
     MedicalRecordResponse,
     MedicalRecordDetailResponse,
+    InclusionProofResponse,
+    BlockchainStatus,
     RecordType,
     GrantAccessRequest,
-    RevokeAccessRequest
+    RevokeAccessRequest,
+    BulkAccessCheckRequest,
+    BulkAccessCheckResponse,
 )
 from src.app.models.user import User, UserRole # Added UserRole
+from src.app.services.anchor_batcher import AnchorBatcher, get_anchor_batcher
+from src.app.services.audit_writer import AuditLogWriter, get_audit_log_writer
+from src.app.services import chain_indexer
+from src.app.services.record_export import EXPORT_FORMAT_NDJSON, EXPORT_FORMAT_ZIP, MedicalRecordExporter
+from src.app.services.record_import import MedicalRecordImporter
+from src.app.services.receipt_tracker import (
+    ReceiptTracker,
+    get_receipt_tracker,
+    TX_KIND_MEDICAL_RECORD,
+    TX_KIND_GRANT_ACCESS,
+    TX_KIND_REVOKE_ACCESS,
+)
 
 router = APIRouter()
 
-# Import the improved encryption function
-from ...core.security_config import get_encryption_key
-
 
 @router.post(
     "/",
@@ -41,15 +55,18 @@ from ...core.security_config import get_encryption_key
 )
 async def create_medical_record_endpoint(
     medical_record_in: MedicalRecordCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user), # Corrected dependency
     blockchain_service: BlockchainService = Depends(get_blockchain_service), 
+    receipt_tracker: ReceiptTracker = Depends(get_receipt_tracker),
+    anchor_batcher: AnchorBatcher = Depends(get_anchor_batcher),
 ):
     """
     Create a new medical record for the currently authenticated user.
 
     The raw data of the record will be encrypted before storage.
-    A hash of the raw data will be stored on the blockchain.
+    A hash of the raw data will be stored on the blockchain, either directly or, in
+    batched anchoring mode, as part of the next Merkle root (status QUEUED until then).
     """
     patient_id = current_user.id
     patient_did = current_user.did
@@ -61,21 +78,40 @@ async def create_medical_record_endpoint(
         )
 
     try:
-        encryption_key = get_encryption_key()
+        # Each record gets its own data key, stored wrapped with the current key-encryption key
+        record_cipher, wrapped_data_key, key_version = data_key_manager.new_data_key()
         
-        # Encrypt raw_data
-        encrypted_blob = encrypt_data(medical_record_in.raw_data, encryption_key)
-        
-        # Hash raw_data (before encryption)
-        raw_data_hash = hash_data(medical_record_in.raw_data)
+        # Encrypt raw_data and hash it (before encryption); large payloads run on the crypto thread pool
+        encrypted_blob, raw_data_hash, encryption_format = await encrypt_and_hash_async(
+            medical_record_in.raw_data, record_cipher, medical_record_in.compression
+        )
+
+        if BLOCKCHAIN_CONFIG.get("anchoring_mode") == ANCHORING_MODE_BATCHED:
+            # The AnchorBatcher picks QUEUED records up and anchors them as one Merkle root
+            queued_record = await crud_medical_record.create_medical_record_async(
+                db=db,
+                medical_record_in=medical_record_in,
+                patient_id=patient_id,
+                encrypted_data=encrypted_blob,
+                encryption_format=encryption_format,
+                wrapped_data_key=wrapped_data_key,
+                key_version=key_version,
+                data_hash=raw_data_hash,
+                blockchain_status=BlockchainStatus.QUEUED,
+            )
+            anchor_batcher.notify_queued()
+            return queued_record
 
         # Create DB record
         # The CRUD function create_medical_record handles mapping medical_record_in.metadata to record_metadata
-        new_db_record = crud_medical_record.create_medical_record(
+        new_db_record = await crud_medical_record.create_medical_record_async(
             db=db,
             medical_record_in=medical_record_in,
             patient_id=patient_id,
             encrypted_data=encrypted_blob,
+            encryption_format=encryption_format,
+            wrapped_data_key=wrapped_data_key,
+            key_version=key_version,
             data_hash=raw_data_hash,
         )
 
@@ -89,8 +125,16 @@ async def create_medical_record_endpoint(
 
         if blockchain_result.get("success"):
             tx_hash = blockchain_result.get("transaction_hash")
-            if tx_hash: # Ensure tx_hash is not None before updating
-                updated_record = crud_medical_record.update_medical_record_blockchain_id(
+            if tx_hash and blockchain_result.get("status") == TX_STATUS_PENDING:
+                # Fire-and-track mode: the receipt tracker sets blockchain_record_id once mined
+                pending_record = await crud_medical_record.mark_medical_record_blockchain_pending_async(
+                    db=db, record_id=new_db_record.id, blockchain_tx_hash=tx_hash
+                )
+                receipt_tracker.track(tx_hash, TX_KIND_MEDICAL_RECORD, {"record_id": new_db_record.id})
+                if pending_record:
+                    return pending_record
+            elif tx_hash: # Ensure tx_hash is not None before updating
+                updated_record = await crud_medical_record.update_medical_record_blockchain_id_async(
                     db=db, record_id=new_db_record.id, blockchain_tx_hash=tx_hash
                 )
                 # If update was successful and returned a record, use it.
@@ -104,7 +148,7 @@ async def create_medical_record_endpoint(
         # If blockchain call was not successful, or if it was successful but tx_hash was missing,
         # we return the record as it was created (blockchain_id should be None or its initial state).
         # Ensure new_db_record is the latest state from DB before returning if no update happened or if update path didn't return.
-        db.refresh(new_db_record) # Refresh to be sure, especially if update_medical_record_blockchain_id doesn't refresh the original instance.
+        await db.refresh(new_db_record) # Refresh to be sure, especially if update_medical_record_blockchain_id doesn't refresh the original instance.
         return new_db_record
 
     except ValueError as ve:
@@ -118,17 +162,148 @@ async def create_medical_record_endpoint(
         )
 
 
+class RequestBodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose content is produced while the request body is still read.
+    Below ASGI spec 2.4, StreamingResponse waits for http.disconnect on `receive` while it
+    streams, which would swallow the body chunks; a disconnect surfaces through
+    request.stream() instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@router.post(
+    "/import",
+    summary="Bulk import medical records from NDJSON",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def import_medical_records_endpoint(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    anchor_batcher: AnchorBatcher = Depends(get_anchor_batcher),
+    audit_log_writer: AuditLogWriter = Depends(get_audit_log_writer),
+):
+    """
+    Import many medical records from an NDJSON request body (application/x-ndjson).
+
+    Each line is a MedicalRecordCreate object, optionally with a `patient_id`; only
+    administrators may import records for other patients. The body is read as a stream
+    and records are inserted in batches with status QUEUED, to be anchored by the
+    AnchorBatcher in Merkle batches.
+
+    The response is NDJSON with one result per input line ({"line", "id", "data_hash"}
+    or {"line", "error"}), streamed batch by batch, followed by a {"summary": {...}} line.
+    One audit entry with the totals is written when the stream ends: IMPORT_RECORDS_SUCCESS,
+    or IMPORT_RECORDS_INCOMPLETE if the client disconnected or the import failed midway.
+    """
+    ip_address = request.client.host if request.client else "Unknown"
+    importer = MedicalRecordImporter(db, current_user, anchor_batcher)
+
+    async def stream():
+        completed = False
+        try:
+            async for chunk in importer.ndjson(request.stream()):
+                yield chunk
+            completed = True
+        finally:
+            await audit_log_writer.log(
+                db=db,
+                actor_user_id=current_user.id,
+                owner_user_id=current_user.id,
+                action_type='IMPORT_RECORDS_SUCCESS' if completed else 'IMPORT_RECORDS_INCOMPLETE',
+                ip_address=ip_address,
+                details=importer.summary(),
+            )
+
+    return RequestBodyStreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/export",
+    summary="Export all medical records of a patient, decrypted",
+    response_class=StreamingResponse,
+)
+async def export_medical_records_endpoint(
+    request: Request,
+    export_format: str = Query(EXPORT_FORMAT_NDJSON, alias="format"),
+    patient_id: Optional[uuid.UUID] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    audit_log_writer: AuditLogWriter = Depends(get_audit_log_writer),
+):
+    """
+    Stream every medical record of a patient, decrypted, oldest first.
+
+    `format` is `ndjson` (one MedicalRecordDetailResponse per line, then a {"summary": {...}}
+    line) or `zip` (one JSON file per record plus summary.json). `patient_id` defaults to
+    the current user; only administrators may export records of other patients. Doctors
+    read shared records one at a time, since access is granted per record on chain.
+
+    Records that cannot be decrypted are exported as {"id", "error"}. One audit entry
+    with the totals is written when the stream ends: EXPORT_RECORDS_SUCCESS, or
+    EXPORT_RECORDS_INCOMPLETE if the client disconnected or the export failed midway.
+    """
+    if export_format not in (EXPORT_FORMAT_NDJSON, EXPORT_FORMAT_ZIP):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format '{export_format}'; use '{EXPORT_FORMAT_NDJSON}' or '{EXPORT_FORMAT_ZIP}'.",
+        )
+    if patient_id is None or patient_id == current_user.id:
+        patient_id = current_user.id
+    elif current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can export the records of other patients.",
+        )
+    elif not await crud_user.get_patient_ids_async(db, [patient_id]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found")
+
+    ip_address = request.client.host if request.client else "Unknown"
+    exporter = MedicalRecordExporter(db, patient_id)
+    if export_format == EXPORT_FORMAT_ZIP:
+        chunks, media_type = exporter.zip(), "application/zip"
+        headers = {"Content-Disposition": f'attachment; filename="medical-records-{patient_id}.zip"'}
+    else:
+        chunks, media_type, headers = exporter.ndjson(), "application/x-ndjson", None
+
+    async def stream():
+        completed = False
+        try:
+            async for chunk in chunks:
+                yield chunk
+            completed = True
+        finally:
+            await audit_log_writer.log(
+                db=db,
+                actor_user_id=current_user.id,
+                owner_user_id=patient_id,
+                action_type='EXPORT_RECORDS_SUCCESS' if completed else 'EXPORT_RECORDS_INCOMPLETE',
+                ip_address=ip_address,
+                details={"format": export_format, **exporter.summary()},
+            )
+
+    return StreamingResponse(stream(), media_type=media_type, headers=headers)
+
+
 @router.get(
     "/patient/me",
     response_model=List[MedicalRecordResponse],
     summary="Get medical records for the current patient, verified against blockchain hashes.",
 )
 async def get_my_medical_records(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
     blockchain_service: BlockchainService = Depends(get_blockchain_service),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
     """
     Retrieve medical records for the currently authenticated user (patient).
@@ -136,14 +311,17 @@ async def get_my_medical_records(
     This endpoint enhances data integrity by first fetching a list of record hashes
     associated with the patient's Decentralized Identifier (DID) from the blockchain.
     It then retrieves only those records from the local database that match these hashes
-    and belong to the authenticated user.
+    and belong to the authenticated user. Records are returned oldest first; matching and
+    pagination are done in SQL, so the cost per page does not grow with the number of hashes.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         current_user (User): The authenticated user, injected by `get_current_active_user`.
         blockchain_service (BlockchainService): Service for interacting with the blockchain.
         skip (int): Number of records to skip for pagination.
         limit (int): Maximum number of records to return for pagination.
+        cursor (str): Continuation token from the X-Next-Cursor header of the previous page.
+                      Keyset pagination on (created_at, id); use instead of skip for deep pages.
 
     Returns:
         List[MedicalRecordResponse]: A list of medical records. Returns an empty list if
@@ -151,15 +329,21 @@ async def get_my_medical_records(
                                      no hashes are found on the blockchain, or no matching
                                      records are found in the database.
     """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     # The user's Decentralized Identifier (DID) is essential for querying blockchain records.
     if not current_user.did:
         logging.warning(f"User {current_user.id} (username: {current_user.username}) has no DID. "
                         "Cannot retrieve blockchain-anchored medical records.")
         return []
 
-    # Fetch record hashes from the blockchain service using the patient's DID.
-    # Expects blockchain_service to return a dict: {'success': bool, 'data': {'hashes': [...]}, 'error': str}
-    blockchain_response = await blockchain_service.get_record_hashes_for_patient(current_user.did)
+    # Fetch record hashes for the patient's DID, from the local event index while it is
+    # current and from the blockchain otherwise.
+    # Returns a dict: {'success': bool, 'data': {'hashes': [...]}, 'error': str}
+    blockchain_response = await chain_indexer.get_record_hashes_for_patient(db, blockchain_service, current_user.did)
 
     # Handle cases where the blockchain service call was not successful.
     if not blockchain_response.get("success"):
@@ -171,41 +355,88 @@ async def get_my_medical_records(
         return []
 
     # Extract the list of hexadecimal record hashes from the blockchain response.
+    # The contract returns 0x-prefixed hashes while data_hash is stored without the prefix.
     record_hashes_hex = blockchain_response.get("data", {}).get("hashes", [])
-    if not record_hashes_hex:
-        logging.info(f"No medical record hashes found on the blockchain for patient DID {current_user.did}.")
-        return []
+    chain_hashes = {h[2:].lower() if h.startswith("0x") else h.lower(): h for h in record_hashes_hex}
 
-    retrieved_records = []
-    # Iterate through each hash received from the blockchain.
-    for record_hash in record_hashes_hex:
-        # Query the local database for a medical record that matches the current hash
-        # AND belongs to the currently authenticated user (patient_id match).
-        # This ensures that even if a hash is associated with the user's DID on-chain,
-        # they can only retrieve records they own in the local database.
-        db_record = db.query(MedicalRecordORM).filter(
-            MedicalRecordORM.data_hash == record_hash,
-            MedicalRecordORM.patient_id == current_user.id
-        ).first()
-        
-        if db_record:
-            # If a matching and authorized record is found in the database, add it to the list.
-            # FastAPI will automatically convert this ORM model to MedicalRecordResponse
-            # based on the endpoint's `response_model`.
-            retrieved_records.append(db_record)
-        else:
-            # Log a warning if a hash from the blockchain does not correspond to a valid
-            # record in the database for this user. This could indicate data inconsistency
-            # (e.g., DB record deleted but blockchain entry remains, or hash mismatch).
+    # One set-based lookup instead of a query per on-chain hash, only to report
+    # hashes that are on-chain but have no matching record of this patient in the DB.
+    found_hashes = await crud_medical_record.get_existing_data_hashes_async(db, current_user.id, chain_hashes.keys())
+    for data_hash, record_hash in chain_hashes.items():
+        if data_hash not in found_hashes:
+            # This could indicate data inconsistency (e.g., DB record deleted but
+            # blockchain entry remains, or hash mismatch).
             logging.warning(
                 f"Medical record with hash {record_hash} found on blockchain for patient {current_user.id} "
                 f"(DID: {current_user.did}) but not found in local DB or not matching this patient_id."
             )
-    
-    # Apply pagination to the final list of verified and retrieved records.
-    # This is done after all blockchain hashes have been processed and DB records fetched.
-    paginated_records = retrieved_records[skip : skip + limit]
-    return paginated_records
+
+    # Records anchored through a Merkle batch are not listed per patient on-chain, so the
+    # page also includes this patient's records of confirmed batches. Paginated in SQL.
+    page = await crud_medical_record.get_anchored_medical_records_by_patient_id_async(
+        db, current_user.id, found_hashes, skip=skip, limit=limit, after=after
+    )
+    # The cursor follows the SQL page, so records dropped below still advance it
+    if len(page) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(page[-1].created_at, page[-1].id)
+
+    retrieved_records = []
+    for db_record in page:
+        if db_record.anchor_batch is not None and db_record.data_hash not in found_hashes:
+            if not verify_proof(db_record.data_hash, db_record.merkle_proof or [], db_record.anchor_batch.merkle_root):
+                logging.warning(
+                    f"Medical record {db_record.id} of patient {current_user.id} does not match the Merkle root "
+                    f"of anchor batch {db_record.anchor_batch_id}."
+                )
+                continue
+        retrieved_records.append(db_record)
+
+    if not retrieved_records and not record_hashes_hex:
+        logging.info(f"No medical record hashes found on the blockchain for patient DID {current_user.did}.")
+    return retrieved_records
+
+
+@router.get(
+    "/{record_id}/inclusion-proof",
+    response_model=InclusionProofResponse,
+    summary="Get the Merkle inclusion proof of a batch-anchored medical record",
+)
+async def get_medical_record_inclusion_proof(
+    record_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    blockchain_service: BlockchainService = Depends(get_blockchain_service),
+):
+    """
+    Returns the proof that the record's data hash is part of an anchored Merkle batch.
+    Only the record owner may fetch it. `verified` is the result of the contract's
+    verifyBatchedRecord(), which is only true if the proof matches a root that was
+    actually anchored on-chain.
+    """
+    db_record = await crud_medical_record.get_medical_record_by_id_async(db, record_id=record_id)
+    if not db_record or db_record.patient_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Medical record not found")
+    if db_record.anchor_batch is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Medical record has not been anchored in a Merkle batch.",
+        )
+
+    batch = db_record.anchor_batch
+    proof = db_record.merkle_proof or []
+    verification = await blockchain_service.verify_batched_record(db_record.data_hash, proof, batch.merkle_root)
+    if not verification.get("success"):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=verification.get("error"))
+    return InclusionProofResponse(
+        record_id=db_record.id,
+        data_hash=db_record.data_hash,
+        merkle_root=batch.merkle_root,
+        leaf_index=db_record.merkle_leaf_index,
+        proof=proof,
+        batch_status=batch.status,
+        transaction_hash=batch.transaction_hash,
+        verified=verification["verified"],
+    )
 
 
 @router.get(
@@ -216,15 +447,16 @@ async def get_my_medical_records(
 async def get_medical_record_detail(
     record_id: uuid.UUID,
     request: Request, # Added request object
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
     blockchain_service: BlockchainService = Depends(get_blockchain_service), 
+    audit_log_writer: AuditLogWriter = Depends(get_audit_log_writer),
 ):
     """
     Retrieve a specific medical record by its ID.
     The raw data will be decrypted if the user is authorized.
     """
-    db_record = crud_medical_record.get_medical_record_by_id(db, record_id=record_id)
+    db_record = await crud_medical_record.get_medical_record_by_id_async(db, record_id=record_id)
     ip_address = request.client.host if request.client else "Unknown"
 
     if not db_record:
@@ -248,7 +480,7 @@ async def get_medical_record_detail(
         if not current_user.blockchain_address:
             action_type_failure = 'VIEW_RECORD_FAILURE_NO_BC_ADDR'
             failure_details = {"error": "Doctor user does not have a blockchain address configured."}
-            crud_audit_log.create_audit_log(
+            await audit_log_writer.log(
                 db=db,
                 actor_user_id=current_user.id,
                 owner_user_id=db_record.patient_id, # db_record is available here
@@ -264,7 +496,7 @@ async def get_medical_record_detail(
         if not db_record.data_hash:
             action_type_failure = 'VIEW_RECORD_FAILURE_NO_HASH' # Specific action type for no data hash
             failure_details = {"error": "Record cannot be accessed by doctor: No data hash for blockchain verification."}
-            crud_audit_log.create_audit_log(
+            await audit_log_writer.log(
                 db=db,
                 actor_user_id=current_user.id,
                 owner_user_id=db_record.patient_id,
@@ -287,7 +519,7 @@ async def get_medical_record_detail(
             action_type_failure = 'VIEW_RECORD_FAILURE_BC_CHECK_FAILED'
             failure_details = {"error": f"Could not verify access on blockchain; access denied. BC Error: {access_check_result.get('error')}"}
             logging.error(f"Blockchain access check failed for doctor {current_user.id} on record {db_record.id}: {access_check_result.get('error')}")
-            crud_audit_log.create_audit_log(
+            await audit_log_writer.log(
                 db=db,
                 actor_user_id=current_user.id,
                 owner_user_id=db_record.patient_id,
@@ -308,7 +540,7 @@ async def get_medical_record_detail(
     if not can_access:
         action_type_failure = 'VIEW_RECORD_FAILURE_FORBIDDEN'
         failure_details = {"error": "You do not have permission to access this medical record."}
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=db_record.patient_id, # db_record is available
@@ -322,16 +554,20 @@ async def get_medical_record_detail(
             detail=failure_details["error"],
         )
 
-    # If can_access is True (either owner or doctor with granted access), proceed to decrypt
+    # If can_access is True (either owner or doctor with granted access), proceed to decrypt.
+    # encrypted_data is deferred, so the blob is only fetched here, after authorization.
     try:
-        encryption_key = get_encryption_key()
-        decrypted_raw_data = decrypt_data(db_record.encrypted_data, encryption_key)
+        record_cipher = data_key_manager.get_cipher(db_record.wrapped_data_key, db_record.key_version)
+        await db.refresh(db_record, ["encrypted_data"])
+        decrypted_raw_data = await decrypt_data_async(
+            db_record.encrypted_data, record_cipher, db_record.encryption_format
+        )
         
         response_data = MedicalRecordDetailResponse.model_validate(db_record)
         response_data.raw_data = decrypted_raw_data
         
         # Log successful access
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=db_record.patient_id,
@@ -347,7 +583,7 @@ async def get_medical_record_detail(
         failure_details = {"error": f"Failed to decrypt record data. Error: {str(ve)}"}
         logging.error(f"Decryption failed for record {record_id} accessed by user {current_user.id}. Error: {ve}")
         # We log this attempt, but it's an internal server error. Owner ID is from db_record.
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=db_record.patient_id, # db_record is available
@@ -364,7 +600,7 @@ async def get_medical_record_detail(
         action_type_failure = 'VIEW_RECORD_FAILURE_UNEXPECTED'
         failure_details = {"error": f"An unexpected error occurred: {str(e)}"}
         logging.error(f"Error retrieving medical record detail for {record_id} by user {current_user.id}: {e}")
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=db_record.patient_id, # db_record should be available
@@ -389,9 +625,11 @@ async def grant_medical_record_access(
     record_id: uuid.UUID,
     access_request: GrantAccessRequest,
     request: Request, # Added request object
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
     blockchain_service: BlockchainService = Depends(get_blockchain_service),
+    receipt_tracker: ReceiptTracker = Depends(get_receipt_tracker),
+    audit_log_writer: AuditLogWriter = Depends(get_audit_log_writer),
 ):
     """
     Grant a specified doctor_address access to a specific medical record on the blockchain.
@@ -400,24 +638,24 @@ async def grant_medical_record_access(
     ip_address = request.client.host if request.client else "Unknown"
     target_doctor_address = access_request.doctor_address # Store for logging consistency
 
-    db_record = crud_medical_record.get_medical_record_by_id(db, record_id=record_id)
+    db_record = await crud_medical_record.get_medical_record_by_id_async(db, record_id=record_id)
     if not db_record:
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=current_user.id, # Owner not determinable from db_record
-            record_id=record_id,
+            # record_id references medical_records, so the unknown id goes into details
             action_type='GRANT_ACCESS_FAILURE_RECORD_NOT_FOUND',
             ip_address=ip_address,
             target_address=target_doctor_address,
-            details={"error": "Medical record not found"},
+            details={"error": "Medical record not found", "record_id": str(record_id)},
         )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Medical record not found"
         )
 
     if db_record.patient_id != current_user.id:
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=current_user.id, # Actor is current_user, owner is also current_user (attempting to act on other's record)
@@ -433,7 +671,7 @@ async def grant_medical_record_access(
         )
 
     if not db_record.data_hash: 
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=current_user.id,
@@ -455,7 +693,7 @@ async def grant_medical_record_access(
 
     if not blockchain_result.get("success"):
         error_detail = blockchain_result.get("error", "Failed to grant access on blockchain.")
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=current_user.id,
@@ -471,8 +709,39 @@ async def grant_medical_record_access(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_detail)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_detail)
 
+    if blockchain_result.get("status") == TX_STATUS_PENDING:
+        # Fire-and-track mode: the receipt tracker writes the final GRANT_ACCESS_* entry once mined
+        tx_hash = blockchain_result.get("transaction_hash")
+        await audit_log_writer.log(
+            db=db,
+            actor_user_id=current_user.id,
+            owner_user_id=current_user.id,
+            record_id=record_id,
+            action_type='GRANT_ACCESS_PENDING',
+            ip_address=ip_address,
+            target_address=target_doctor_address,
+            details={"transaction_hash": tx_hash},
+            # Lets the receipt tracker find and settle this request after a restart
+            transaction_hash=tx_hash,
+        )
+        receipt_tracker.track(tx_hash, TX_KIND_GRANT_ACCESS, {
+            "actor_user_id": current_user.id,
+            "owner_user_id": current_user.id,
+            "record_id": record_id,
+            "record_hash": db_record.data_hash,
+            "ip_address": ip_address,
+            "target_address": target_doctor_address,
+        })
+        return {
+            "message": "Access grant submitted; awaiting blockchain confirmation.",
+            "record_id": record_id,
+            "doctor_address": target_doctor_address,
+            "transaction_hash": tx_hash,
+            "status": TX_STATUS_PENDING,
+        }
+
     # Log successful grant
-    crud_audit_log.create_audit_log(
+    await audit_log_writer.log(
         db=db,
         actor_user_id=current_user.id,
         owner_user_id=current_user.id,
@@ -499,7 +768,7 @@ async def grant_medical_record_access(
 async def check_medical_record_access(
     record_id: uuid.UUID,
     accessor_address: str, # Path parameter for the address to check
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user), # To verify ownership if needed, or just for consistency
     blockchain_service: BlockchainService = Depends(get_blockchain_service),
 ):
@@ -510,7 +779,7 @@ async def check_medical_record_access(
     This endpoint can be called by any authenticated user to check access status,
     but the record itself must exist.
     """
-    db_record = crud_medical_record.get_medical_record_by_id(db, record_id=record_id)
+    db_record = await crud_medical_record.get_medical_record_by_id_async(db, record_id=record_id)
     if not db_record:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Medical record not found"
@@ -565,6 +834,62 @@ async def check_medical_record_access(
     }
 
 
+@router.post(
+    "/check-access",
+    response_model=BulkAccessCheckResponse,
+    summary="Check access to many medical records for a given accessor address",
+    status_code=status.HTTP_200_OK,
+)
+async def check_medical_records_access(
+    check_request: BulkAccessCheckRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    blockchain_service: BlockchainService = Depends(get_blockchain_service),
+):
+    """
+    Bulk version of GET /{record_id}/check-access/{accessor_address}: the records are loaded
+    in one query and checked on-chain in batched calls instead of one request per record.
+
+    Results follow the order of record_ids. A record that cannot be checked (unknown ID,
+    no data hash) gets an error in its own result instead of failing the request.
+    """
+    accessor_address = check_request.accessor_address
+    db_records = {
+        record.id: record
+        for record in await crud_medical_record.get_medical_records_by_ids_async(db, check_request.record_ids)
+    }
+
+    results = []
+    checks = []
+    for record_id in check_request.record_ids:
+        db_record = db_records.get(record_id)
+        result = {"record_id": record_id, "has_access": None, "error": None}
+        if not db_record:
+            result["error"] = "Medical record not found"
+        elif not db_record.data_hash:
+            result["error"] = "Medical record does not have a data hash; cannot check access."
+        else:
+            checks.append((result, db_record.data_hash))
+        results.append(result)
+
+    if checks:
+        blockchain_result = await blockchain_service.check_record_access_many(
+            [(data_hash, accessor_address) for _, data_hash in checks]
+        )
+        if not blockchain_result.get("success"):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=blockchain_result.get("error", "Failed to check access on blockchain."),
+            )
+        for (result, _), check_result in zip(checks, blockchain_result["results"]):
+            if check_result.get("success"):
+                result["has_access"] = check_result.get("has_access")
+            else:
+                result["error"] = check_result.get("error", "Failed to check access on blockchain.")
+
+    return {"accessor_address": accessor_address, "results": results, "checked_at": datetime.utcnow()}
+
+
 @router.post(
     "/{record_id}/revoke-access",
     summary="Revoke access to a medical record",
@@ -575,9 +900,11 @@ async def revoke_medical_record_access(
     record_id: uuid.UUID,
     access_request: RevokeAccessRequest, # Uses RevokeAccessRequest
     request: Request, # Added request object
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
     blockchain_service: BlockchainService = Depends(get_blockchain_service),
+    receipt_tracker: ReceiptTracker = Depends(get_receipt_tracker),
+    audit_log_writer: AuditLogWriter = Depends(get_audit_log_writer),
 ):
     """
     Revoke a specified doctor_address access to a specific medical record on the blockchain.
@@ -586,24 +913,24 @@ async def revoke_medical_record_access(
     ip_address = request.client.host if request.client else "Unknown"
     target_doctor_address = access_request.doctor_address # Store for logging consistency
 
-    db_record = crud_medical_record.get_medical_record_by_id(db, record_id=record_id)
+    db_record = await crud_medical_record.get_medical_record_by_id_async(db, record_id=record_id)
     if not db_record:
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=current_user.id, # Owner not determinable from db_record
-            record_id=record_id,
+            # record_id references medical_records, so the unknown id goes into details
             action_type='REVOKE_ACCESS_FAILURE_RECORD_NOT_FOUND',
             ip_address=ip_address,
             target_address=target_doctor_address,
-            details={"error": "Medical record not found"},
+            details={"error": "Medical record not found", "record_id": str(record_id)},
         )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Medical record not found"
         )
 
     if db_record.patient_id != current_user.id:
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=current_user.id, # Actor is current_user
@@ -619,7 +946,7 @@ async def revoke_medical_record_access(
         )
 
     if not db_record.data_hash:
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=current_user.id,
@@ -641,7 +968,7 @@ async def revoke_medical_record_access(
 
     if not blockchain_result.get("success"):
         error_detail = blockchain_result.get("error", "Failed to revoke access on blockchain.")
-        crud_audit_log.create_audit_log(
+        await audit_log_writer.log(
             db=db,
             actor_user_id=current_user.id,
             owner_user_id=current_user.id,
@@ -656,8 +983,39 @@ async def revoke_medical_record_access(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_detail)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_detail)
 
+    if blockchain_result.get("status") == TX_STATUS_PENDING:
+        # Fire-and-track mode: the receipt tracker writes the final REVOKE_ACCESS_* entry once mined
+        tx_hash = blockchain_result.get("transaction_hash")
+        await audit_log_writer.log(
+            db=db,
+            actor_user_id=current_user.id,
+            owner_user_id=current_user.id,
+            record_id=record_id,
+            action_type='REVOKE_ACCESS_PENDING',
+            ip_address=ip_address,
+            target_address=target_doctor_address,
+            details={"transaction_hash": tx_hash},
+            # Lets the receipt tracker find and settle this request after a restart
+            transaction_hash=tx_hash,
+        )
+        receipt_tracker.track(tx_hash, TX_KIND_REVOKE_ACCESS, {
+            "actor_user_id": current_user.id,
+            "owner_user_id": current_user.id,
+            "record_id": record_id,
+            "record_hash": db_record.data_hash,
+            "ip_address": ip_address,
+            "target_address": target_doctor_address,
+        })
+        return {
+            "message": "Access revoke submitted; awaiting blockchain confirmation.",
+            "record_id": record_id,
+            "doctor_address": target_doctor_address,
+            "transaction_hash": tx_hash,
+            "status": TX_STATUS_PENDING,
+        }
+
     # Log successful revoke
-    crud_audit_log.create_audit_log(
+    await audit_log_writer.log(
         db=db,
         actor_user_id=current_user.id,
         owner_user_id=current_user.id,
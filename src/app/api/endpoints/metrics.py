@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from src.app.api.endpoints.auth import get_current_active_user
+from src.app.core.metrics import metrics
+from src.app.models.user import User, UserRole
+
+router = APIRouter()
+
+@router.get("/", response_model=dict, summary="In-process service metrics")
+async def get_metrics(current_user: User = Depends(get_current_active_user)):
+    """
+    Returns a snapshot of the in-process counters, gauges and summaries
+    (cache hit rates, timings, queue depths) recorded by this worker.
+    Only administrators may read them.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can read service metrics.",
+        )
+    return metrics.snapshot()
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from .metrics import metrics
+
+
+def _normalize_key(record_hash: str, address: str) -> Tuple[str, str]:
+    record_hash = str(record_hash).lower()
+    if record_hash.startswith("0x"):
+        record_hash = record_hash[2:]
+    return record_hash, str(address).lower()
+
+
+class AccessCheckCache:
+    """
+    TTL + LRU cache of checkAccess results, keyed by (record hash, accessor address).
+
+    Entries expire `ttl_seconds` after they were stored; beyond `max_entries` the least
+    recently used entry is evicted. Grants, revocations and observed AccessGranted /
+    AccessRevoked events invalidate the affected entries, so the TTL only bounds how
+    long a change made outside this process can go unnoticed. A TTL of 0 disables it.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[bool, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+            metrics.increment("access_cache.hits")
+        else:
+            self.misses += 1
+            metrics.increment("access_cache.misses")
+        metrics.set_gauge("access_cache.hit_rate", self.hits / (self.hits + self.misses))
+
+    def get(self, record_hash: str, address: str) -> Optional[bool]:
+        """
+        Returns the cached access flag, or None if there is no fresh entry.
+        """
+        if not self.enabled:
+            return None
+        key = _normalize_key(record_hash, address)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            self._record(entry is not None)
+            return entry[0] if entry is not None else None
+
+    def set(self, record_hash: str, address: str, has_access: bool) -> None:
+        if not self.enabled:
+            return
+        key = _normalize_key(record_hash, address)
+        with self._lock:
+            self._entries[key] = (bool(has_access), self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                metrics.increment("access_cache.evictions")
+            metrics.set_gauge("access_cache.size", len(self._entries))
+
+    def invalidate(self, record_hash: str, address: Optional[str] = None) -> int:
+        """
+        Drops the entry for (record_hash, address), or every entry of the record if no
+        address is given. Returns the number of entries removed.
+        """
+        with self._lock:
+            if address is not None:
+                removed = 1 if self._entries.pop(_normalize_key(record_hash, address), None) is not None else 0
+            else:
+                record_key = _normalize_key(record_hash, "")[0]
+                keys = [key for key in self._entries if key[0] == record_key]
+                for key in keys:
+                    del self._entries[key]
+                removed = len(keys)
+            if removed:
+                metrics.increment("access_cache.invalidations", removed)
+            metrics.set_gauge("access_cache.size", len(self._entries))
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            metrics.set_gauge("access_cache.size", 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
@@ -1,10 +1,60 @@
-from web3 import Web3
+import inspect
+from typing import Any, List, Optional, Sequence, Tuple
+
+import aiohttp
+from web3 import Web3, AsyncWeb3, AsyncHTTPProvider
+from web3.exceptions import TransactionNotFound
 from eth_account import Account
+from .access_cache import AccessCheckCache
+from .chain_state import (
+    CHAIN_STATE_CHAIN_ID,
+    CHAIN_STATE_CONNECTED,
+    CHAIN_STATE_GAS_PRICE,
+    ChainStateCache,
+    is_underpriced_error,
+)
 from .config import BLOCKCHAIN_CONFIG
+from .merkle import verify_proof
+from .metrics import metrics
+from .nonce_manager import NonceManager, is_already_known_error, is_nonce_error
 import os
 
+PROVIDER_MODE_SYNC = "sync"
+PROVIDER_MODE_ASYNC = "async"
+
+# Transaction submission modes: block until the receipt is mined, or return once the
+# transaction hash is known and let the ReceiptTracker follow it up.
+TX_SUBMISSION_BLOCKING = "blocking"
+TX_SUBMISSION_FIRE_AND_TRACK = "fire_and_track"
+
+TX_STATUS_PENDING = "PENDING"
+TX_STATUS_CONFIRMED = "CONFIRMED"
+TX_STATUS_FAILED = "FAILED"
+
+# Record anchoring modes: one addRecord transaction per record, or one Merkle root per batch
+ANCHORING_MODE_PER_RECORD = "per_record"
+ANCHORING_MODE_BATCHED = "batched"
+
+# MedicalRecordRegistry events mirrored by the ChainEventIndexer
+REGISTRY_EVENTS = ("RecordAdded", "AccessGranted", "AccessRevoked")
+
 class BlockchainService:
-    def __init__(self, test_mode=False):
+    def __init__(self, test_mode=False, provider_mode: Optional[str] = None):
+        self.provider_mode = provider_mode or BLOCKCHAIN_CONFIG.get("provider_mode", PROVIDER_MODE_SYNC)
+        self.is_async = False
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        # Single sender account, so one nonce allocator per service instance
+        self.nonce_manager = NonceManager(self._fetch_pending_nonce)
+        self.access_cache = AccessCheckCache(
+            max_entries=BLOCKCHAIN_CONFIG["access_cache_max_entries"],
+            ttl_seconds=BLOCKCHAIN_CONFIG["access_cache_ttl_seconds"],
+        )
+        self.chain_state = ChainStateCache(
+            ttl_seconds=BLOCKCHAIN_CONFIG["chain_state_ttl_seconds"],
+            gas_limit_ttl_seconds=BLOCKCHAIN_CONFIG["gas_limit_ttl_seconds"],
+            gas_limit_multiplier=BLOCKCHAIN_CONFIG["gas_limit_multiplier"],
+        )
+
         if test_mode:
             # Use mock values for testing
             self.w3 = None
@@ -14,6 +64,25 @@ class BlockchainService:
             self.account = "0x1234567890123456789012345678901234567890"
             return
 
+        if self.provider_mode == PROVIDER_MODE_ASYNC:
+            self._init_async_backend()
+        elif self.provider_mode == PROVIDER_MODE_SYNC:
+            self._init_sync_backend()
+        else:
+            raise ValueError(f"Unknown blockchain provider mode: {self.provider_mode}")
+        
+        # Get the private key from config
+        self.private_key = BLOCKCHAIN_CONFIG.get("sender_private_key")
+        if not self.private_key:
+            raise ValueError("BLOCKCHAIN_SENDER_PRIVATE_KEY must be set in .env")
+        
+        # Derive the account address from private key
+        self.account = Account.from_key(self.private_key).address
+
+    def _init_sync_backend(self):
+        """
+        Blocking Web3/HTTPProvider backend. Every RPC call blocks the event loop.
+        """
         self.w3 = Web3(Web3.HTTPProvider(BLOCKCHAIN_CONFIG["ganache_url"]))
         if not self.w3.is_connected():
             # Allow initialization to proceed for cases where blockchain is optional or checked later
@@ -45,16 +114,215 @@ class BlockchainService:
                 print(f"Error initializing contracts during BlockchainService init: {e}")
                 self.user_registry_contract = None
                 self.medical_record_registry_contract = None
+
+    def _init_async_backend(self):
+        """
+        Native asyncio backend built on AsyncWeb3/AsyncHTTPProvider.
+
+        Connectivity cannot be checked from a synchronous constructor, so contracts are
+        created unconditionally and connectivity is verified per call. The pooled aiohttp
+        session is created lazily on first use, inside the running event loop.
+        """
+        self.is_async = True
+        self.w3 = AsyncWeb3(AsyncHTTPProvider(
+            BLOCKCHAIN_CONFIG["ganache_url"],
+            request_kwargs={"timeout": BLOCKCHAIN_CONFIG["rpc_timeout_seconds"]},
+        ))
+        try:
+            if BLOCKCHAIN_CONFIG.get("user_registry_address") and BLOCKCHAIN_CONFIG.get("user_registry_abi"):
+                self.user_registry_contract = self.w3.eth.contract(
+                    address=BLOCKCHAIN_CONFIG["user_registry_address"],
+                    abi=BLOCKCHAIN_CONFIG["user_registry_abi"]
+                )
+            else:
+                self.user_registry_contract = None
+                print("Warning: UserRegistry contract address or ABI not loaded. User-related blockchain interactions might fail.")
+
+            if BLOCKCHAIN_CONFIG.get("medical_record_registry_address") and BLOCKCHAIN_CONFIG.get("medical_record_registry_abi"):
+                self.medical_record_registry_contract = self.w3.eth.contract(
+                    address=BLOCKCHAIN_CONFIG["medical_record_registry_address"],
+                    abi=BLOCKCHAIN_CONFIG["medical_record_registry_abi"]
+                )
+            else:
+                self.medical_record_registry_contract = None
+                print("Warning: MedicalRecordRegistry contract address or ABI not loaded. Medical record-related blockchain interactions might fail.")
+        except Exception as e:
+            print(f"Error initializing contracts during BlockchainService init: {e}")
+            self.user_registry_contract = None
+            self.medical_record_registry_contract = None
+
+    async def _ensure_http_session(self):
+        """
+        Attaches a pooled aiohttp session to the async provider so RPC calls reuse
+        keep-alive connections instead of opening one per request.
+        """
+        if not self.is_async or (self._http_session is not None and not self._http_session.closed):
+            return
+        connector = aiohttp.TCPConnector(limit=BLOCKCHAIN_CONFIG["rpc_pool_size"])
+        self._http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=BLOCKCHAIN_CONFIG["rpc_timeout_seconds"]),
+        )
+        await self.w3.provider.cache_async_session(self._http_session)
+
+    async def _resolve(self, value: Any) -> Any:
+        """
+        Awaits `value` if it is awaitable (async backend), otherwise returns it as-is (sync backend).
+        Lets both backends share the same call sites.
+        """
+        if inspect.isawaitable(value):
+            return await value
+        return value
+
+    async def _is_connected(self) -> bool:
+        """
+        Served from the chain state cache while the node was recently reachable; a cached
+        failure is re-checked, so a recovered node is used again right away.
+        """
+        await self._ensure_http_session()
+        if self.chain_state.get(CHAIN_STATE_CONNECTED):
+            return True
+        connected = await self._resolve(self.w3.is_connected())
+        self.chain_state.set(CHAIN_STATE_CONNECTED, connected)
+        return connected
+
+    async def _get_gas_price(self) -> int:
+        gas_price = self.chain_state.get(CHAIN_STATE_GAS_PRICE)
+        if gas_price is None:
+            gas_price = await self._resolve(self.w3.eth.gas_price)
+            self.chain_state.set(CHAIN_STATE_GAS_PRICE, gas_price)
+        return gas_price
+
+    async def _get_chain_id(self) -> int:
+        chain_id = self.chain_state.get(CHAIN_STATE_CHAIN_ID)
+        if chain_id is None:
+            chain_id = await self._resolve(self.w3.eth.chain_id)
+            self.chain_state.set(CHAIN_STATE_CHAIN_ID, chain_id, expires=False)
+        return chain_id
+
+    async def _get_gas_limit(self, contract_function, fallback_gas: int) -> int:
+        """
+        Gas limit for `contract_function`, estimated once per contract function (selector)
+        and cached. Falls back to `fallback_gas` if the estimate fails, e.g. because the
+        call would revert; the transaction is then sent anyway so the revert is reported
+        the same way as before.
+        """
+        key = (contract_function.address, contract_function.selector)
+        gas_limit = self.chain_state.get_gas_limit(key)
+        if gas_limit is not None:
+            return gas_limit
+        try:
+            estimate = await self._resolve(contract_function.estimate_gas({'from': self.account}))
+        except Exception:
+            metrics.increment("chain_state.gas_estimate_failures")
+            return fallback_gas
+        return self.chain_state.record_gas_estimate(key, estimate)
+
+    async def refresh_chain_state(self) -> dict:
+        """
+        Re-reads connectivity and gas price (and the chain ID once) into the chain state cache.
+        """
+        try:
+            if not self.w3: # Test mode
+                return {'success': True, 'connected': True}
+            await self._ensure_http_session()
+            connected = await self._resolve(self.w3.is_connected())
+            self.chain_state.set(CHAIN_STATE_CONNECTED, connected)
+            if not connected:
+                return {'success': False, 'error': "Could not connect to Ethereum node."}
+            self.chain_state.set(CHAIN_STATE_GAS_PRICE, await self._resolve(self.w3.eth.gas_price))
+            await self._get_chain_id()
+            metrics.increment("chain_state.refreshes")
+            return {'success': True, 'connected': True}
+        except Exception as e:
+            self.chain_state.invalidate(CHAIN_STATE_CONNECTED)
+            return {'success': False, 'error': f"Failed to refresh chain state: {str(e)}"}
+
+    async def _fetch_pending_nonce(self) -> int:
+        return await self._resolve(self.w3.eth.get_transaction_count(self.account, 'pending'))
+
+    async def _send_transaction(self, contract_function, fallback_gas: int):
+        """
+        Builds, signs and broadcasts a contract transaction from the sender account.
+
+        Nonces come from the local NonceManager instead of a per-transaction RPC lookup,
+        and gas price, chain ID and the gas limit from the chain state cache. If the node
+        rejects the nonce, the manager resyncs from the pending count; if it rejects the
+        gas price, the cached price is dropped. Either way the transaction is rebuilt and
+        resent once. If the node already has the signed transaction, it counts as sent.
+        Returns the transaction hash.
+        """
+        gas = await self._get_gas_limit(contract_function, fallback_gas)
+        for attempt in range(2):
+            nonce = await self.nonce_manager.allocate()
+            signed_tx = None
+            try:
+                tx = await self._resolve(contract_function.build_transaction({
+                    'from': self.account,
+                    'gas': gas,
+                    'gasPrice': await self._get_gas_price(),
+                    'chainId': await self._get_chain_id(),
+                    'nonce': nonce,
+                }))
+                signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
+                return await self._resolve(self.w3.eth.send_raw_transaction(signed_tx.raw_transaction))
+            except Exception as e:
+                if signed_tx is not None and is_already_known_error(e):
+                    # Broadcast earlier (e.g. a send that timed out); the nonce is in use
+                    return signed_tx.hash
+                if attempt == 0 and is_nonce_error(e):
+                    await self.nonce_manager.resync()
+                    continue
+                # The transaction never made it into the mempool; give the nonce back
+                self.nonce_manager.release(nonce)
+                if attempt == 0 and is_underpriced_error(e):
+                    self.chain_state.invalidate(CHAIN_STATE_GAS_PRICE)
+                    continue
+                # The node may be gone; check connectivity again on the next call
+                self.chain_state.invalidate(CHAIN_STATE_CONNECTED)
+                raise
+
+    def _should_wait_for_receipt(self, wait_for_receipt: Optional[bool]) -> bool:
+        if wait_for_receipt is not None:
+            return wait_for_receipt
+        return BLOCKCHAIN_CONFIG.get("tx_submission_mode", TX_SUBMISSION_BLOCKING) != TX_SUBMISSION_FIRE_AND_TRACK
+
+    async def get_transaction_status(self, tx_hash: str) -> dict:
+        """
+        Looks up the receipt of a previously submitted transaction without waiting for it.
+
+        Returns a dict with "status" set to PENDING (not mined yet), CONFIRMED or FAILED.
+        """
+        try:
+            if not self.w3: # Test mode
+                return {'success': True, 'status': TX_STATUS_CONFIRMED, 'transaction_hash': tx_hash, 'block_number': 0}
+
+            try:
+                receipt = await self._resolve(self.w3.eth.get_transaction_receipt(tx_hash))
+            except TransactionNotFound:
+                receipt = None
+
+            if receipt is None:
+                return {'success': True, 'status': TX_STATUS_PENDING, 'transaction_hash': tx_hash}
+
+            return {
+                'success': True,
+                'status': TX_STATUS_CONFIRMED if receipt.status == 1 else TX_STATUS_FAILED,
+                'transaction_hash': tx_hash,
+                'block_number': receipt.blockNumber,
+            }
+        except Exception as e:
+            return {'success': False, 'error': f"Failed to get transaction receipt: {str(e)}"}
+
+    async def close(self):
+        """
+        Releases the pooled HTTP session of the async backend.
+        """
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
         
-        # Get the private key from config
-        self.private_key = BLOCKCHAIN_CONFIG.get("sender_private_key")
-        if not self.private_key:
-            raise ValueError("BLOCKCHAIN_SENDER_PRIVATE_KEY must be set in .env")
-        
-        # Derive the account address from private key
-        self.account = Account.from_key(self.private_key).address
-        
-    async def register_user(self, user_id: str, role: str) -> dict:
+    async def register_user(self, user_id: str, role: str, wait_for_receipt: Optional[bool] = None) -> dict:
         """
         Register a new user in the blockchain
         """
@@ -70,22 +338,27 @@ class BlockchainService:
             # Build the transaction
             if not self.user_registry_contract:
                 raise ConnectionError("UserRegistry contract is not initialized.")
-            tx = self.user_registry_contract.functions.registerUser(user_id, role).build_transaction({
-                'from': self.account,
-                'gas': 200000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account),
-            })
-            
             # Sign and send the transaction using the configured private key
-            signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            tx_hash = await self._send_transaction(
+                self.user_registry_contract.functions.registerUser(user_id, role),
+                fallback_gas=200000,
+            )
             
+            if not self._should_wait_for_receipt(wait_for_receipt):
+                return {
+                    'success': True,
+                    'status': TX_STATUS_PENDING,
+                    'transaction_hash': Web3.to_hex(tx_hash),
+                    'user_id': user_id,
+                    'role': role
+                }
+
             # Wait for transaction receipt
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            receipt = await self._resolve(self.w3.eth.wait_for_transaction_receipt(tx_hash))
             
             return {
                 'success': True,
+                'status': TX_STATUS_CONFIRMED,
                 'transaction_hash': receipt['transactionHash'].hex(),
                 'user_id': user_id,
                 'role': role
@@ -112,9 +385,8 @@ class BlockchainService:
             
             if not self.user_registry_contract:
                 raise ConnectionError("UserRegistry contract is not initialized.")
-            # Note: Smart contract `getUserRole` is not async, but web3.py call might be if provider is async.
-            # Assuming it's a standard call for now.
-            role_data = self.user_registry_contract.functions.getUserRole(user_id).call()
+            # With the async backend `.call()` returns a coroutine; `_resolve` handles both backends.
+            role_data = await self._resolve(self.user_registry_contract.functions.getUserRole(user_id).call())
             role = role_data[0]
             is_registered = role_data[1]
             
@@ -131,9 +403,14 @@ class BlockchainService:
                 'error': str(e)
             }
 
-    async def add_medical_record_hash(self, record_hash_hex: str, patient_did: str, record_type: str) -> dict:
+    async def add_medical_record_hash(
+        self, record_hash_hex: str, patient_did: str, record_type: str, wait_for_receipt: Optional[bool] = None
+    ) -> dict:
         """
         Adds a medical record hash to the MedicalRecordRegistry smart contract.
+
+        If `wait_for_receipt` is False (or unset and the service runs in fire-and-track mode),
+        returns as soon as the transaction hash is known with `status` set to PENDING.
         """
         try:
             if not self.w3: # Test mode
@@ -143,7 +420,7 @@ class BlockchainService:
                     'record_hash': record_hash_hex
                 }
 
-            if not self.w3.is_connected():
+            if not await self._is_connected():
                 raise ConnectionError("Could not connect to Ethereum node. Cannot add medical record hash.")
 
             if not self.medical_record_registry_contract:
@@ -161,28 +438,31 @@ class BlockchainService:
             
             record_hash_bytes32 = bytes.fromhex(record_hash_hex)
 
-            # Build transaction
-            tx = self.medical_record_registry_contract.functions.addRecord(
-                record_hash_bytes32,
-                patient_did,
-                record_type
-            ).build_transaction({
-                'from': self.account,
-                'gas': 300000,  # Adjust gas limit as needed
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account),
-            })
-
-            # Sign and send the transaction
-            signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            # Build, sign and send the transaction
+            tx_hash = await self._send_transaction(
+                self.medical_record_registry_contract.functions.addRecord(
+                    record_hash_bytes32,
+                    patient_did,
+                    record_type
+                ),
+                fallback_gas=300000,
+            )
             
+            if not self._should_wait_for_receipt(wait_for_receipt):
+                return {
+                    'success': True,
+                    'status': TX_STATUS_PENDING,
+                    'transaction_hash': Web3.to_hex(tx_hash),
+                    'record_hash': record_hash_hex
+                }
+
             # Wait for transaction receipt
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            receipt = await self._resolve(self.w3.eth.wait_for_transaction_receipt(tx_hash))
             
             if receipt.status == 1:
                 return {
                     'success': True,
+                    'status': TX_STATUS_CONFIRMED,
                     'transaction_hash': receipt.transactionHash.hex(),
                     'record_hash': record_hash_hex
                 }
@@ -231,7 +511,7 @@ class BlockchainService:
                 }
 
             # Check for Ethereum node connection
-            if not self.w3.is_connected():
+            if not await self._is_connected():
                 return {'success': False, 'error': "Could not connect to Ethereum node."}
 
             # Check if the MedicalRecordRegistry contract instance is initialized
@@ -240,10 +520,11 @@ class BlockchainService:
 
             # Call the 'getRecordHashesByPatient' function of the smart contract.
             # This is a read-only operation (.call()), so it doesn't create a transaction.
-            # Note: With a standard Web3.HTTPProvider, this .call() is synchronous (blocking),
-            # even within an async method. For true async behavior here, an AsyncHTTPProvider
-            # and `await contract.functions.method(...).call()` would be needed.
-            raw_hashes = self.medical_record_registry_contract.functions.getRecordHashesByPatient(patient_did).call()
+            # Note: With the sync Web3.HTTPProvider backend, this .call() is blocking even within
+            # an async method. Set BLOCKCHAIN_PROVIDER_MODE=async to use the AsyncWeb3 backend.
+            raw_hashes = await self._resolve(
+                self.medical_record_registry_contract.functions.getRecordHashesByPatient(patient_did).call()
+            )
 
             # The smart contract returns a list of bytes32 values.
             # Convert each bytes32 hash (represented as `bytes` in Python) to a hex string.
@@ -271,7 +552,9 @@ class BlockchainService:
                 'error': f"Failed to retrieve record hashes: {error_message}"
             }
 
-    async def grant_record_access(self, record_hash_hex: str, doctor_address: str) -> dict:
+    async def grant_record_access(
+        self, record_hash_hex: str, doctor_address: str, wait_for_receipt: Optional[bool] = None
+    ) -> dict:
         """
         Grants a doctor access to a specific medical record hash.
         """
@@ -285,7 +568,7 @@ class BlockchainService:
                     'doctor_address': doctor_address
                 }
 
-            if not self.w3.is_connected():
+            if not await self._is_connected():
                 raise ConnectionError("Could not connect to Ethereum node.")
             if not self.medical_record_registry_contract:
                 raise ConnectionError("MedicalRecordRegistry contract is not initialized.")
@@ -312,24 +595,32 @@ class BlockchainService:
                 # This is to make the error more debuggable if it happens
                 raise ValueError(f"bytes.fromhex failed for input '{hash_for_bytes_conversion}'. Original error: {e_fromhex}") from e_fromhex
 
-            # Build transaction
-            tx = self.medical_record_registry_contract.functions.grantAccess(
-                record_hash_bytes32,
-                doctor_address  # The address to grant access to
-            ).build_transaction({
-                'from': self.account,
-                'gas': 200000, # Adjust gas limit as needed
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account),
-            })
+            # Build, sign and send the transaction
+            tx_hash = await self._send_transaction(
+                self.medical_record_registry_contract.functions.grantAccess(
+                    record_hash_bytes32,
+                    doctor_address  # The address to grant access to
+                ),
+                fallback_gas=200000,
+            )
+            self.access_cache.invalidate(original_record_hash_for_response, doctor_address)
+            if not self._should_wait_for_receipt(wait_for_receipt):
+                return {
+                    'success': True,
+                    'status': TX_STATUS_PENDING,
+                    'transaction_hash': Web3.to_hex(tx_hash),
+                    'record_hash': original_record_hash_for_response,
+                    'doctor_address': doctor_address
+                }
 
-            signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            receipt = await self._resolve(self.w3.eth.wait_for_transaction_receipt(tx_hash))
+            # A check made while the transaction was being mined may have cached the old state
+            self.access_cache.invalidate(original_record_hash_for_response, doctor_address)
 
             if receipt.status == 1:
                 return {
                     'success': True,
+                    'status': TX_STATUS_CONFIRMED,
                     'transaction_hash': receipt.transactionHash.hex(),
                     'record_hash': original_record_hash_for_response, # Use original for response
                     'doctor_address': doctor_address
@@ -354,7 +645,9 @@ class BlockchainService:
                 error_message = f"Smart contract execution reverted (grantAccess): {error_message}"
             return {'success': False, 'error': f"An unexpected error occurred during grantAccess: {error_message}"}
 
-    async def revoke_record_access(self, record_hash_hex: str, doctor_address: str) -> dict:
+    async def revoke_record_access(
+        self, record_hash_hex: str, doctor_address: str, wait_for_receipt: Optional[bool] = None
+    ) -> dict:
         """
         Revokes a doctor's access to a specific medical record hash.
         """
@@ -368,7 +661,7 @@ class BlockchainService:
                     'doctor_address': doctor_address
                 }
 
-            if not self.w3.is_connected():
+            if not await self._is_connected():
                 raise ConnectionError("Could not connect to Ethereum node.")
             if not self.medical_record_registry_contract:
                 raise ConnectionError("MedicalRecordRegistry contract is not initialized.")
@@ -395,24 +688,32 @@ class BlockchainService:
                 # This is to make the error more debuggable if it happens
                 raise ValueError(f"bytes.fromhex failed for input '{hash_for_bytes_conversion}'. Original error: {e_fromhex}") from e_fromhex
 
-            # Build transaction
-            tx = self.medical_record_registry_contract.functions.revokeAccess(
-                record_hash_bytes32,
-                doctor_address
-            ).build_transaction({
-                'from': self.account,
-                'gas': 200000, # Adjust gas limit
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account),
-            })
+            # Build, sign and send the transaction
+            tx_hash = await self._send_transaction(
+                self.medical_record_registry_contract.functions.revokeAccess(
+                    record_hash_bytes32,
+                    doctor_address
+                ),
+                fallback_gas=200000,
+            )
+            self.access_cache.invalidate(original_record_hash_for_response, doctor_address)
+            if not self._should_wait_for_receipt(wait_for_receipt):
+                return {
+                    'success': True,
+                    'status': TX_STATUS_PENDING,
+                    'transaction_hash': Web3.to_hex(tx_hash),
+                    'record_hash': original_record_hash_for_response,
+                    'doctor_address': doctor_address
+                }
 
-            signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            receipt = await self._resolve(self.w3.eth.wait_for_transaction_receipt(tx_hash))
+            # A check made while the transaction was being mined may have cached the old state
+            self.access_cache.invalidate(original_record_hash_for_response, doctor_address)
 
             if receipt.status == 1:
                 return {
                     'success': True,
+                    'status': TX_STATUS_CONFIRMED,
                     'transaction_hash': receipt.transactionHash.hex(),
                     'record_hash': original_record_hash_for_response, # Use original for response
                     'doctor_address': doctor_address
@@ -450,7 +751,16 @@ class BlockchainService:
                     'accessor_address': accessor_address
                 }
 
-            if not self.w3.is_connected():
+            cached_access = self.access_cache.get(original_record_hash_for_response, accessor_address)
+            if cached_access is not None:
+                return {
+                    'success': True,
+                    'has_access': cached_access,
+                    'record_hash': original_record_hash_for_response,
+                    'accessor_address': accessor_address
+                }
+
+            if not await self._is_connected():
                 raise ConnectionError("Could not connect to Ethereum node.")
             if not self.medical_record_registry_contract:
                 raise ConnectionError("MedicalRecordRegistry contract is not initialized.")
@@ -476,10 +786,11 @@ class BlockchainService:
                 raise ValueError(f"bytes.fromhex failed for input '{hash_for_bytes_conversion}'. Original error: {e_fromhex}") from e_fromhex
 
             # Call the 'checkAccess' view function
-            has_access = self.medical_record_registry_contract.functions.checkAccess(
+            has_access = await self._resolve(self.medical_record_registry_contract.functions.checkAccess(
                 record_hash_bytes32,
                 accessor_address
-            ).call() # This is a read-only call
+            ).call()) # This is a read-only call
+            self.access_cache.set(original_record_hash_for_response, accessor_address, has_access)
 
             return {
                 'success': True,
@@ -499,6 +810,280 @@ class BlockchainService:
                 error_message = f"Smart contract execution reverted (checkAccess): {error_message}"
             return {'success': False, 'error': f"An unexpected error occurred during checkAccess: {error_message}"}
 
+    async def _batch_call(self, contract_functions: Sequence) -> List[Any]:
+        """
+        Runs many contract view calls as JSON-RPC batches of at most `read_batch_max_size`
+        calls each, instead of one eth_call round trip per call. Results keep the input order.
+        """
+        results = []
+        chunk_size = BLOCKCHAIN_CONFIG["read_batch_max_size"]
+        for start in range(0, len(contract_functions), chunk_size):
+            chunk = contract_functions[start:start + chunk_size]
+            if self.is_async:
+                await self._ensure_http_session()
+                async with self.w3.batch_requests() as batch:
+                    for contract_function in chunk:
+                        batch.add(contract_function)
+                    results.extend(await batch.async_execute())
+            else:
+                with self.w3.batch_requests() as batch:
+                    for contract_function in chunk:
+                        batch.add(contract_function)
+                    results.extend(batch.execute())
+        return results
+
+    async def check_record_access_many(self, checks: Sequence[Tuple[str, str]]) -> dict:
+        """
+        Checks many (record_hash_hex, accessor_address) pairs at once.
+
+        Pairs answered by the access cache are not sent; the others go out as batched
+        checkAccess calls. Returns {'success': True, 'results': [...]} with one entry per pair,
+        in input order, shaped like the result of check_record_access. An invalid pair only
+        fails its own entry; 'success' is False only if the batch itself could not be sent.
+        """
+        results: List[Optional[dict]] = [None] * len(checks)
+        try:
+            pending = []
+            for i, (record_hash_hex, accessor_address) in enumerate(checks):
+                if not self.w3: # Test mode, same rule as check_record_access
+                    results[i] = {
+                        'success': True,
+                        'has_access': accessor_address == "0xDoctorHasAccess",
+                        'record_hash': record_hash_hex,
+                        'accessor_address': accessor_address
+                    }
+                    continue
+                cached_access = self.access_cache.get(record_hash_hex, accessor_address)
+                if cached_access is not None:
+                    results[i] = {
+                        'success': True,
+                        'has_access': cached_access,
+                        'record_hash': record_hash_hex,
+                        'accessor_address': accessor_address
+                    }
+                    continue
+                try:
+                    if not self.w3.is_address(accessor_address):
+                        raise ValueError(f"Invalid Ethereum address format for accessor: {accessor_address}")
+                    hash_hex = record_hash_hex[2:] if str(record_hash_hex).startswith("0x") else str(record_hash_hex)
+                    if len(hash_hex) != 64:
+                        raise ValueError(f"Record hash hex string must be 64 characters (32 bytes) long, got {len(hash_hex)} from original '{record_hash_hex}'")
+                    pending.append((i, bytes.fromhex(hash_hex)))
+                except ValueError as ve:
+                    results[i] = {'success': False, 'error': str(ve), 'record_hash': record_hash_hex, 'accessor_address': accessor_address}
+
+            if pending:
+                if not await self._is_connected():
+                    raise ConnectionError("Could not connect to Ethereum node.")
+                if not self.medical_record_registry_contract:
+                    raise ConnectionError("MedicalRecordRegistry contract is not initialized.")
+                calls = [
+                    self.medical_record_registry_contract.functions.checkAccess(record_hash_bytes32, checks[i][1])
+                    for i, record_hash_bytes32 in pending
+                ]
+                for (i, _), has_access in zip(pending, await self._batch_call(calls)):
+                    record_hash_hex, accessor_address = checks[i]
+                    self.access_cache.set(record_hash_hex, accessor_address, has_access)
+                    results[i] = {
+                        'success': True,
+                        'has_access': has_access,
+                        'record_hash': record_hash_hex,
+                        'accessor_address': accessor_address
+                    }
+
+            return {'success': True, 'results': results}
+        except ConnectionError as ce:
+            return {'success': False, 'error': str(ce)}
+        except Exception as e:
+            return {'success': False, 'error': f"An unexpected error occurred during batched checkAccess: {str(e)}"}
+
+    async def get_block_number(self) -> dict:
+        """
+        Returns the number of the latest block.
+        """
+        try:
+            if not self.w3: # Test mode
+                return {'success': True, 'block_number': 0}
+            return {'success': True, 'block_number': await self._resolve(self.w3.eth.block_number)}
+        except Exception as e:
+            return {'success': False, 'error': f"Failed to get block number: {str(e)}"}
+
+    async def get_block_hash(self, block_number: int) -> dict:
+        """
+        Returns the hash of the block at `block_number` (None if there is no such block yet).
+        """
+        try:
+            if not self.w3: # Test mode
+                return {'success': True, 'block_hash': None}
+            block = await self._resolve(self.w3.eth.get_block(block_number))
+            return {'success': True, 'block_hash': Web3.to_hex(block['hash']) if block else None}
+        except Exception as e:
+            return {'success': False, 'error': f"Failed to get block {block_number}: {str(e)}"}
+
+    @staticmethod
+    def _event_to_dict(event_name: str, log) -> dict:
+        args = log['args']
+        event = {
+            'event': event_name,
+            'block_number': log['blockNumber'],
+            'log_index': log['logIndex'],
+            'transaction_hash': Web3.to_hex(log['transactionHash']),
+        }
+        if event_name == "RecordAdded":
+            event.update({
+                'record_hash': Web3.to_hex(args['recordHash']),
+                # Indexed string: the topic holds keccak256(patientDid)
+                'patient_did_hash': Web3.to_hex(args['patientDid']),
+                'record_type': args['recordType'],
+                'submitter': args['submitter'],
+                'timestamp': args['timestamp'],
+            })
+        else:
+            event.update({
+                'record_hash': Web3.to_hex(args['recordHash']),
+                'owner_address': args['ownerAddress'],
+                'doctor_address': args['doctorAddress'],
+                'timestamp': args['timestamp'],
+            })
+        return event
+
+    async def get_registry_events(self, from_block: int, to_block: int, event_names=REGISTRY_EVENTS) -> dict:
+        """
+        Returns the MedicalRecordRegistry events named in `event_names` emitted in
+        [from_block, to_block], ordered by block and log index.
+        """
+        try:
+            if not self.w3: # Test mode
+                return {'success': True, 'events': []}
+            if not self.medical_record_registry_contract:
+                raise ConnectionError("MedicalRecordRegistry contract is not initialized.")
+
+            events = []
+            for event_name in event_names:
+                logs = await self._resolve(
+                    getattr(self.medical_record_registry_contract.events, event_name).get_logs(
+                        from_block=from_block, to_block=to_block
+                    )
+                )
+                events.extend(self._event_to_dict(event_name, log) for log in logs)
+            events.sort(key=lambda event: (event['block_number'], event['log_index']))
+            return {'success': True, 'events': events}
+        except Exception as e:
+            return {'success': False, 'error': f"Failed to get registry events: {str(e)}"}
+
+    async def get_access_change_events(self, from_block: int, to_block: int) -> dict:
+        """
+        Returns the AccessGranted/AccessRevoked events emitted in [from_block, to_block],
+        ordered by block and log index.
+        """
+        return await self.get_registry_events(from_block, to_block, ("AccessGranted", "AccessRevoked"))
+
+    async def anchor_merkle_root(
+        self, merkle_root_hex: str, leaf_count: int, wait_for_receipt: Optional[bool] = None
+    ) -> dict:
+        """
+        Anchors the Merkle root of a batch of record hashes with MedicalRecordRegistry.anchorBatch.
+
+        Like add_medical_record_hash, returns with `status` PENDING if the receipt is not awaited.
+        """
+        try:
+            if not self.w3: # Test mode
+                return {
+                    'success': True,
+                    'transaction_hash': '0xabcdef1234567890',
+                    'merkle_root': merkle_root_hex
+                }
+
+            if not await self._is_connected():
+                raise ConnectionError("Could not connect to Ethereum node. Cannot anchor batch.")
+            if not self.medical_record_registry_contract:
+                raise ConnectionError("MedicalRecordRegistry contract is not initialized. Cannot anchor batch.")
+            if not self.private_key:
+                raise ValueError("Blockchain sender private key not configured. Cannot anchor batch.")
+
+            root_hex = merkle_root_hex[2:] if merkle_root_hex.startswith("0x") else merkle_root_hex
+            if len(root_hex) != 64:
+                raise ValueError(f"Merkle root hex string must be 64 characters (32 bytes) long, got {len(root_hex)}")
+
+            tx_hash = await self._send_transaction(
+                self.medical_record_registry_contract.functions.anchorBatch(bytes.fromhex(root_hex), leaf_count),
+                fallback_gas=150000,
+            )
+
+            if not self._should_wait_for_receipt(wait_for_receipt):
+                return {
+                    'success': True,
+                    'status': TX_STATUS_PENDING,
+                    'transaction_hash': Web3.to_hex(tx_hash),
+                    'merkle_root': merkle_root_hex
+                }
+
+            receipt = await self._resolve(self.w3.eth.wait_for_transaction_receipt(tx_hash))
+            if receipt.status == 1:
+                return {
+                    'success': True,
+                    'status': TX_STATUS_CONFIRMED,
+                    'transaction_hash': receipt.transactionHash.hex(),
+                    'merkle_root': merkle_root_hex
+                }
+            return {
+                'success': False,
+                'error': 'Transaction failed on blockchain.',
+                'transaction_hash': receipt.transactionHash.hex()
+            }
+
+        except ValueError as ve:
+            return {'success': False, 'error': str(ve)}
+        except ConnectionError as ce:
+            return {'success': False, 'error': str(ce)}
+        except Exception as e:
+            error_message = str(e)
+            if "revert" in error_message.lower() or "VM Exception" in error_message:
+                error_message = f"Smart contract execution reverted (anchorBatch): {error_message}"
+            return {'success': False, 'error': f"An unexpected error occurred during anchorBatch: {error_message}"}
+
+    @staticmethod
+    def _bytes32(value_hex: str) -> bytes:
+        value_hex = value_hex[2:] if value_hex.startswith("0x") else value_hex
+        if len(value_hex) != 64:
+            raise ValueError(f"Hash hex string must be 64 characters (32 bytes) long, got {len(value_hex)}")
+        return bytes.fromhex(value_hex)
+
+    async def get_batch_anchor(self, merkle_root_hex: str) -> dict:
+        """
+        Reads MedicalRecordRegistry.getBatchMetadata for a Merkle root. `anchored` is True
+        once an anchorBatch transaction for the root has been mined.
+        """
+        try:
+            if not self.w3: # Test mode
+                return {'success': True, 'anchored': True, 'leaf_count': None}
+            if not self.medical_record_registry_contract:
+                raise ConnectionError("MedicalRecordRegistry contract is not initialized.")
+            leaf_count, _, submitter = await self._resolve(
+                self.medical_record_registry_contract.functions.getBatchMetadata(self._bytes32(merkle_root_hex)).call()
+            )
+            anchored = int(submitter, 16) != 0 if isinstance(submitter, str) else bool(submitter)
+            return {'success': True, 'anchored': anchored, 'leaf_count': leaf_count}
+        except Exception as e:
+            return {'success': False, 'error': f"Failed to read batch {merkle_root_hex}: {str(e)}"}
+
+    async def verify_batched_record(self, record_hash_hex: str, proof: Sequence[str], merkle_root_hex: str) -> dict:
+        """
+        Checks an inclusion proof with MedicalRecordRegistry.verifyBatchedRecord, which also
+        requires the root to be anchored on-chain.
+        """
+        try:
+            if not self.w3: # Test mode
+                return {'success': True, 'verified': verify_proof(record_hash_hex, list(proof), merkle_root_hex)}
+            if not self.medical_record_registry_contract:
+                raise ConnectionError("MedicalRecordRegistry contract is not initialized.")
+            verified = await self._resolve(self.medical_record_registry_contract.functions.verifyBatchedRecord(
+                self._bytes32(record_hash_hex), [self._bytes32(sibling) for sibling in proof], self._bytes32(merkle_root_hex)
+            ).call())
+            return {'success': True, 'verified': bool(verified)}
+        except Exception as e:
+            return {'success': False, 'error': f"Failed to verify record {record_hash_hex} against batch {merkle_root_hex}: {str(e)}"}
+
 _blockchain_service_instance = None
 
 def get_blockchain_service():
@@ -509,4 +1094,11 @@ def get_blockchain_service():
     global _blockchain_service_instance
     if _blockchain_service_instance is None:
         _blockchain_service_instance = BlockchainService(test_mode="PYTEST_CURRENT_TEST" in os.environ)
-    return _blockchain_service_instance
\ No newline at end of file
+    return _blockchain_service_instance
+
+async def shutdown_blockchain_service():
+    """
+    Closes network resources held by the singleton, if it was ever created.
+    """
+    if _blockchain_service_instance is not None:
+        await _blockchain_service_instance.close()
\ No newline at end of file
@@ -0,0 +1,105 @@
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .metrics import metrics
+
+# Names of the values held by ChainStateCache
+CHAIN_STATE_CONNECTED = "connected"
+CHAIN_STATE_GAS_PRICE = "gas_price"
+CHAIN_STATE_CHAIN_ID = "chain_id"
+
+# Substrings of node error messages that mean the gas price we sent is below what the
+# node accepts, i.e. the cached gas price is out of date.
+UNDERPRICED_ERROR_MARKERS = (
+    "transaction underpriced",
+    "fee too low",
+    "less than block base fee",
+    "gas price too low",
+)
+
+
+def is_underpriced_error(error: Exception) -> bool:
+    """
+    Returns True if `error` was raised because the transaction gas price was too low.
+    """
+    message = str(error).lower()
+    return any(marker in message for marker in UNDERPRICED_ERROR_MARKERS)
+
+
+class ChainStateCache:
+    """
+    In-memory copy of the chain values every transaction needs: node connectivity, gas
+    price and chain ID, plus the gas limit estimated for each contract function.
+
+    Values are kept `ttl_seconds` after they were fetched (the ChainStateRefresher
+    refreshes them in the background before that); the chain ID never expires. Gas limits
+    are the largest estimate seen for a function, scaled by `gas_limit_multiplier`, and
+    are re-estimated after `gas_limit_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        gas_limit_ttl_seconds: float,
+        gas_limit_multiplier: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.gas_limit_ttl_seconds = gas_limit_ttl_seconds
+        self.gas_limit_multiplier = gas_limit_multiplier
+        self._clock = clock
+        self._values: Dict[str, Tuple[Any, float]] = {}
+        self._gas_limits: Dict[Hashable, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[Any]:
+        """
+        Returns the cached value, or None if it was never fetched or has expired.
+        """
+        with self._lock:
+            entry = self._values.get(name)
+            if entry is not None and entry[1] <= self._clock():
+                del self._values[name]
+                entry = None
+        metrics.increment("chain_state.hits" if entry is not None else "chain_state.misses")
+        return entry[0] if entry is not None else None
+
+    def set(self, name: str, value: Any, expires: bool = True) -> None:
+        """
+        Stores a freshly fetched value. Values that cannot change (chain ID) pass `expires=False`.
+        """
+        expires_at = self._clock() + self.ttl_seconds if expires else math.inf
+        with self._lock:
+            self._values[name] = (value, expires_at)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        Drops one value, or all values (not the gas limits) if no name is given.
+        """
+        with self._lock:
+            if name is None:
+                self._values.clear()
+            else:
+                self._values.pop(name, None)
+
+    def get_gas_limit(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            entry = self._gas_limits.get(key)
+            if entry is None or entry[1] <= self._clock():
+                return None
+            return entry[0]
+
+    def record_gas_estimate(self, key: Hashable, estimate: int) -> int:
+        """
+        Stores the gas limit for an estimate of the function `key` and returns it.
+        """
+        gas_limit = math.ceil(estimate * self.gas_limit_multiplier)
+        with self._lock:
+            previous = self._gas_limits.get(key)
+            if previous is not None:
+                gas_limit = max(gas_limit, previous[0])
+            self._gas_limits[key] = (gas_limit, self._clock() + self.gas_limit_ttl_seconds)
+        metrics.increment("chain_state.gas_estimates")
+        return gas_limit
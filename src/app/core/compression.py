@@ -0,0 +1,134 @@
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from .config import RECORD_ENCRYPTION_CONFIG
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+# Compression codecs. A compressed record payload starts with the codec byte (inside the
+# ciphertext, so it is authenticated with the data) followed by the compressed body.
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+COMPRESSION_CODECS = {
+    "none": COMPRESSION_NONE,
+    "zlib": COMPRESSION_ZLIB,
+    "zstd": COMPRESSION_ZSTD,
+}
+
+
+def zstd_available() -> bool:
+    return zstandard is not None
+
+
+def get_compression_codec(name: str) -> int:
+    """
+    Returns the codec byte of a codec name ("none", "zlib" or "zstd"). Raises ValueError
+    for unknown codecs and for zstd when the zstandard package is not installed.
+    """
+    codec = COMPRESSION_CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unknown compression codec: {name}")
+    if codec == COMPRESSION_ZSTD and not zstd_available():
+        raise ValueError("zstd compression requires the zstandard package.")
+    return codec
+
+
+def select_compression(payload_size: int, name: Optional[str] = None) -> int:
+    """
+    Codec for a new record payload: `name` if given, otherwise the configured codec for
+    payloads of at least `compression_min_bytes` (smaller ones rarely shrink) and none
+    below. A configured zstd falls back to zlib when zstandard is not installed.
+    """
+    if name is not None:
+        return get_compression_codec(name)
+    if payload_size < RECORD_ENCRYPTION_CONFIG["compression_min_bytes"]:
+        return COMPRESSION_NONE
+    codec = COMPRESSION_CODECS.get(RECORD_ENCRYPTION_CONFIG["compression"], COMPRESSION_ZLIB)
+    if codec == COMPRESSION_ZSTD and not zstd_available():
+        return COMPRESSION_ZLIB
+    return codec
+
+
+def _compressor(codec: int):
+    if codec == COMPRESSION_ZLIB:
+        return zlib.compressobj(RECORD_ENCRYPTION_CONFIG["zlib_level"])
+    if codec == COMPRESSION_ZSTD and zstd_available():
+        return zstandard.ZstdCompressor(level=RECORD_ENCRYPTION_CONFIG["zstd_level"]).compressobj()
+    raise ValueError(f"Unsupported compression codec: {codec}")
+
+
+def _decompressor(codec: int):
+    if codec == COMPRESSION_ZLIB:
+        return zlib.decompressobj()
+    if codec == COMPRESSION_ZSTD and zstd_available():
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unsupported compression codec: {codec}")
+
+
+def frame(data: bytes, codec: int) -> bytes:
+    """
+    Returns the codec byte followed by `data` compressed with `codec`. If compression does
+    not make the payload smaller, it is framed uncompressed instead.
+    """
+    if codec != COMPRESSION_NONE:
+        compressor = _compressor(codec)
+        body = compressor.compress(data) + compressor.flush()
+        if len(body) < len(data):
+            return bytes([codec]) + body
+    return bytes([COMPRESSION_NONE]) + data
+
+
+def unframe(payload: bytes) -> bytes:
+    """
+    Reverses `frame`. Raises ValueError if the payload is empty, the codec is unknown or
+    the body does not decompress.
+    """
+    return b"".join(unframe_stream([payload]))
+
+
+def frame_stream(chunks: Iterable[bytes], codec: int) -> Iterator[bytes]:
+    """
+    Streaming `frame`: yields the codec byte, then the compressed chunks.
+    """
+    yield bytes([codec])
+    if codec == COMPRESSION_NONE:
+        yield from chunks
+        return
+    compressor = _compressor(codec)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def unframe_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Streaming `unframe`: reads the codec byte from the first non-empty chunk and yields the
+    decompressed data.
+    """
+    decompressor = None
+    codec = None
+    for chunk in chunks:
+        if codec is None:
+            if not chunk:
+                continue
+            codec, chunk = chunk[0], chunk[1:]
+            if codec != COMPRESSION_NONE:
+                decompressor = _decompressor(codec)
+        if decompressor is None:
+            yield chunk
+            continue
+        try:
+            yield decompressor.decompress(chunk)
+        except Exception as e: # zlib.error / zstandard.ZstdError
+            raise ValueError(f"Decompression failed. Error: {e}")
+    if codec is None:
+        raise ValueError("Compressed payload is missing its codec byte.")
+    if decompressor is not None and not getattr(decompressor, "eof", True):
+        raise ValueError("Compressed payload is truncated.")
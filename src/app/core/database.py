@@ -1,14 +1,46 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import DATABASE_CONFIG
+from .db_pool import engine_pool_options, instrument_pool
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Maps a sync database URL to the matching asyncio driver
+    (psycopg2 -> asyncpg, pysqlite -> aiosqlite).
+    """
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite+pysqlite://", "sqlite+aiosqlite://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
 
 # Create SQLAlchemy engine
-engine = create_engine(DATABASE_CONFIG["url"])
+# The sync engine is kept for Alembic, background workers and scripts.
+engine = create_engine(DATABASE_CONFIG["url"], **engine_pool_options(DATABASE_CONFIG["url"], DATABASE_CONFIG))
+instrument_pool(engine.pool, "sync")
 
 # Create SessionLocal class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API, so a slow query does not block the event loop.
+async_engine = create_async_engine(
+    get_async_database_url(DATABASE_CONFIG["url"]),
+    **engine_pool_options(DATABASE_CONFIG["url"], DATABASE_CONFIG, async_engine=True),
+)
+instrument_pool(async_engine.sync_engine.pool, "async")
+
+# expire_on_commit=False: attributes stay loaded after commit, since an AsyncSession
+# cannot lazily reload them when a response model reads them.
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Base for SQLAlchemy models
 Base = declarative_base()
 
@@ -18,4 +50,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
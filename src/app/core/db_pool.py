@@ -0,0 +1,97 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from .metrics import metrics as default_metrics, MetricsRegistry
+
+
+def engine_pool_options(url: str, config: dict, async_engine: bool = False) -> dict:
+    """
+    Returns create_engine()/create_async_engine() keyword arguments for the connection pool.
+
+    SQLite URLs keep SQLAlchemy's default pool, since sizing, recycle and timeout
+    settings do not apply to its file/memory pools.
+    """
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if async_engine else InstrumentedQueuePool,
+        "pool_size": config["pool_size"],
+        "max_overflow": config["max_overflow"],
+        "pool_timeout": config["pool_timeout"],
+        "pool_recycle": config["pool_recycle"],
+        "pool_pre_ping": config["pool_pre_ping"],
+    }
+
+
+class _CheckoutTimingMixin:
+    """
+    Times how long a checkout waits for a connection and counts exhaustion, i.e.
+    checkouts that found every connection (pool_size + max_overflow) in use.
+    """
+    metrics_label = "db"
+    metrics_registry: MetricsRegistry = default_metrics
+
+    def _do_get(self):
+        prefix = f"db_pool.{self.metrics_label}"
+        exhausted = (
+            self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+            and self._pool.empty()
+        )
+        if exhausted:
+            self.metrics_registry.increment(f"{prefix}.exhausted")
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics_registry.increment(f"{prefix}.timeouts")
+            raise
+        finally:
+            self.metrics_registry.observe(f"{prefix}.checkout_wait_seconds", time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(pool: Pool, label: str, registry: MetricsRegistry = default_metrics) -> None:
+    """
+    Publishes connection churn and pool occupancy of `pool` as `db_pool.<label>.*` metrics.
+    """
+    prefix = f"db_pool.{label}"
+    if isinstance(pool, _CheckoutTimingMixin):
+        pool.metrics_label = label
+        pool.metrics_registry = registry
+
+    def update_gauges(returning: int = 0):
+        if isinstance(pool, QueuePool):
+            registry.set_gauge(f"{prefix}.checked_out", pool.checkedout() - returning)
+            registry.set_gauge(f"{prefix}.overflow", max(pool.overflow(), 0))
+            registry.set_gauge(f"{prefix}.size", pool.size())
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        registry.increment(f"{prefix}.connections_opened")
+
+    @event.listens_for(pool, "close")
+    def on_close(dbapi_connection, connection_record):
+        registry.increment(f"{prefix}.connections_closed")
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        registry.increment(f"{prefix}.invalidations")
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        update_gauges()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        # Fired before the connection is back in the queue
+        update_gauges(returning=1)
@@ -1,13 +1,40 @@
+import asyncio
 import hashlib
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
+from .compression import COMPRESSION_NONE, frame, frame_stream, select_compression, unframe, unframe_stream
+from .config import CRYPTO_WORKER_CONFIG, RECORD_ENCRYPTION_CONFIG
+from .metrics import metrics
+
+T = TypeVar("T")
+
 # AES-GCM uses a 12-byte (96-bit) nonce by default, which is recommended.
 # AES-GCM authentication tag is 16 bytes (128 bits) by default.
 AES_NONCE_SIZE = 12  # bytes
 AES_TAG_SIZE = 16  # bytes
 
+# Blob formats, stored in MedicalRecord.encryption_format
+ENCRYPTION_FORMAT_AESGCM = 1  # nonce + ciphertext + tag, see encrypt_data
+ENCRYPTION_FORMAT_CHUNKED = 2  # header + sealed chunks, see CipherContext.encrypt_stream
+# As above, but the plaintext is a compression frame: codec byte + (compressed) payload
+ENCRYPTION_FORMAT_AESGCM_COMPRESSED = 3
+ENCRYPTION_FORMAT_CHUNKED_COMPRESSED = 4
+
+# Chunked format: the header is the format byte, the chunk size (uint32, big endian) and
+# a random nonce prefix. Chunk i is sealed with nonce = prefix + i (uint32) + last flag
+# and the header as associated data, so chunks cannot be reordered, dropped, truncated
+# at a chunk boundary or moved to another blob without failing authentication.
+STREAM_NONCE_PREFIX_SIZE = 7  # bytes
+STREAM_HEADER_SIZE = 1 + 4 + STREAM_NONCE_PREFIX_SIZE
+STREAM_MAX_CHUNKS = 2 ** 32
+
 
 def generate_encryption_key() -> bytes:
     """
@@ -16,6 +43,174 @@ def generate_encryption_key() -> bytes:
     return os.urandom(32)
 
 
+class CipherContext:
+    """
+    AES-256-GCM bound to one key.
+
+    The key is validated and the AESGCM key schedule set up once, instead of on every
+    call, which dominates the cost of small records in batch work (exports, imports,
+    re-encryption). Blobs use the same format as `encrypt_data`: nonce + ciphertext + tag.
+    The context holds no per-call state and can be shared between threads.
+    """
+
+    def __init__(self, key: bytes):
+        if not isinstance(key, bytes) or len(key) != 32:
+            raise ValueError("Encryption key must be 32 bytes.")
+        self._aesgcm = AESGCM(key)
+
+    def encrypt(self, data: str) -> bytes:
+        return self.encrypt_bytes(data.encode('utf-8'))
+
+    def decrypt(self, encrypted_data_with_nonce_tag: bytes) -> str:
+        decrypted_bytes = self.decrypt_bytes(encrypted_data_with_nonce_tag)
+        try:
+            return decrypted_bytes.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Decryption failed. Data may be corrupted or key is incorrect. Error: {e}")
+
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        nonce = os.urandom(AES_NONCE_SIZE)
+        # AESGCM.encrypt returns ciphertext + tag; the nonce is prepended
+        return nonce + self._aesgcm.encrypt(nonce, data, None)  # No associated data
+
+    def decrypt_bytes(self, encrypted_data_with_nonce_tag: bytes) -> bytes:
+        if len(encrypted_data_with_nonce_tag) < AES_NONCE_SIZE + AES_TAG_SIZE:
+            raise ValueError("Encrypted data is too short to contain nonce, ciphertext, and tag.")
+        nonce = encrypted_data_with_nonce_tag[:AES_NONCE_SIZE]
+        try:
+            return self._aesgcm.decrypt(nonce, encrypted_data_with_nonce_tag[AES_NONCE_SIZE:], None)
+        except Exception as e: # Catching general exception from decrypt, e.g. InvalidTag
+            raise ValueError(f"Decryption failed. Data may be corrupted or key is incorrect. Error: {e}")
+
+    def encrypt_record(
+        self, data: str, encryption_format: int = ENCRYPTION_FORMAT_AESGCM, compression: int = COMPRESSION_NONE
+    ) -> bytes:
+        """
+        Encrypts a record payload in the given blob format. `compression` is the codec of
+        the compressed formats and is ignored by the others.
+        """
+        if encryption_format == ENCRYPTION_FORMAT_AESGCM:
+            return self.encrypt(data)
+        if encryption_format == ENCRYPTION_FORMAT_CHUNKED:
+            return b"".join(self.encrypt_stream([data.encode('utf-8')]))
+        if encryption_format == ENCRYPTION_FORMAT_AESGCM_COMPRESSED:
+            return self.encrypt_bytes(frame(data.encode('utf-8'), compression))
+        if encryption_format == ENCRYPTION_FORMAT_CHUNKED_COMPRESSED:
+            return b"".join(self.encrypt_stream(frame_stream([data.encode('utf-8')], compression)))
+        raise ValueError(f"Unknown encryption format: {encryption_format}")
+
+    def decrypt_record(self, encrypted_data: bytes, encryption_format: int = ENCRYPTION_FORMAT_AESGCM) -> str:
+        """
+        Decrypts a record payload stored in the given blob format, decompressing it if needed.
+        """
+        if encryption_format == ENCRYPTION_FORMAT_AESGCM:
+            return self.decrypt(encrypted_data)
+        if encryption_format == ENCRYPTION_FORMAT_CHUNKED:
+            plaintext = b"".join(self.decrypt_stream([encrypted_data]))
+        elif encryption_format == ENCRYPTION_FORMAT_AESGCM_COMPRESSED:
+            plaintext = unframe(self.decrypt_bytes(encrypted_data))
+        elif encryption_format == ENCRYPTION_FORMAT_CHUNKED_COMPRESSED:
+            plaintext = b"".join(unframe_stream(self.decrypt_stream([encrypted_data])))
+        else:
+            raise ValueError(f"Unknown encryption format: {encryption_format}")
+        try:
+            return plaintext.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Decryption failed. Data may be corrupted or key is incorrect. Error: {e}")
+
+    def encrypt_many(self, items: Iterable[str]) -> List[bytes]:
+        return [self.encrypt(data) for data in items]
+
+    def decrypt_many(self, blobs: Iterable[bytes]) -> List[str]:
+        """
+        Decrypts every blob; raises ValueError on the first one that fails.
+        """
+        return [self.decrypt(blob) for blob in blobs]
+
+    @staticmethod
+    def _chunk_nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+        if counter >= STREAM_MAX_CHUNKS:
+            raise ValueError("Too many chunks for one encrypted stream.")
+        return prefix + counter.to_bytes(4, "big") + (b"\x01" if last else b"\x00")
+
+    def encrypt_stream(
+        self, chunks: Iterable[bytes], chunk_size: int = RECORD_ENCRYPTION_CONFIG["stream_chunk_size"]
+    ) -> Iterator[bytes]:
+        """
+        Encrypts a stream of plaintext bytes into the chunked format, holding at most one
+        input chunk plus `chunk_size` bytes in memory. Yields the header, then one sealed
+        chunk (ciphertext + tag) per `chunk_size` bytes of plaintext.
+        """
+        if not 0 < chunk_size < 2 ** 32:
+            raise ValueError("Chunk size must be between 1 byte and 4 GiB.")
+        prefix = os.urandom(STREAM_NONCE_PREFIX_SIZE)
+        header = bytes([ENCRYPTION_FORMAT_CHUNKED]) + chunk_size.to_bytes(4, "big") + prefix
+        yield header
+
+        buffer = bytearray()
+        counter = 0
+        for chunk in chunks:
+            buffer.extend(chunk)
+            offset = 0
+            # Keep at least one byte back: only the final chunk may be sealed as last
+            while len(buffer) - offset > chunk_size:
+                nonce = self._chunk_nonce(prefix, counter, last=False)
+                yield self._aesgcm.encrypt(nonce, bytes(buffer[offset:offset + chunk_size]), header)
+                offset += chunk_size
+                counter += 1
+            del buffer[:offset]
+        yield self._aesgcm.encrypt(self._chunk_nonce(prefix, counter, last=True), bytes(buffer), header)
+
+    def decrypt_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Decrypts a chunked-format stream (split at arbitrary points), yielding plaintext
+        chunk by chunk. Raises ValueError if the header is invalid or any chunk fails to
+        authenticate; plaintext already yielded came from authenticated chunks only.
+        """
+        buffer = bytearray()
+        header = None
+        prefix = b""
+        sealed_size = 0
+        counter = 0
+
+        def open_chunk(sealed: bytes, last: bool) -> bytes:
+            try:
+                return self._aesgcm.decrypt(self._chunk_nonce(prefix, counter, last), sealed, header)
+            except Exception as e: # InvalidTag
+                raise ValueError(f"Decryption failed. Data may be corrupted, truncated or key is incorrect. Error: {e!r}")
+
+        for chunk in chunks:
+            buffer.extend(chunk)
+            offset = 0
+            if header is None:
+                if len(buffer) < STREAM_HEADER_SIZE:
+                    continue
+                header = bytes(buffer[:STREAM_HEADER_SIZE])
+                if header[0] != ENCRYPTION_FORMAT_CHUNKED:
+                    raise ValueError(f"Unsupported encrypted stream format: {header[0]}.")
+                sealed_size = int.from_bytes(header[1:5], "big") + AES_TAG_SIZE
+                prefix = header[5:]
+                offset = STREAM_HEADER_SIZE
+            # A full chunk followed by more data is not the last one
+            while len(buffer) - offset > sealed_size:
+                yield open_chunk(bytes(buffer[offset:offset + sealed_size]), last=False)
+                offset += sealed_size
+                counter += 1
+            del buffer[:offset]
+
+        if header is None or len(buffer) < AES_TAG_SIZE:
+            raise ValueError("Encrypted stream is truncated.")
+        yield open_chunk(bytes(buffer), last=True)
+
+
+@lru_cache(maxsize=16)
+def get_cipher_context(key: bytes) -> CipherContext:
+    """
+    Returns the shared CipherContext of `key`; only a handful of key versions are live at once.
+    """
+    return CipherContext(key)
+
+
 def encrypt_data(data: str, key: bytes) -> bytes:
     """
     Encrypts data using AES-256-GCM.
@@ -29,19 +224,7 @@ def encrypt_data(data: str, key: bytes) -> bytes:
     """
     if not isinstance(key, bytes) or len(key) != 32:
         raise ValueError("Encryption key must be 32 bytes.")
-
-    aesgcm = AESGCM(key)
-    nonce = os.urandom(AES_NONCE_SIZE)  # AESGCM standard nonce size is 12 bytes
-    data_bytes = data.encode('utf-8')
-    ciphertext_with_tag = aesgcm.encrypt(nonce, data_bytes, None)  # No associated data
-
-    # ciphertext_with_tag already includes the authentication tag at the end
-    # The typical order is nonce || ciphertext || tag
-    # AESGCM encrypt method returns ciphertext || tag
-    
-    # The encrypt() method returns ciphertext + tag.
-    # We need to prepend the nonce to it.
-    return nonce + ciphertext_with_tag
+    return get_cipher_context(key).encrypt(data)
 
 
 def decrypt_data(encrypted_data_with_nonce_tag: bytes, key: bytes) -> str:
@@ -58,21 +241,70 @@ def decrypt_data(encrypted_data_with_nonce_tag: bytes, key: bytes) -> str:
     """
     if not isinstance(key, bytes) or len(key) != 32:
         raise ValueError("Decryption key must be 32 bytes.")
+    return get_cipher_context(key).decrypt(encrypted_data_with_nonce_tag)
 
-    if len(encrypted_data_with_nonce_tag) < AES_NONCE_SIZE + AES_TAG_SIZE:
-        raise ValueError("Encrypted data is too short to contain nonce, ciphertext, and tag.")
 
-    nonce = encrypted_data_with_nonce_tag[:AES_NONCE_SIZE]
-    # The rest is ciphertext + tag
-    ciphertext_and_tag = encrypted_data_with_nonce_tag[AES_NONCE_SIZE:]
-    
-    aesgcm = AESGCM(key)
-    
-    try:
-        decrypted_bytes = aesgcm.decrypt(nonce, ciphertext_and_tag, None)  # No associated data
-        return decrypted_bytes.decode('utf-8')
-    except Exception as e: # Catching general exception from decrypt, e.g. InvalidTag
-        raise ValueError(f"Decryption failed. Data may be corrupted or key is incorrect. Error: {e}")
+def encrypt_stream(
+    chunks: Iterable[bytes], key: bytes, chunk_size: int = RECORD_ENCRYPTION_CONFIG["stream_chunk_size"]
+) -> Iterator[bytes]:
+    """
+    Encrypts a stream of bytes in the chunked format (ENCRYPTION_FORMAT_CHUNKED) in constant memory.
+
+    Args:
+        chunks: The plaintext, as byte chunks of any size.
+        key: The 32-byte encryption key.
+        chunk_size: Plaintext bytes per sealed chunk.
+
+    Returns:
+        An iterator over the header and the sealed chunks.
+    """
+    return get_cipher_context(key).encrypt_stream(chunks, chunk_size)
+
+
+def decrypt_stream(chunks: Iterable[bytes], key: bytes) -> Iterator[bytes]:
+    """
+    Decrypts a stream produced by `encrypt_stream` in constant memory.
+
+    Args:
+        chunks: The encrypted stream, as byte chunks of any size.
+        key: The 32-byte encryption key.
+
+    Returns:
+        An iterator over the plaintext chunks.
+    """
+    return get_cipher_context(key).decrypt_stream(chunks)
+
+
+def select_encryption_format(payload_size: int, compression: int = COMPRESSION_NONE) -> int:
+    """
+    Chunked format for payloads of at least `chunked_threshold_bytes`, single-shot otherwise;
+    the compressed variant of either if a compression codec is used.
+    """
+    chunked = payload_size >= RECORD_ENCRYPTION_CONFIG["chunked_threshold_bytes"]
+    if compression != COMPRESSION_NONE:
+        return ENCRYPTION_FORMAT_CHUNKED_COMPRESSED if chunked else ENCRYPTION_FORMAT_AESGCM_COMPRESSED
+    return ENCRYPTION_FORMAT_CHUNKED if chunked else ENCRYPTION_FORMAT_AESGCM
+
+
+def encrypt_record_data(
+    data: str, key: bytes, encryption_format: int = ENCRYPTION_FORMAT_AESGCM, compression: int = COMPRESSION_NONE
+) -> bytes:
+    """
+    Encrypts a record payload in the given blob format. `compression` is the codec of the
+    compressed formats and is ignored by the others.
+    """
+    if not isinstance(key, bytes) or len(key) != 32:
+        raise ValueError("Encryption key must be 32 bytes.")
+    return get_cipher_context(key).encrypt_record(data, encryption_format, compression)
+
+
+def decrypt_record_data(encrypted_data: bytes, key: bytes, encryption_format: int = ENCRYPTION_FORMAT_AESGCM) -> str:
+    """
+    Decrypts a record payload stored in the given blob format, decompressing it if needed.
+    """
+    if not isinstance(key, bytes) or len(key) != 32:
+        raise ValueError("Decryption key must be 32 bytes.")
+    return get_cipher_context(key).decrypt_record(encrypted_data, encryption_format)
 
 
 def hash_data(data: str) -> str:
@@ -89,6 +321,129 @@ def hash_data(data: str) -> str:
     sha256_hash = hashlib.sha256(data_bytes).hexdigest()
     return sha256_hash
 
+# Async variants for the event loop. AES-GCM and SHA-256 release the GIL, so payloads of
+# at least `offload_threshold_bytes` run on a thread pool instead of blocking every other
+# coroutine; smaller ones are cheaper to run inline than to hand off.
+
+_crypto_executor: Optional[ThreadPoolExecutor] = None
+_crypto_executor_lock = threading.Lock()
+_crypto_in_flight = 0
+
+
+def _get_crypto_executor() -> ThreadPoolExecutor:
+    global _crypto_executor
+    with _crypto_executor_lock:
+        if _crypto_executor is None:
+            _crypto_executor = ThreadPoolExecutor(
+                max_workers=CRYPTO_WORKER_CONFIG["max_workers"], thread_name_prefix="crypto"
+            )
+        return _crypto_executor
+
+
+async def _run_crypto(func: Callable[..., T], payload_size: int, *args) -> T:
+    """
+    Runs `func(*args)` inline or on the crypto thread pool, depending on `payload_size`.
+    """
+    if payload_size < CRYPTO_WORKER_CONFIG["offload_threshold_bytes"]:
+        metrics.increment("crypto.inline")
+        return func(*args)
+    return await run_in_crypto_pool(func, *args)
+
+
+async def run_in_crypto_pool(func: Callable[..., T], *args) -> T:
+    """
+    Runs `func(*args)` on the crypto thread pool. For batch work (exports) that groups
+    many small records into one call, which is worth offloading whatever the record size.
+
+    Metrics: crypto_pool.queue_depth (operations submitted and not finished),
+    crypto_pool.wait_seconds (time before a worker picked the operation up) and
+    crypto_pool.latency_seconds (submit to result).
+    """
+    global _crypto_in_flight
+    submitted_at = time.perf_counter()
+
+    def run():
+        metrics.observe("crypto_pool.wait_seconds", time.perf_counter() - submitted_at)
+        return func(*args)
+
+    metrics.increment("crypto.offloaded")
+    _crypto_in_flight += 1
+    metrics.set_gauge("crypto_pool.queue_depth", _crypto_in_flight)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_crypto_executor(), run)
+    finally:
+        _crypto_in_flight -= 1
+        metrics.set_gauge("crypto_pool.queue_depth", _crypto_in_flight)
+        metrics.observe("crypto_pool.latency_seconds", time.perf_counter() - submitted_at)
+
+
+async def encrypt_data_async(data: str, key: bytes) -> bytes:
+    """
+    `encrypt_data` that does not block the event loop for large payloads.
+    """
+    return await _run_crypto(encrypt_data, len(data), data, key)
+
+
+def _as_cipher(key: Union[bytes, CipherContext]) -> CipherContext:
+    if isinstance(key, CipherContext):
+        return key
+    if not isinstance(key, bytes) or len(key) != 32:
+        raise ValueError("Encryption key must be 32 bytes.")
+    return get_cipher_context(key)
+
+
+async def decrypt_data_async(
+    encrypted_data: bytes, key: Union[bytes, CipherContext], encryption_format: int = ENCRYPTION_FORMAT_AESGCM
+) -> str:
+    """
+    `decrypt_record_data` that does not block the event loop for large payloads. `key` is
+    a 32-byte key or the CipherContext of a record data key (see core.envelope).
+    """
+    cipher = _as_cipher(key)
+    return await _run_crypto(cipher.decrypt_record, len(encrypted_data), encrypted_data, encryption_format)
+
+
+async def hash_data_async(data: str) -> str:
+    """
+    `hash_data` that does not block the event loop for large payloads.
+    """
+    return await _run_crypto(hash_data, len(data), data)
+
+
+async def encrypt_and_hash_async(
+    data: str, key: Union[bytes, CipherContext], compression: Optional[str] = None
+) -> Tuple[bytes, str, int]:
+    """
+    Compresses (see `select_compression`; `compression` names a codec for this record),
+    encrypts and hashes a record payload. `key` is a 32-byte key or the CipherContext of
+    a record data key. Returns (encrypted_data, data_hash, encryption_format); for large
+    payloads encryption and hashing run in parallel on the pool. The hash is always of
+    the uncompressed payload.
+    """
+    cipher = _as_cipher(key)
+    codec = select_compression(len(data), compression)
+    encryption_format = select_encryption_format(len(data), codec)
+    if len(data) < CRYPTO_WORKER_CONFIG["offload_threshold_bytes"]:
+        metrics.increment("crypto.inline", 2)
+        return cipher.encrypt_record(data, encryption_format, codec), hash_data(data), encryption_format
+    encrypted, data_hash = await asyncio.gather(
+        _run_crypto(cipher.encrypt_record, len(data), data, encryption_format, codec),
+        hash_data_async(data),
+    )
+    return encrypted, data_hash, encryption_format
+
+
+def shutdown_crypto_pool() -> None:
+    """
+    Waits for running operations and stops the crypto thread pool (app shutdown).
+    """
+    global _crypto_executor
+    with _crypto_executor_lock:
+        executor, _crypto_executor = _crypto_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
 # Example Usage (not part of the module, for testing)
 if __name__ == '__main__':
     # Key Generation
@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from cryptography.hazmat.primitives.keywrap import InvalidUnwrap, aes_key_unwrap, aes_key_wrap
+
+from .config import ENCRYPTION_KEY_CONFIG
+from .encryption import CipherContext, generate_encryption_key, get_cipher_context
+from .key_provider import LEGACY_KEY_VERSION, KeyProvider, key_provider as default_key_provider
+from .metrics import metrics as default_metrics, MetricsRegistry
+
+
+class DataKeyManager:
+    """
+    Envelope encryption for record payloads.
+
+    Every record is encrypted with its own random data key. The data key is wrapped
+    (AES key wrap, RFC 3394) with the key-encryption key of the current version from the
+    KeyProvider, and the wrapped key and its version are stored next to the record. Rotating
+    the key-encryption key then only re-wraps these 40-byte blobs (see `rewrap`); the
+    encrypted payloads are not touched.
+
+    Unwrapped data keys are kept as CipherContexts in an LRU cache of `cache_size` entries,
+    so records read repeatedly are not unwrapped and set up on every read. Records without
+    a wrapped key predate envelope encryption and use the key-encryption key directly; a
+    missing key version is the legacy version, never the current one.
+    """
+
+    def __init__(
+        self,
+        provider: KeyProvider = default_key_provider,
+        cache_size: int = ENCRYPTION_KEY_CONFIG["data_key_cache_size"],
+        registry: MetricsRegistry = default_metrics,
+    ):
+        self._provider = provider
+        self.cache_size = cache_size
+        self._metrics = registry
+        self._ciphers: "OrderedDict[Tuple[int, bytes], CipherContext]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def current_version(self) -> int:
+        return self._provider.current_version
+
+    def _remember(self, cache_key: Tuple[int, bytes], cipher: CipherContext) -> None:
+        with self._lock:
+            self._ciphers[cache_key] = cipher
+            self._ciphers.move_to_end(cache_key)
+            while len(self._ciphers) > self.cache_size:
+                self._ciphers.popitem(last=False)
+                self._metrics.increment("data_keys.cache_evictions")
+
+    def _unwrap(self, wrapped_data_key: bytes, key_version: int) -> bytes:
+        try:
+            return aes_key_unwrap(self._provider.get_key(key_version), wrapped_data_key)
+        except InvalidUnwrap:
+            raise ValueError(f"Data key could not be unwrapped with key version {key_version}.")
+
+    def new_data_key(self) -> Tuple[CipherContext, bytes, int]:
+        """
+        Generates a data key for a new record. Returns (cipher, wrapped_data_key, key_version).
+        """
+        key_version = self.current_version
+        data_key = generate_encryption_key()
+        wrapped_data_key = aes_key_wrap(self._provider.get_key(key_version), data_key)
+        cipher = CipherContext(data_key)
+        # Records are often read back shortly after they were written
+        self._remember((key_version, wrapped_data_key), cipher)
+        self._metrics.increment("data_keys.generated")
+        return cipher, wrapped_data_key, key_version
+
+    def get_cipher(self, wrapped_data_key: Optional[bytes], key_version: Optional[int]) -> CipherContext:
+        """
+        Returns the CipherContext that decrypts a record stored with `wrapped_data_key` and
+        `key_version`. Raises ValueError if the data key cannot be unwrapped.
+        """
+        if key_version is None:
+            # Stored before key versions existed
+            key_version = LEGACY_KEY_VERSION
+        if wrapped_data_key is None:
+            return get_cipher_context(self._provider.get_key(key_version))
+
+        cache_key = (key_version, bytes(wrapped_data_key))
+        with self._lock:
+            cipher = self._ciphers.get(cache_key)
+            if cipher is not None:
+                self._ciphers.move_to_end(cache_key)
+        if cipher is not None:
+            self._metrics.increment("data_keys.cache_hits")
+            return cipher
+
+        self._metrics.increment("data_keys.cache_misses")
+        cipher = CipherContext(self._unwrap(cache_key[1], key_version))
+        self._remember(cache_key, cipher)
+        return cipher
+
+    def rewrap(
+        self, wrapped_data_key: bytes, key_version: int, new_version: Optional[int] = None
+    ) -> Tuple[bytes, int]:
+        """
+        Re-wraps a data key with the key-encryption key of `new_version` (defaults to the
+        current version). Returns (wrapped_data_key, key_version).
+        """
+        version = self.current_version if new_version is None else new_version
+        data_key = self._unwrap(wrapped_data_key, key_version)
+        return aes_key_wrap(self._provider.get_key(version), data_key), version
+
+    def clear(self) -> None:
+        """
+        Drops every cached data key.
+        """
+        with self._lock:
+            self._ciphers.clear()
+
+
+# Process-wide data key manager
+data_key_manager = DataKeyManager()
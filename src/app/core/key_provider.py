@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .config import ENCRYPTION_KEY_CONFIG, JWT_CONFIG
+from .metrics import metrics as default_metrics, MetricsRegistry
+
+# Version of the original MVP key, which encrypted every record stored before key versions
+LEGACY_KEY_VERSION = 1
+
+
+def default_secret_resolver(key_version: int) -> str:
+    """
+    Resolves the secret material for a given key version.
+
+    Version 1 is the original MVP key, derived from the JWT secret.
+    Later versions are read from `ENCRYPTION_KEY_SECRET_V<version>` environment variables.
+    """
+    if key_version == LEGACY_KEY_VERSION:
+        return JWT_CONFIG.get("secret_key", "default-fallback-secret-key-for-encryption")
+
+    secret = os.getenv(f"ENCRYPTION_KEY_SECRET_V{key_version}")
+    if not secret:
+        raise ValueError(f"No secret configured for encryption key version {key_version}.")
+    return secret
+
+
+class KeyProvider:
+    """
+    Derives AES-256 keys with PBKDF2-HMAC-SHA256 and caches them per key version.
+
+    PBKDF2 is deliberately slow, so each key is derived at most once per process
+    (per version). Cached keys stay in memory until `invalidate()` is called,
+    which must happen whenever the secret behind a version is rotated.
+    """
+
+    def __init__(
+        self,
+        secret_resolver: Callable[[int], str] = default_secret_resolver,
+        salt: bytes = ENCRYPTION_KEY_CONFIG["kdf_salt"],
+        iterations: int = ENCRYPTION_KEY_CONFIG["kdf_iterations"],
+        current_version: int = ENCRYPTION_KEY_CONFIG["current_version"],
+        registry: MetricsRegistry = default_metrics,
+    ):
+        self._secret_resolver = secret_resolver
+        self._salt = salt
+        self._iterations = iterations
+        self.current_version = current_version
+        self._metrics = registry
+        self._keys: Dict[int, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, key_version: Optional[int] = None) -> bytes:
+        """
+        Returns the 32-byte key for `key_version` (defaults to the current version).
+        """
+        version = self.current_version if key_version is None else key_version
+
+        key = self._keys.get(version)
+        if key is not None:
+            self._metrics.increment("key_provider.cache_hits")
+            return key
+
+        with self._lock:
+            # Another thread may have derived the key while we waited for the lock
+            key = self._keys.get(version)
+            if key is not None:
+                self._metrics.increment("key_provider.cache_hits")
+                return key
+
+            self._metrics.increment("key_provider.cache_misses")
+            secret = self._secret_resolver(version)
+            start = time.perf_counter()
+            derived = hashlib.pbkdf2_hmac('sha256', secret.encode('utf-8'), self._salt, self._iterations)
+            self._metrics.observe("key_provider.derivation_seconds", time.perf_counter() - start)
+
+            key = derived[:32]  # AES-256 requires 32 bytes
+            self._keys[version] = key
+            return key
+
+    def invalidate(self, key_version: Optional[int] = None) -> None:
+        """
+        Drops the cached key for `key_version`, or every cached key if no version is given.
+        """
+        with self._lock:
+            if key_version is None:
+                self._keys.clear()
+            else:
+                self._keys.pop(key_version, None)
+        self._metrics.increment("key_provider.invalidations")
+
+    def stats(self) -> dict:
+        """Returns cache hit/miss counters and KDF timing for this provider."""
+        return {
+            "cached_versions": sorted(self._keys.keys()),
+            "hits": self._metrics.get_counter("key_provider.cache_hits"),
+            "misses": self._metrics.get_counter("key_provider.cache_misses"),
+            "derivation_seconds": self._metrics.get_summary("key_provider.derivation_seconds"),
+        }
+
+
+# Process-wide key provider
+key_provider = KeyProvider()
@@ -0,0 +1,79 @@
+from typing import List, Sequence
+
+from web3 import Web3
+
+# Hashing matches MedicalRecordRegistry.verifyBatchedRecord:
+# leaf = keccak256(recordHash), parent = keccak256(min(a, b) ++ max(a, b)).
+# Sorting each pair means proofs need no left/right flags.
+
+
+def _to_bytes32(value) -> bytes:
+    if isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    if len(value) != 32:
+        raise ValueError(f"Expected a 32-byte hash, got {len(value)} bytes")
+    return value
+
+
+def hash_leaf(record_hash) -> bytes:
+    """
+    Returns the Merkle leaf for a record hash (hex string or 32 bytes).
+    """
+    return Web3.keccak(_to_bytes32(record_hash))
+
+
+def hash_pair(a: bytes, b: bytes) -> bytes:
+    return Web3.keccak(a + b) if a < b else Web3.keccak(b + a)
+
+
+class MerkleTree:
+    """
+    Binary Merkle tree over a batch of record hashes.
+
+    An unpaired node at the end of a level is promoted unchanged to the next level,
+    so it simply contributes no sibling to the proof at that level.
+    """
+
+    def __init__(self, record_hashes: Sequence):
+        if not record_hashes:
+            raise ValueError("Cannot build a Merkle tree without leaves")
+        self.levels: List[List[bytes]] = [[hash_leaf(h) for h in record_hashes]]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parents = [hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2 == 1:
+                parents.append(level[-1])
+            self.levels.append(parents)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    @property
+    def leaf_count(self) -> int:
+        return len(self.levels[0])
+
+    def proof(self, index: int) -> List[bytes]:
+        """
+        Returns the sibling hashes from the leaf at `index` up to the root.
+        """
+        if not 0 <= index < self.leaf_count:
+            raise IndexError(f"Leaf index {index} out of range")
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling])
+            index //= 2
+        return proof
+
+
+def verify_proof(record_hash, proof: Sequence, root) -> bool:
+    """
+    Checks that `record_hash` is a leaf of the tree with the given root.
+    `proof` and `root` may be given as bytes or hex strings.
+    """
+    computed = hash_leaf(record_hash)
+    for sibling in proof:
+        computed = hash_pair(computed, _to_bytes32(sibling))
+    return computed == _to_bytes32(root)
@@ -0,0 +1,90 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class MetricsRegistry:
+    """
+    Minimal thread-safe, in-process metrics registry.
+
+    Supports three kinds of metrics:
+    - counters: monotonically increasing values (e.g. cache hits).
+    - gauges: point-in-time values (e.g. queue depth).
+    - summaries: observed values aggregated as count/sum/min/max (e.g. latencies in seconds).
+
+    The registry is intentionally dependency-free; `snapshot()` returns a plain dict that
+    can be served as JSON or scraped by an exporter later on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Increase counter `name` by `value`."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set gauge `name` to `value`."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one observation of `value` for summary `name`."""
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                self._summaries[name] = {"count": 1, "sum": value, "min": value, "max": value}
+                return
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["min"] = min(summary["min"], value)
+            summary["max"] = max(summary["max"], value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Context manager observing the elapsed wall time (seconds) into summary `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def get_counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def get_gauge(self, name: str) -> float:
+        with self._lock:
+            return self._gauges.get(name, 0)
+
+    def get_summary(self, name: str) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._summaries.get(name, {"count": 0, "sum": 0, "min": 0, "max": 0}))
+
+    def snapshot(self) -> dict:
+        """Return a copy of all metrics, with the average added to each summary."""
+        with self._lock:
+            summaries = {}
+            for name, summary in self._summaries.items():
+                summaries[name] = dict(summary, avg=summary["sum"] / summary["count"])
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": summaries,
+            }
+
+    def reset(self) -> None:
+        """Clear all metrics. Mainly useful for tests."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+# Process-wide registry shared by all modules
+metrics = MetricsRegistry()
@@ -0,0 +1,109 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from .metrics import metrics
+
+# Substrings of node error messages that mean our local nonce view is out of sync.
+# Ganache, geth and Hardhat word these differently.
+NONCE_ERROR_MARKERS = (
+    "nonce too low",
+    "nonce too high",
+    "invalid nonce",
+    "replacement transaction underpriced",
+    "correct nonce",
+)
+
+# Substrings of node error messages that mean the node already has this exact signed
+# transaction, e.g. because an earlier send timed out after it was broadcast. Resending
+# with a new nonce would submit the operation twice.
+ALREADY_KNOWN_ERROR_MARKERS = (
+    "already known",
+    "known transaction",
+)
+
+
+def is_nonce_error(error: Exception) -> bool:
+    """
+    Returns True if `error` was raised because the transaction nonce was rejected by the node.
+    """
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERROR_MARKERS)
+
+
+def is_already_known_error(error: Exception) -> bool:
+    """
+    Returns True if the node rejected a transaction because it already has it.
+    """
+    message = str(error).lower()
+    return any(marker in message for marker in ALREADY_KNOWN_ERROR_MARKERS)
+
+
+class NonceManager:
+    """
+    Allocates transaction nonces for a single sender account in-process.
+
+    The first allocation (and every resync) reads the account's *pending* transaction
+    count from the node; afterwards nonces are handed out from a local counter, so many
+    transactions can be in flight at once without an RPC round trip per nonce and without
+    two concurrent requests receiving the same nonce.
+    """
+
+    def __init__(self, fetch_pending_count: Callable[[], Awaitable[int]]):
+        self._fetch_pending_count = fetch_pending_count
+        self._next_nonce: Optional[int] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio.Lock is bound to the loop it is first used on; the service singleton
+        # can outlive a loop (e.g. across test clients), so recreate it per loop.
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def allocate(self) -> int:
+        """
+        Returns the next nonce to use and reserves it.
+        """
+        async with self._get_lock():
+            if self._next_nonce is None:
+                self._next_nonce = await self._fetch_pending_count()
+                metrics.increment("nonce_manager.resyncs")
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            metrics.increment("nonce_manager.allocations")
+            return nonce
+
+    async def resync(self) -> int:
+        """
+        Re-reads the pending transaction count from the node and continues from there.
+        Used after the node rejected a nonce (e.g. "nonce too low").
+        """
+        async with self._get_lock():
+            self._next_nonce = await self._fetch_pending_count()
+            metrics.increment("nonce_manager.resyncs")
+            return self._next_nonce
+
+    def release(self, nonce: int) -> None:
+        """
+        Gives back a nonce whose transaction was never broadcast.
+
+        If it was the most recent allocation the counter simply steps back; otherwise a
+        gap would stall every later transaction, so the next allocation resyncs from the
+        node's pending count, which stops at the first missing nonce.
+        """
+        if self._next_nonce is None:
+            return
+        if nonce == self._next_nonce - 1:
+            self._next_nonce = nonce
+        else:
+            self._next_nonce = None
+            metrics.increment("nonce_manager.gaps")
+
+    def reset(self) -> None:
+        """
+        Forgets the local counter; the next allocation resyncs from the node.
+        """
+        self._next_nonce = None
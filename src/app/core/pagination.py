@@ -0,0 +1,36 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+# Response header carrying the continuation token for the next page, if there is one.
+# List endpoints keep returning a plain JSON array, so the token travels in a header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Keyset position: (sort timestamp, row id) of the last row of a page
+CursorPosition = Tuple[datetime, uuid.UUID]
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(position: datetime, row_id: uuid.UUID) -> str:
+    """
+    Returns an opaque continuation token for the row at (position, row_id).
+    """
+    payload = json.dumps([position.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> CursorPosition:
+    """
+    Parses a token made by `encode_cursor`. Raises InvalidCursorError if it is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(position), uuid.UUID(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {cursor!r}") from e
@@ -0,0 +1,33 @@
+from contextvars import ContextVar
+from typing import Optional
+
+from .metrics import metrics
+
+# Per-request tally of medical record payload bytes loaded from the database.
+# Holds a one-element list so code running in copied contexts (threadpool
+# dependencies, background tasks) still adds to the same request's tally.
+_bytes_fetched: ContextVar[Optional[list]] = ContextVar("bytes_fetched", default=None)
+
+
+def add_bytes_fetched(num_bytes: int) -> None:
+    """Adds `num_bytes` to the current request's tally (no-op outside a request)."""
+    tally = _bytes_fetched.get()
+    if tally is not None:
+        tally[0] += num_bytes
+
+
+async def bytes_fetched_middleware(request, call_next):
+    """
+    Observes how many encrypted_data bytes each request pulled from the database
+    into the `medical_records.bytes_fetched_per_request` summary.
+    """
+    tally = [0]
+    token = _bytes_fetched.set(tally)
+    try:
+        response = await call_next(request)
+    finally:
+        _bytes_fetched.reset(token)
+    if request.url.path.startswith("/api/v1/medical-records"):
+        metrics.observe("medical_records.bytes_fetched_per_request", tally[0])
+        metrics.increment("medical_records.bytes_fetched", tally[0])
+    return response
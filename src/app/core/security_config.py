@@ -1,11 +1,13 @@
-import os
-import hashlib
+from typing import Optional
 from cryptography.fernet import Fernet
-from .config import JWT_CONFIG
+from .key_provider import key_provider
 
-def get_encryption_key() -> bytes:
+def get_encryption_key(key_version: Optional[int] = None) -> bytes:
     """
     Derives a 32-byte encryption key from the JWT secret key.
+
+    The PBKDF2 derivation runs once per process and key version; subsequent calls
+    are served from the in-memory cache of `key_provider`.
     
     WARNING: This is a placeholder/MVP approach for development only.
     In production, use a dedicated key management service like:
@@ -17,15 +19,14 @@ def get_encryption_key() -> bytes:
     TODO: Replace with proper key management system before production deployment.
     See memory-bank/status-todolist-suggestions.md for migration plan.
     """
-    # Get JWT secret from config
-    jwt_secret = JWT_CONFIG.get("secret_key", "default-fallback-secret-key-for-encryption")
-    
-    # Use PBKDF2 to derive a proper encryption key from the JWT secret
-    # This is more secure than simple truncation/padding
-    salt = b'meditrustal_salt_2024'  # In production, use a random salt stored securely
-    key = hashlib.pbkdf2_hmac('sha256', jwt_secret.encode('utf-8'), salt, 100000)
-    
-    return key[:32]  # AES-256 requires 32 bytes
+    return key_provider.get_key(key_version)
+
+def invalidate_encryption_key(key_version: Optional[int] = None) -> None:
+    """
+    Drops cached derived keys so the next call re-derives them.
+    Must be called after rotating the secret behind a key version.
+    """
+    key_provider.invalidate(key_version)
 
 def get_fernet_key() -> bytes:
     """
@@ -0,0 +1,157 @@
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, null, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.merkle import MerkleTree
+from src.app.models.anchor_batch import AnchorBatch
+from src.app.models.medical_record import BlockchainStatus, MedicalRecord
+
+# Used by the background services (AnchorBatcher, ReceiptTracker), which run on the event loop
+
+
+def _assign_to_batch(records: List[MedicalRecord], tree: MerkleTree, db_batch: AnchorBatch) -> None:
+    for index, record in enumerate(records):
+        record.anchor_batch_id = db_batch.id
+        record.merkle_leaf_index = index
+        record.merkle_proof = ["0x" + sibling.hex() for sibling in tree.proof(index)]
+        record.blockchain_status = db_batch.status
+        record.blockchain_tx_hash = db_batch.transaction_hash
+
+
+async def claim_anchor_batch_async(db: AsyncSession, limit: int) -> Optional[AnchorBatch]:
+    """
+    Claim up to `limit` of the oldest QUEUED records for a new batch and commit.
+
+    The records are locked with FOR UPDATE SKIP LOCKED, so concurrent flushes (e.g. of
+    other workers) claim different records. The batch is stored with status SUBMITTING,
+    with each member record's inclusion proof, before its transaction is sent: a record
+    is never in two batches, and a batch whose send outcome was lost can be recovered.
+
+    Leaves are the record hashes and data_hash is not unique, so the records may form a
+    root that is already batched (e.g. the same payloads imported twice). Such records
+    join the existing batch, whose proofs hold for them too, and take its status; the
+    next queued records are claimed instead. Returns None if no records are queued.
+    """
+    while True:
+        records = list((await db.scalars(
+            select(MedicalRecord)
+            .where(MedicalRecord.blockchain_status == BlockchainStatus.QUEUED.value)
+            .order_by(MedicalRecord.created_at, MedicalRecord.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).all())
+        if not records:
+            await db.commit()
+            return None
+
+        tree = MerkleTree([record.data_hash for record in records])
+        merkle_root = "0x" + tree.root.hex()
+        existing = (await db.scalars(select(AnchorBatch).where(AnchorBatch.merkle_root == merkle_root))).first()
+        if existing is None:
+            break
+        _assign_to_batch(records, tree, existing)
+        await db.commit()
+
+    db_batch = AnchorBatch(merkle_root=merkle_root, leaf_count=tree.leaf_count, status=BlockchainStatus.SUBMITTING.value)
+    db.add(db_batch)
+    await db.flush()
+    _assign_to_batch(records, tree, db_batch)
+    await db.commit()
+    await db.refresh(db_batch)
+    return db_batch
+
+
+def _set_status(db_batch: AnchorBatch, status: BlockchainStatus, transaction_hash: Optional[str]):
+    """
+    Sets the batch status and returns the statement applying it to the batch's records.
+    """
+    db_batch.status = status.value
+    if transaction_hash is not None:
+        db_batch.transaction_hash = transaction_hash
+    if status == BlockchainStatus.CONFIRMED:
+        db_batch.anchored_at = datetime.now(timezone.utc)
+    return (
+        update(MedicalRecord)
+        .where(MedicalRecord.anchor_batch_id == db_batch.id)
+        .values(blockchain_status=status.value, blockchain_tx_hash=db_batch.transaction_hash)
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+async def mark_anchor_batch_submitted_async(
+    db: AsyncSession, batch_id: uuid.UUID, status: BlockchainStatus, transaction_hash: Optional[str]
+) -> AnchorBatch:
+    """
+    Store the outcome of sending a claimed batch (PENDING or CONFIRMED) on the batch and its records.
+    """
+    db_batch = await db.get(AnchorBatch, batch_id)
+    await db.execute(_set_status(db_batch, status, transaction_hash))
+    await db.commit()
+    await db.refresh(db_batch)
+    return db_batch
+
+
+async def release_anchor_batch_async(db: AsyncSession, batch_id: uuid.UUID) -> int:
+    """
+    Put the records of a batch that was not anchored back in the queue and delete the
+    batch, so they are anchored with a later batch. Returns the number of records.
+    """
+    result = await db.execute(
+        update(MedicalRecord)
+        .where(MedicalRecord.anchor_batch_id == batch_id)
+        .values(
+            blockchain_status=BlockchainStatus.QUEUED.value,
+            anchor_batch_id=None,
+            merkle_leaf_index=None,
+            merkle_proof=null(),
+            blockchain_tx_hash=None,
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+    await db.execute(delete(AnchorBatch).where(AnchorBatch.id == batch_id))
+    await db.commit()
+    return result.rowcount
+
+
+async def get_submitting_anchor_batches_async(db: AsyncSession, created_before: datetime) -> List[AnchorBatch]:
+    """
+    Get batches claimed before `created_before` whose send outcome was never stored
+    (e.g. the process stopped between sending and storing the transaction).
+    """
+    return list((await db.scalars(
+        select(AnchorBatch).where(
+            AnchorBatch.status == BlockchainStatus.SUBMITTING.value,
+            AnchorBatch.created_at < created_before,
+        )
+    )).all())
+
+
+async def get_anchor_batches_pending_on_blockchain_async(db: AsyncSession) -> List[AnchorBatch]:
+    """
+    Get all batches whose anchoring transaction has not been confirmed yet.
+    """
+    return list((await db.scalars(
+        select(AnchorBatch).where(AnchorBatch.status == BlockchainStatus.PENDING.value)
+    )).all())
+
+
+async def update_anchor_batch_status_async(
+    db: AsyncSession, transaction_hash: str, status: BlockchainStatus
+) -> Optional[AnchorBatch]:
+    """
+    Apply the outcome of an anchoring transaction to the batch and all of its records.
+    The records of a FAILED batch are put back in the queue (see `release_anchor_batch_async`).
+    """
+    db_batch = (await db.scalars(select(AnchorBatch).where(AnchorBatch.transaction_hash == transaction_hash))).first()
+    if db_batch is None:
+        return None
+    if status == BlockchainStatus.FAILED:
+        await release_anchor_batch_async(db, db_batch.id)
+        return None
+    await db.execute(_set_status(db_batch, status, None))
+    await db.commit()
+    await db.refresh(db_batch)
+    return db_batch
@@ -1,11 +1,16 @@
 import uuid
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc # Added for ordering
+from sqlalchemy import desc, insert, select, tuple_ # Added for ordering
+from sqlalchemy.orm import aliased
+from src.app.core.pagination import CursorPosition
 from src.app.models.audit_log import AuditDataAccessLog
 from src.app.models import audit_log as models_audit # For type hinting if needed, or use AuditDataAccessLog directly
 
-def create_audit_log(
-    db: Session,
+# Sync and async accessors share these builders so they cannot drift apart
+
+def _audit_log_values(
     actor_user_id: uuid.UUID,
     owner_user_id: uuid.UUID,
     action_type: str,
@@ -13,11 +18,9 @@ def create_audit_log(
     ip_address: str = None,
     target_address: str = None,
     details: dict = None,
-) -> AuditDataAccessLog:
-    """
-    Create a new audit data access log entry.
-    """
-    db_log = AuditDataAccessLog(
+    transaction_hash: str = None,
+) -> dict:
+    return dict(
         actor_user_id=actor_user_id,
         owner_user_id=owner_user_id,
         action_type=action_type,
@@ -25,23 +28,140 @@ def create_audit_log(
         ip_address=ip_address,
         target_address=target_address,
         details=details,
+        transaction_hash=transaction_hash,
     )
+
+def create_audit_log(
+    db: Session,
+    actor_user_id: uuid.UUID,
+    owner_user_id: uuid.UUID,
+    action_type: str,
+    record_id: uuid.UUID = None,
+    ip_address: str = None,
+    target_address: str = None,
+    details: dict = None,
+    transaction_hash: str = None,
+) -> AuditDataAccessLog:
+    """
+    Create a new audit data access log entry. `transaction_hash` links entries about the
+    same blockchain transaction, e.g. a *_PENDING entry and the one that settles it.
+    """
+    db_log = AuditDataAccessLog(**_audit_log_values(
+        actor_user_id, owner_user_id, action_type, record_id, ip_address, target_address, details, transaction_hash
+    ))
     db.add(db_log)
     db.commit()
     db.refresh(db_log)
     return db_log
 
+def _owner_filter(owner_user_id: uuid.UUID, since: datetime = None, after: CursorPosition = None) -> list:
+    # A lower timestamp bound lets PostgreSQL prune the monthly partitions before `since`
+    criteria = [AuditDataAccessLog.owner_user_id == owner_user_id]
+    if since is not None:
+        criteria.append(AuditDataAccessLog.timestamp >= since)
+    if after is not None:
+        # Keyset: continue below the last (timestamp, id) of the previous page
+        criteria.append(tuple_(AuditDataAccessLog.timestamp, AuditDataAccessLog.id) < tuple_(*after))
+    return criteria
+
+# Served by ix_audit_data_access_logs_owner_user_id_timestamp_id
+_OWNER_HISTORY_ORDER = (desc(AuditDataAccessLog.timestamp), desc(AuditDataAccessLog.id))
+
+def _owner_history_stmt(owner_user_id: uuid.UUID, skip: int, limit: int, since: datetime, after: CursorPosition):
+    return (
+        select(AuditDataAccessLog)
+        .where(*_owner_filter(owner_user_id, since, after))
+        .order_by(*_OWNER_HISTORY_ORDER)
+        .offset(skip)
+        .limit(limit)
+    )
+
 def get_audit_logs_by_owner(
-    db: Session, owner_user_id: uuid.UUID, skip: int = 0, limit: int = 100
+    db: Session, owner_user_id: uuid.UUID, skip: int = 0, limit: int = 100, since: datetime = None,
+    after: CursorPosition = None,
 ) -> list[AuditDataAccessLog]:
     """
     Retrieve audit logs for a specific owner, ordered by timestamp descending.
+    If `since` is given, only entries at or after it are returned. `after` is the
+    (timestamp, id) of the last entry of the previous page (keyset pagination).
     """
-    return (
-        db.query(AuditDataAccessLog)
-        .filter(AuditDataAccessLog.owner_user_id == owner_user_id)
-        .order_by(desc(AuditDataAccessLog.timestamp))
-        .offset(skip)
-        .limit(limit)
-        .all()
+    return list(db.scalars(_owner_history_stmt(owner_user_id, skip, limit, since, after)).all())
+
+
+# Async variants used by the API endpoints (AsyncSession)
+
+async def create_audit_log_async(
+    db: AsyncSession,
+    actor_user_id: uuid.UUID,
+    owner_user_id: uuid.UUID,
+    action_type: str,
+    record_id: uuid.UUID = None,
+    ip_address: str = None,
+    target_address: str = None,
+    details: dict = None,
+    transaction_hash: str = None,
+) -> AuditDataAccessLog:
+    """
+    Create a new audit data access log entry. See `create_audit_log`.
+    """
+    db_log = AuditDataAccessLog(**_audit_log_values(
+        actor_user_id, owner_user_id, action_type, record_id, ip_address, target_address, details, transaction_hash
+    ))
+    db.add(db_log)
+    await db.commit()
+    await db.refresh(db_log)
+    return db_log
+
+async def create_audit_logs_bulk_async(db: AsyncSession, entries: list[dict]) -> int:
+    """
+    Insert many audit log entries in one multi-row INSERT and commit.
+    Each entry holds AuditDataAccessLog column values; id/timestamp are generated if missing.
+    """
+    if not entries:
+        return 0
+    await db.execute(insert(AuditDataAccessLog), entries)
+    await db.commit()
+    return len(entries)
+
+async def get_existing_audit_log_ids_async(db: AsyncSession, ids: list[uuid.UUID]) -> set[uuid.UUID]:
+    """
+    Return which of `ids` are already stored.
+    """
+    if not ids:
+        return set()
+    return set((await db.scalars(select(AuditDataAccessLog.id).where(AuditDataAccessLog.id.in_(ids)))).all())
+
+async def get_audit_logs_by_owner_async(
+    db: AsyncSession, owner_user_id: uuid.UUID, skip: int = 0, limit: int = 100, since: datetime = None,
+    after: CursorPosition = None,
+) -> list[AuditDataAccessLog]:
+    """
+    Retrieve audit logs for a specific owner, ordered by timestamp descending.
+    See `get_audit_logs_by_owner`.
+    """
+    return list((await db.scalars(_owner_history_stmt(owner_user_id, skip, limit, since, after))).all())
+
+async def get_unsettled_transactions_async(
+    db: AsyncSession, pending_action_types: list[str]
+) -> list[AuditDataAccessLog]:
+    """
+    Get the entries of `pending_action_types` whose transaction has no other entry yet,
+    i.e. transactions whose outcome was never recorded (e.g. the process restarted).
+    Served by ix_audit_data_access_logs_transaction_hash.
+    """
+    settled = aliased(AuditDataAccessLog)
+    result = await db.execute(
+        select(AuditDataAccessLog)
+        .where(
+            AuditDataAccessLog.transaction_hash.isnot(None),
+            AuditDataAccessLog.action_type.in_(pending_action_types),
+            ~select(settled.id)
+            .where(
+                settled.transaction_hash == AuditDataAccessLog.transaction_hash,
+                settled.action_type.notin_(pending_action_types),
+            )
+            .exists(),
+        )
+        .order_by(AuditDataAccessLog.timestamp)
     )
+    return list(result.scalars().all())
@@ -0,0 +1,119 @@
+import zlib
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.models.chain_index import ChainIndexCheckpoint, RecordAccessGrant, RecordAnchor
+
+
+def _hex(value: str) -> str:
+    value = str(value).lower()
+    return value if value.startswith("0x") else "0x" + value
+
+
+async def get_checkpoint_async(db: AsyncSession, name: str) -> Optional[ChainIndexCheckpoint]:
+    return await db.get(ChainIndexCheckpoint, name)
+
+
+async def try_lock_index_async(db: AsyncSession, name: str) -> bool:
+    """
+    Takes the PostgreSQL advisory lock of index `name` for the current transaction, so only
+    one process (e.g. one of several uvicorn workers) updates the index at a time. False if
+    another transaction holds it. Always True on other databases.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return True
+    key = zlib.crc32(f"chain_index:{name}".encode("utf-8"))
+    return bool(await db.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": key}))
+
+
+async def _save_checkpoint(db: AsyncSession, name: str, block_number: int, block_hash: str, head_block_number: int) -> None:
+    checkpoint = await db.get(ChainIndexCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = ChainIndexCheckpoint(name=name)
+        db.add(checkpoint)
+    checkpoint.block_number = block_number
+    checkpoint.block_hash = block_hash
+    checkpoint.head_block_number = head_block_number
+    checkpoint.updated_at = datetime.now(timezone.utc)
+
+
+async def apply_registry_events_async(
+    db: AsyncSession,
+    name: str,
+    events: Iterable[dict],
+    block_number: int,
+    block_hash: str,
+    head_block_number: int,
+) -> None:
+    """
+    Stores the RecordAdded/AccessGranted/AccessRevoked events of a block range and moves
+    the checkpoint to `block_number`, in one transaction.
+    """
+    for event in events:
+        if event["event"] == "RecordAdded":
+            db.add(RecordAnchor(
+                record_hash=_hex(event["record_hash"]),
+                patient_did_hash=_hex(event["patient_did_hash"]),
+                record_type=event.get("record_type"),
+                submitter=event["submitter"].lower(),
+                anchored_at=datetime.fromtimestamp(event["timestamp"], timezone.utc) if event.get("timestamp") else None,
+                block_number=event["block_number"],
+                log_index=event["log_index"],
+                transaction_hash=event["transaction_hash"],
+            ))
+        else:
+            db.add(RecordAccessGrant(
+                block_number=event["block_number"],
+                log_index=event["log_index"],
+                record_hash=_hex(event["record_hash"]),
+                owner_address=event["owner_address"].lower(),
+                doctor_address=event["doctor_address"].lower(),
+                granted=event["event"] == "AccessGranted",
+                transaction_hash=event["transaction_hash"],
+            ))
+    await _save_checkpoint(db, name, block_number, block_hash, head_block_number)
+    await db.commit()
+
+
+async def update_checkpoint_head_async(db: AsyncSession, name: str, head_block_number: int) -> None:
+    """
+    Records that the index was checked against `head_block_number` without new blocks to apply.
+    """
+    checkpoint = await db.get(ChainIndexCheckpoint, name)
+    if checkpoint is not None:
+        checkpoint.head_block_number = head_block_number
+        checkpoint.updated_at = datetime.now(timezone.utc)
+    await db.commit()
+
+
+async def rewind_registry_index_async(db: AsyncSession, name: str, block_number: int, block_hash: Optional[str]) -> None:
+    """
+    Deletes everything indexed above `block_number` and moves the checkpoint back to it.
+    Without a `block_hash` (rewind before the first indexed block) the checkpoint is removed.
+    """
+    await db.execute(delete(RecordAnchor).where(RecordAnchor.block_number > block_number))
+    await db.execute(delete(RecordAccessGrant).where(RecordAccessGrant.block_number > block_number))
+    checkpoint = await db.get(ChainIndexCheckpoint, name)
+    if block_hash is None:
+        if checkpoint is not None:
+            await db.delete(checkpoint)
+    else:
+        await _save_checkpoint(db, name, block_number, block_hash, checkpoint.head_block_number if checkpoint else block_number)
+    await db.commit()
+
+
+# Read paths
+
+async def get_record_hashes_by_patient_did_hash_async(db: AsyncSession, patient_did_hash: str) -> List[str]:
+    """
+    Record hashes registered for a patient, in the order they were added on-chain.
+    """
+    result = await db.execute(
+        select(RecordAnchor.record_hash)
+        .where(RecordAnchor.patient_did_hash == _hex(patient_did_hash))
+        .order_by(RecordAnchor.block_number, RecordAnchor.log_index)
+    )
+    return list(result.scalars().all())
@@ -1,29 +1,150 @@
+import json
 import uuid
-from typing import List, Optional
+from typing import Iterable, List, Optional, Set
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, insert, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload, undefer
 
-from src.app.models.medical_record import MedicalRecord, MedicalRecordCreate
+from src.app.core.encryption import ENCRYPTION_FORMAT_AESGCM
+from src.app.core.pagination import CursorPosition
+from src.app.models.medical_record import BlockchainStatus, MedicalRecord, MedicalRecordCreate
 
 
-def create_medical_record(
-    db: Session,
-    *,
+# Sync and async accessors share the statement/object builders below so they cannot drift apart
+
+def _new_medical_record(
     medical_record_in: MedicalRecordCreate,
     patient_id: uuid.UUID,
     encrypted_data: bytes,
     data_hash: str,
+    blockchain_status: Optional[BlockchainStatus],
+    encryption_format: int,
+    wrapped_data_key: Optional[bytes],
+    key_version: Optional[int],
 ) -> MedicalRecord:
-    """
-    Create a new medical record.
-    """
-    db_obj = MedicalRecord(
+    return MedicalRecord(
         patient_id=patient_id,
         record_type=medical_record_in.record_type,
         record_metadata=medical_record_in.record_metadata,
         encrypted_data=encrypted_data,
+        encryption_format=encryption_format,
+        wrapped_data_key=wrapped_data_key,
+        key_version=key_version,
         data_hash=data_hash,
         blockchain_record_id=None,
+        blockchain_status=blockchain_status.value if blockchain_status else None,
+    )
+
+
+def _record_by_id_stmt(record_id: uuid.UUID, load_encrypted_data: bool):
+    stmt = select(MedicalRecord).where(MedicalRecord.id == record_id)
+    if load_encrypted_data:
+        stmt = stmt.options(undefer(MedicalRecord.encrypted_data))
+    return stmt
+
+
+def _by_hash_stmt(data_hash: str, patient_id: Optional[uuid.UUID]):
+    if data_hash.startswith("0x"):
+        data_hash = data_hash[2:]
+    stmt = select(MedicalRecord).where(MedicalRecord.data_hash == data_hash.lower())
+    if patient_id is not None:
+        stmt = stmt.where(MedicalRecord.patient_id == patient_id)
+    return stmt
+
+
+def _patient_filter(patient_id: uuid.UUID, after: Optional[CursorPosition] = None) -> list:
+    criteria = [MedicalRecord.patient_id == patient_id]
+    if after is not None:
+        # Keyset: continue after the last (created_at, id) of the previous page
+        criteria.append(tuple_(MedicalRecord.created_at, MedicalRecord.id) > tuple_(*after))
+    return criteria
+
+
+def _patient_page_stmt(patient_id: uuid.UUID, skip: int, limit: int, after: Optional[CursorPosition]):
+    return (
+        select(MedicalRecord)
+        .where(*_patient_filter(patient_id, after))
+        .order_by(MedicalRecord.created_at, MedicalRecord.id)
+        .offset(skip)
+        .limit(limit)
+    )
+
+
+def _existing_hashes_stmt(patient_id: uuid.UUID, data_hashes: List[str]):
+    return select(MedicalRecord.data_hash).where(
+        MedicalRecord.patient_id == patient_id, MedicalRecord.data_hash.in_(data_hashes)
+    )
+
+
+def _anchored_filter(data_hashes: Iterable[str]):
+    data_hashes = list(data_hashes)
+    batch_anchored = and_(
+        MedicalRecord.anchor_batch_id.isnot(None),
+        MedicalRecord.blockchain_status == BlockchainStatus.CONFIRMED.value,
+    )
+    return or_(MedicalRecord.data_hash.in_(data_hashes), batch_anchored) if data_hashes else batch_anchored
+
+
+def _anchored_page_stmt(
+    patient_id: uuid.UUID, data_hashes: Iterable[str], skip: int, limit: int, after: Optional[CursorPosition]
+):
+    return (
+        select(MedicalRecord)
+        .options(joinedload(MedicalRecord.anchor_batch))
+        .where(*_patient_filter(patient_id, after), _anchored_filter(data_hashes))
+        .order_by(MedicalRecord.created_at, MedicalRecord.id)
+        .offset(skip)
+        .limit(limit)
+    )
+
+
+def _set_confirmed(db_obj: MedicalRecord, blockchain_tx_hash: str) -> None:
+    db_obj.blockchain_record_id = blockchain_tx_hash
+    db_obj.blockchain_tx_hash = blockchain_tx_hash
+    db_obj.blockchain_status = BlockchainStatus.CONFIRMED.value
+
+
+def _set_pending(db_obj: MedicalRecord, blockchain_tx_hash: str) -> None:
+    db_obj.blockchain_tx_hash = blockchain_tx_hash
+    db_obj.blockchain_status = BlockchainStatus.PENDING.value
+
+
+def _pending_on_blockchain_stmt():
+    return select(MedicalRecord).where(MedicalRecord.blockchain_status == BlockchainStatus.PENDING.value)
+
+
+def _by_tx_hash_stmt(blockchain_tx_hash: str):
+    return select(MedicalRecord).where(MedicalRecord.blockchain_tx_hash == blockchain_tx_hash)
+
+
+def _set_blockchain_status(db_obj: MedicalRecord, blockchain_tx_hash: str, status: BlockchainStatus) -> None:
+    db_obj.blockchain_status = status.value
+    if status == BlockchainStatus.CONFIRMED:
+        db_obj.blockchain_record_id = blockchain_tx_hash
+
+
+def create_medical_record(
+    db: Session,
+    *,
+    medical_record_in: MedicalRecordCreate,
+    patient_id: uuid.UUID,
+    encrypted_data: bytes,
+    data_hash: str,
+    blockchain_status: Optional[BlockchainStatus] = None,
+    encryption_format: int = ENCRYPTION_FORMAT_AESGCM,
+    wrapped_data_key: Optional[bytes] = None,
+    key_version: Optional[int] = None,
+) -> MedicalRecord:
+    """
+    Create a new medical record.
+
+    Pass `blockchain_status=BlockchainStatus.QUEUED` to leave the hash for the
+    AnchorBatcher, which anchors queued records as one Merkle root per batch.
+    """
+    db_obj = _new_medical_record(
+        medical_record_in, patient_id, encrypted_data, data_hash,
+        blockchain_status, encryption_format, wrapped_data_key, key_version,
     )
     db.add(db_obj)
     db.commit()
@@ -32,29 +153,37 @@ def create_medical_record(
 
 
 def get_medical_record_by_id(
-    db: Session, record_id: uuid.UUID
+    db: Session, record_id: uuid.UUID, load_encrypted_data: bool = False
 ) -> Optional[MedicalRecord]:
     """
     Get a medical record by its ID.
+
+    encrypted_data is deferred; pass `load_encrypted_data=True` to fetch it in the
+    same query when the record is about to be decrypted.
     """
-    return (
-        db.query(MedicalRecord).filter(MedicalRecord.id == record_id).first()
-    )
+    return db.scalars(_record_by_id_stmt(record_id, load_encrypted_data)).first()
+
+
+def get_by_hash(
+    db: Session, data_hash: str, patient_id: Optional[uuid.UUID] = None
+) -> Optional[MedicalRecord]:
+    """
+    Get a medical record by its data hash, optionally restricted to one patient.
+
+    Accepts hashes with or without the 0x prefix used on-chain. Served by the
+    ix_medical_records_data_hash / ix_medical_records_patient_id_data_hash indexes.
+    """
+    return db.scalars(_by_hash_stmt(data_hash, patient_id)).first()
 
 
 def get_medical_records_by_patient_id(
-    db: Session, patient_id: uuid.UUID, skip: int = 0, limit: int = 100
+    db: Session, patient_id: uuid.UUID, skip: int = 0, limit: int = 100, after: Optional[CursorPosition] = None
 ) -> List[MedicalRecord]:
     """
-    Get all medical records for a specific patient.
+    Get a page of the medical records of a specific patient, oldest first.
+    `after` is the (created_at, id) of the last record of the previous page (keyset pagination).
     """
-    return (
-        db.query(MedicalRecord)
-        .filter(MedicalRecord.patient_id == patient_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    return list(db.scalars(_patient_page_stmt(patient_id, skip, limit, after)).all())
 
 
 def update_medical_record_blockchain_id(
@@ -65,7 +194,326 @@ def update_medical_record_blockchain_id(
     """
     db_obj = get_medical_record_by_id(db, record_id)
     if db_obj:
-        db_obj.blockchain_record_id = blockchain_tx_hash
+        _set_confirmed(db_obj, blockchain_tx_hash)
+        db.commit()
+        db.refresh(db_obj)
+    return db_obj
+
+
+def mark_medical_record_blockchain_pending(
+    db: Session, record_id: uuid.UUID, blockchain_tx_hash: str
+) -> Optional[MedicalRecord]:
+    """
+    Store a submitted (not yet mined) transaction hash for a medical record.
+    """
+    db_obj = get_medical_record_by_id(db, record_id)
+    if db_obj:
+        _set_pending(db_obj, blockchain_tx_hash)
+        db.commit()
+        db.refresh(db_obj)
+    return db_obj
+
+
+def get_medical_records_pending_on_blockchain(db: Session) -> List[MedicalRecord]:
+    """
+    Get all medical records whose anchoring transaction has not been confirmed yet.
+    """
+    return list(db.scalars(_pending_on_blockchain_stmt()).all())
+
+
+def update_medical_record_blockchain_status(
+    db: Session, blockchain_tx_hash: str, status: BlockchainStatus
+) -> Optional[MedicalRecord]:
+    """
+    Apply the outcome of a tracked transaction to the record that submitted it.
+    A confirmed transaction also becomes the record's blockchain_record_id.
+    """
+    db_obj = db.scalars(_by_tx_hash_stmt(blockchain_tx_hash)).first()
+    if db_obj:
+        _set_blockchain_status(db_obj, blockchain_tx_hash, status)
         db.commit()
         db.refresh(db_obj)
     return db_obj
+
+
+def get_data_keys_to_rewrap(
+    db: Session, key_version: int, after_id: Optional[uuid.UUID], limit: int
+) -> List[tuple]:
+    """
+    Get (id, wrapped_data_key, key_version) of up to `limit` records, in id order after
+    `after_id`, whose data key is wrapped with a version other than `key_version`.
+    Records without a wrapped data key are skipped.
+    """
+    query = db.query(MedicalRecord.id, MedicalRecord.wrapped_data_key, MedicalRecord.key_version).filter(
+        MedicalRecord.wrapped_data_key.isnot(None),
+        MedicalRecord.key_version != key_version,
+    )
+    if after_id is not None:
+        query = query.filter(MedicalRecord.id > after_id)
+    return query.order_by(MedicalRecord.id).limit(limit).all()
+
+
+def get_records_to_reencrypt(
+    db: Session, key_version: int, after_id: Optional[uuid.UUID], limit: int, include_current: bool = False
+) -> List[tuple]:
+    """
+    Get (id, encrypted_data, encryption_format, wrapped_data_key, key_version, data_hash)
+    of up to `limit` records, in id order after `after_id`, that are not encrypted with a
+    data key wrapped with `key_version` (or every record with `include_current`).
+    """
+    query = db.query(
+        MedicalRecord.id, MedicalRecord.encrypted_data, MedicalRecord.encryption_format,
+        MedicalRecord.wrapped_data_key, MedicalRecord.key_version, MedicalRecord.data_hash,
+    )
+    if not include_current:
+        query = query.filter(or_(
+            MedicalRecord.wrapped_data_key.is_(None),
+            MedicalRecord.key_version.is_(None),
+            MedicalRecord.key_version != key_version,
+        ))
+    if after_id is not None:
+        query = query.filter(MedicalRecord.id > after_id)
+    return query.order_by(MedicalRecord.id).limit(limit).all()
+
+
+def update_wrapped_data_keys(db: Session, rows: List[dict]) -> None:
+    """
+    Store re-wrapped data keys and commit. Each row is {"id", "wrapped_data_key", "key_version"}.
+    """
+    if rows:
+        db.execute(update(MedicalRecord), rows)
+    db.commit()
+
+
+def get_existing_data_hashes(
+    db: Session, patient_id: uuid.UUID, data_hashes: Iterable[str]
+) -> Set[str]:
+    """
+    Return which of `data_hashes` belong to records of this patient, in one query.
+    """
+    data_hashes = list(data_hashes)
+    if not data_hashes:
+        return set()
+    return set(db.scalars(_existing_hashes_stmt(patient_id, data_hashes)).all())
+
+
+def get_anchored_medical_records_by_patient_id(
+    db: Session,
+    patient_id: uuid.UUID,
+    data_hashes: Iterable[str],
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[CursorPosition] = None,
+) -> List[MedicalRecord]:
+    """
+    Get one page of a patient's anchored records, oldest first.
+
+    A record is included if its data_hash is in `data_hashes` (the hashes listed
+    on-chain for the patient) or if it was anchored through a confirmed Merkle batch.
+    Matching and pagination both happen in SQL; `after` continues from the
+    (created_at, id) of the last record of the previous page.
+    """
+    return list(db.scalars(_anchored_page_stmt(patient_id, data_hashes, skip, limit, after)).unique().all())
+
+
+# Async variants used by the API endpoints (AsyncSession).
+# Relationships cannot be lazy-loaded through an AsyncSession, so the accessors that
+# hand records to code reading `anchor_batch` load it eagerly.
+
+async def create_medical_record_async(
+    db: AsyncSession,
+    *,
+    medical_record_in: MedicalRecordCreate,
+    patient_id: uuid.UUID,
+    encrypted_data: bytes,
+    data_hash: str,
+    blockchain_status: Optional[BlockchainStatus] = None,
+    encryption_format: int = ENCRYPTION_FORMAT_AESGCM,
+    wrapped_data_key: Optional[bytes] = None,
+    key_version: Optional[int] = None,
+) -> MedicalRecord:
+    """
+    Create a new medical record. See `create_medical_record`.
+    """
+    db_obj = _new_medical_record(
+        medical_record_in, patient_id, encrypted_data, data_hash,
+        blockchain_status, encryption_format, wrapped_data_key, key_version,
+    )
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+# Columns set by create_medical_records_bulk_async, in COPY order
+BULK_INSERT_COLUMNS = (
+    "id", "patient_id", "record_type", "record_metadata", "encrypted_data", "encryption_format",
+    "wrapped_data_key", "key_version", "data_hash", "blockchain_status", "created_at", "updated_at",
+)
+
+
+def _copy_value(column: str, value):
+    # COPY bypasses SQLAlchemy's type processing: enums go in by name, JSONB as text
+    if column == "record_type":
+        return value.name
+    if column == "record_metadata" and value is not None:
+        return json.dumps(value)
+    return value
+
+
+async def create_medical_records_bulk_async(db: AsyncSession, rows: List[dict]) -> None:
+    """
+    Insert many medical records and commit. Each row is a dict keyed by BULK_INSERT_COLUMNS.
+
+    On PostgreSQL with asyncpg the rows are streamed with COPY; other databases get one
+    executemany INSERT.
+    """
+    if not rows:
+        return
+    connection = await db.connection()
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg":
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            MedicalRecord.__tablename__,
+            records=[tuple(_copy_value(column, row[column]) for column in BULK_INSERT_COLUMNS) for row in rows],
+            columns=BULK_INSERT_COLUMNS,
+        )
+    else:
+        await db.execute(insert(MedicalRecord), rows)
+    await db.commit()
+
+
+async def get_medical_record_by_id_async(
+    db: AsyncSession, record_id: uuid.UUID, load_encrypted_data: bool = False
+) -> Optional[MedicalRecord]:
+    """
+    Get a medical record (with its anchor batch) by its ID.
+
+    encrypted_data is deferred; pass `load_encrypted_data=True` to fetch it in the
+    same query, or load it later with `await db.refresh(record, ["encrypted_data"])`.
+    """
+    stmt = _record_by_id_stmt(record_id, load_encrypted_data).options(selectinload(MedicalRecord.anchor_batch))
+    return (await db.scalars(stmt)).first()
+
+
+async def get_medical_records_by_ids_async(
+    db: AsyncSession, record_ids: Iterable[uuid.UUID]
+) -> List[MedicalRecord]:
+    """
+    Get the medical records with the given IDs in one query (unknown IDs are skipped).
+    encrypted_data stays deferred.
+    """
+    record_ids = set(record_ids)
+    if not record_ids:
+        return []
+    result = await db.execute(select(MedicalRecord).where(MedicalRecord.id.in_(record_ids)))
+    return list(result.scalars().all())
+
+
+async def get_by_hash_async(
+    db: AsyncSession, data_hash: str, patient_id: Optional[uuid.UUID] = None
+) -> Optional[MedicalRecord]:
+    """
+    Get a medical record by its data hash, optionally restricted to one patient.
+    See `get_by_hash`.
+    """
+    return (await db.scalars(_by_hash_stmt(data_hash, patient_id))).first()
+
+
+async def get_medical_records_for_export_async(
+    db: AsyncSession, patient_id: uuid.UUID, limit: int, after: Optional[CursorPosition] = None
+) -> List[MedicalRecord]:
+    """
+    Get a keyset page of the medical records of a patient, oldest first, with
+    encrypted_data loaded in the same query.
+    """
+    stmt = _patient_page_stmt(patient_id, 0, limit, after).options(undefer(MedicalRecord.encrypted_data))
+    return list((await db.scalars(stmt)).all())
+
+
+async def get_medical_records_by_patient_id_async(
+    db: AsyncSession, patient_id: uuid.UUID, skip: int = 0, limit: int = 100, after: Optional[CursorPosition] = None
+) -> List[MedicalRecord]:
+    """
+    Get a page of the medical records of a specific patient, oldest first.
+    See `get_medical_records_by_patient_id`.
+    """
+    return list((await db.scalars(_patient_page_stmt(patient_id, skip, limit, after))).all())
+
+
+async def update_medical_record_blockchain_id_async(
+    db: AsyncSession, record_id: uuid.UUID, blockchain_tx_hash: str
+) -> Optional[MedicalRecord]:
+    """
+    Update the blockchain transaction hash for a medical record.
+    """
+    db_obj = await get_medical_record_by_id_async(db, record_id)
+    if db_obj:
+        _set_confirmed(db_obj, blockchain_tx_hash)
+        await db.commit()
+        await db.refresh(db_obj)
+    return db_obj
+
+
+async def mark_medical_record_blockchain_pending_async(
+    db: AsyncSession, record_id: uuid.UUID, blockchain_tx_hash: str
+) -> Optional[MedicalRecord]:
+    """
+    Store a submitted (not yet mined) transaction hash for a medical record.
+    """
+    db_obj = await get_medical_record_by_id_async(db, record_id)
+    if db_obj:
+        _set_pending(db_obj, blockchain_tx_hash)
+        await db.commit()
+        await db.refresh(db_obj)
+    return db_obj
+
+
+async def get_medical_records_pending_on_blockchain_async(db: AsyncSession) -> List[MedicalRecord]:
+    """
+    Get all medical records whose anchoring transaction has not been confirmed yet.
+    """
+    return list((await db.scalars(_pending_on_blockchain_stmt())).all())
+
+
+async def update_medical_record_blockchain_status_async(
+    db: AsyncSession, blockchain_tx_hash: str, status: BlockchainStatus
+) -> Optional[MedicalRecord]:
+    """
+    Apply the outcome of a tracked transaction to the record that submitted it.
+    See `update_medical_record_blockchain_status`.
+    """
+    db_obj = (await db.scalars(_by_tx_hash_stmt(blockchain_tx_hash))).first()
+    if db_obj:
+        _set_blockchain_status(db_obj, blockchain_tx_hash, status)
+        await db.commit()
+        await db.refresh(db_obj)
+    return db_obj
+
+
+async def get_existing_data_hashes_async(
+    db: AsyncSession, patient_id: uuid.UUID, data_hashes: Iterable[str]
+) -> Set[str]:
+    """
+    Return which of `data_hashes` belong to records of this patient, in one query.
+    """
+    data_hashes = list(data_hashes)
+    if not data_hashes:
+        return set()
+    return set((await db.scalars(_existing_hashes_stmt(patient_id, data_hashes))).all())
+
+
+async def get_anchored_medical_records_by_patient_id_async(
+    db: AsyncSession,
+    patient_id: uuid.UUID,
+    data_hashes: Iterable[str],
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[CursorPosition] = None,
+) -> List[MedicalRecord]:
+    """
+    Get one page of a patient's anchored records, oldest first.
+    See `get_anchored_medical_records_by_patient_id`.
+    """
+    stmt = _anchored_page_stmt(patient_id, data_hashes, skip, limit, after)
+    return list((await db.scalars(stmt)).unique().all())
@@ -0,0 +1,83 @@
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from src.app.models.medical_record import MedicalRecord
+from src.app.models.reencryption_checkpoint import ReencryptionCheckpoint, ReencryptionFailure
+
+
+def get_checkpoint(db: Session, name: str) -> Optional[ReencryptionCheckpoint]:
+    return db.get(ReencryptionCheckpoint, name)
+
+
+def reset_checkpoint(db: Session, name: str, key_version: int) -> ReencryptionCheckpoint:
+    """
+    Starts the run `name` over from the first record, re-encrypting to `key_version`.
+    """
+    checkpoint = db.get(ReencryptionCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = ReencryptionCheckpoint(name=name)
+        db.add(checkpoint)
+    else:
+        db.execute(delete(ReencryptionFailure).where(ReencryptionFailure.name == name))
+    checkpoint.key_version = key_version
+    checkpoint.last_record_id = None
+    checkpoint.records_done = 0
+    checkpoint.records_failed = 0
+    checkpoint.updated_at = datetime.now(timezone.utc)
+    db.commit()
+    db.refresh(checkpoint)
+    return checkpoint
+
+
+def apply_reencrypted_batch(
+    db: Session,
+    name: str,
+    rows: List[dict],
+    last_record_id: Optional[uuid.UUID],
+    failures: Sequence[Tuple[uuid.UUID, str]] = (),
+) -> None:
+    """
+    Stores re-encrypted records and the (record id, error) `failures` of a batch and moves
+    the checkpoint of run `name` to `last_record_id` (None leaves it, e.g. when retrying
+    failures), in one transaction. Each row is {"id", "encrypted_data", "encryption_format",
+    "wrapped_data_key", "key_version"}; failures recorded earlier for these rows are cleared.
+    """
+    if rows:
+        db.execute(update(MedicalRecord), rows)
+        db.execute(delete(ReencryptionFailure).where(
+            ReencryptionFailure.name == name,
+            ReencryptionFailure.record_id.in_([row["id"] for row in rows]),
+        ))
+    for record_id, error in failures:
+        db.merge(ReencryptionFailure(name=name, record_id=record_id, error=error, failed_at=datetime.now(timezone.utc)))
+    db.flush()
+
+    checkpoint = db.get(ReencryptionCheckpoint, name)
+    if last_record_id is not None:
+        checkpoint.last_record_id = last_record_id
+    checkpoint.records_done += len(rows)
+    checkpoint.records_failed = db.scalar(
+        select(func.count()).select_from(ReencryptionFailure).where(ReencryptionFailure.name == name)
+    )
+    checkpoint.updated_at = datetime.now(timezone.utc)
+    db.commit()
+
+
+def get_failed_records(db: Session, name: str, after_id: Optional[uuid.UUID], limit: int) -> List[tuple]:
+    """
+    Get the records run `name` could not re-encrypt, as rows like
+    `crud_medical_record.get_records_to_reencrypt`, in id order after `after_id`.
+    """
+    query = db.query(
+        MedicalRecord.id, MedicalRecord.encrypted_data, MedicalRecord.encryption_format,
+        MedicalRecord.wrapped_data_key, MedicalRecord.key_version, MedicalRecord.data_hash,
+    ).join(ReencryptionFailure, ReencryptionFailure.record_id == MedicalRecord.id).filter(
+        ReencryptionFailure.name == name
+    )
+    if after_id is not None:
+        query = query.filter(MedicalRecord.id > after_id)
+    return query.order_by(MedicalRecord.id).limit(limit).all()
@@ -1,20 +1,43 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import uuid
+from typing import Iterable, Set
 from ..models.user import User
 from ..schemas.user import UserCreate, UserRole # UserCreate and UserRole are in schemas, not models
 from ..core.security import get_password_hash
 
+# Sync and async accessors share these statement/object builders so they cannot drift apart
+
+def _user_by(criterion):
+    return select(User).where(criterion)
+
+def _new_user(user_in: UserCreate, did: str, user_id_override: uuid.UUID | None) -> User:
+    return User(
+        id=user_id_override if user_id_override else uuid.uuid4(), # Client-side UUID generation if not overridden
+        username=user_in.username,
+        email=user_in.email,
+        full_name=user_in.full_name,  # Assign full_name
+        hashed_password=get_password_hash(user_in.password),
+        role=UserRole(user_in.role),  # Convert string role to enum
+        did=did,
+        is_active=True  # Explicitly set is_active
+    )
+
+def _patient_ids_stmt(user_ids: Set[uuid.UUID]):
+    return select(User.id).where(User.id.in_(user_ids), User.role == UserRole.PATIENT)
+
 def get_user_by_email(db: Session, email: str) -> User | None:
     """Get a user by email."""
-    return db.query(User).filter(User.email == email).first()
+    return db.scalars(_user_by(User.email == email)).first()
 
 def get_user_by_username(db: Session, username: str) -> User | None:
     """Get a user by username."""
-    return db.query(User).filter(User.username == username).first()
+    return db.scalars(_user_by(User.username == username)).first()
 
 def get_user_by_id(db: Session, user_id: uuid.UUID) -> User | None:
     """Get a user by ID."""
-    return db.query(User).filter(User.id == user_id).first()
+    return db.scalars(_user_by(User.id == user_id)).first()
 
 def create_user(db: Session, user_in: UserCreate, did: str, user_id_override: uuid.UUID | None = None) -> User:
     """
@@ -26,17 +49,7 @@ def create_user(db: Session, user_in: UserCreate, did: str, user_id_override: uu
         did: Decentralized Identifier
         user_id_override: Optional UUID to use instead of letting PostgreSQL generate one
     """
-    hashed_password = get_password_hash(user_in.password)
-    db_user = User(
-        id=user_id_override if user_id_override else uuid.uuid4(), # Client-side UUID generation if not overridden
-        username=user_in.username,
-        email=user_in.email,
-        full_name=user_in.full_name,  # Assign full_name
-        hashed_password=hashed_password,
-        role=UserRole(user_in.role),  # Convert string role to enum
-        did=did,
-        is_active=True  # Explicitly set is_active
-    )
+    db_user = _new_user(user_in, did, user_id_override)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
@@ -49,4 +62,43 @@ def update_user_blockchain_address(db: Session, user_id: uuid.UUID, blockchain_a
         db_user.blockchain_address = blockchain_address
         db.commit()
         db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    return db_user
+
+
+# Async variants used by the API endpoints (AsyncSession)
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> User | None:
+    """Get a user by email."""
+    return (await db.scalars(_user_by(User.email == email))).first()
+
+async def get_user_by_username_async(db: AsyncSession, username: str) -> User | None:
+    """Get a user by username."""
+    return (await db.scalars(_user_by(User.username == username))).first()
+
+async def get_user_by_id_async(db: AsyncSession, user_id: uuid.UUID) -> User | None:
+    """Get a user by ID."""
+    return (await db.scalars(_user_by(User.id == user_id))).first()
+
+async def get_patient_ids_async(db: AsyncSession, user_ids: Iterable[uuid.UUID]) -> Set[uuid.UUID]:
+    """Return which of `user_ids` are patients, in one query."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return set()
+    return set((await db.scalars(_patient_ids_stmt(user_ids))).all())
+
+async def create_user_async(db: AsyncSession, user_in: UserCreate, did: str, user_id_override: uuid.UUID | None = None) -> User:
+    """Create a new user. See `create_user`."""
+    db_user = _new_user(user_in, did, user_id_override)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user_blockchain_address_async(db: AsyncSession, user_id: uuid.UUID, blockchain_address: str) -> User:
+    """Update a user's blockchain address."""
+    db_user = await get_user_by_id_async(db, user_id)
+    if db_user:
+        db_user.blockchain_address = blockchain_address
+        await db.commit()
+        await db.refresh(db_user)
+    return db_user
@@ -0,0 +1,176 @@
+"""
+Partition maintenance for audit_data_access_logs (PostgreSQL only).
+
+The table is range-partitioned by month on "timestamp", plus a DEFAULT partition that
+catches rows no monthly partition covers. Run this regularly (e.g. daily from cron) to
+create the partitions for the coming months and to detach partitions older than the
+retention period, moving them to an archive schema or dropping them.
+
+    python -m src.app.jobs.audit_partitions
+    python -m src.app.jobs.audit_partitions --months-ahead 6 --retention-months 24 --drop
+    python -m src.app.jobs.audit_partitions --dry-run
+"""
+import argparse
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from src.app.core.config import AUDIT_LOG_CONFIG
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "audit_data_access_logs"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_PARTITION_NAME_RE = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_floor(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def parse_partition_month(name: str) -> Optional[date]:
+    """
+    Returns the month covered by a monthly partition, or None for any other table name.
+    """
+    match = _PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partitions_to_create(existing: Iterable[date], today: date, months_ahead: int) -> List[date]:
+    """
+    Months from the current one up to `months_ahead` months ahead that have no partition yet.
+    """
+    existing = set(existing)
+    current = month_floor(today)
+    return [m for m in (add_months(current, i) for i in range(months_ahead + 1)) if m not in existing]
+
+
+def partitions_to_detach(existing: Iterable[date], today: date, retention_months: int) -> List[date]:
+    """
+    Months whose partition lies entirely before the retention window.
+    """
+    cutoff = add_months(month_floor(today), -retention_months)
+    return sorted(m for m in existing if add_months(m, 1) <= cutoff)
+
+
+def _bound(month: date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def list_partition_months(conn: Connection) -> List[date]:
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :parent"
+    ), {"parent": PARENT_TABLE}).scalars()
+    return sorted(m for m in (parse_partition_month(name) for name in rows) if m is not None)
+
+
+def create_partition(conn: Connection, month: date) -> None:
+    """
+    Creates the partition for `month`. Rows that already landed in the DEFAULT partition
+    for that month are moved into it, since ATTACH fails while DEFAULT still holds them.
+    """
+    name = partition_name(month)
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE \"timestamp\" >= {lower} AND \"timestamp\" < {upper} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )).rowcount
+    if moved:
+        logger.warning(f"Moved {moved} audit log rows from {DEFAULT_PARTITION} into {name}")
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})"))
+
+
+def detach_partition(conn: Connection, month: date, archive_schema: Optional[str] = None, drop: bool = False) -> None:
+    """
+    Detaches the partition for `month`, then drops it or moves it to `archive_schema`.
+    """
+    name = partition_name(month)
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    if drop:
+        conn.execute(text(f"DROP TABLE {name}"))
+    elif archive_schema:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+
+
+def run_maintenance(
+    conn: Connection,
+    today: Optional[date] = None,
+    months_ahead: int = AUDIT_LOG_CONFIG["partition_months_ahead"],
+    retention_months: int = AUDIT_LOG_CONFIG["partition_retention_months"],
+    archive_schema: Optional[str] = AUDIT_LOG_CONFIG["partition_archive_schema"],
+    drop: bool = False,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Creates missing upcoming partitions and detaches expired ones.
+    Returns the partition names created and detached.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    existing = list_partition_months(conn)
+    to_create = partitions_to_create(existing, today, months_ahead)
+    to_detach = partitions_to_detach(existing, today, retention_months)
+
+    if not dry_run:
+        for month in to_create:
+            create_partition(conn, month)
+        for month in to_detach:
+            detach_partition(conn, month, archive_schema=archive_schema, drop=drop)
+
+    return {
+        "created": [partition_name(m) for m in to_create],
+        "detached": [partition_name(m) for m in to_detach],
+    }
+
+
+def main():
+    from src.app.core.database import engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=AUDIT_LOG_CONFIG["partition_months_ahead"])
+    parser.add_argument("--retention-months", type=int, default=AUDIT_LOG_CONFIG["partition_retention_months"])
+    parser.add_argument("--archive-schema", default=AUDIT_LOG_CONFIG["partition_archive_schema"],
+                        help="Schema detached partitions are moved to (ignored with --drop)")
+    parser.add_argument("--drop", action="store_true", help="Drop expired partitions instead of archiving them")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would change")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        parser.error(f"Partition maintenance needs PostgreSQL, not {engine.dialect.name}")
+
+    with engine.begin() as conn:
+        result = run_maintenance(
+            conn,
+            months_ahead=args.months_ahead,
+            retention_months=args.retention_months,
+            archive_schema=args.archive_schema,
+            drop=args.drop,
+            dry_run=args.dry_run,
+        )
+    prefix = "would " if args.dry_run else ""
+    print(f"{prefix}create: {', '.join(result['created']) or '-'}")
+    print(f"{prefix}detach: {', '.join(result['detached']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Online re-encryption of medical_records.encrypted_data.
+
+Moves records to a fresh per-record data key wrapped with the current key-encryption key
+(ENCRYPTION_KEY_VERSION, see core/envelope.py) and to the blob format and compression the
+current configuration selects. By default only records that are not yet encrypted with a
+data key of the current version are processed; --all re-encrypts every record, e.g. to
+replace data keys or apply a new compression codec.
+
+The table is walked in id order, `batch_size` records at a time. Each batch is decrypted
+and re-encrypted on a thread pool, written back with one bulk UPDATE and committed
+together with the checkpoint in reencryption_checkpoints, so an interrupted run resumes
+after the last committed batch. Records that cannot be re-encrypted are recorded in
+reencryption_failures in the same transaction; --retry-failed processes only those.
+Between batches the job paces itself to --rows-per-second and waits while a streaming
+replica lags more than --max-replica-lag seconds, so it can run next to API traffic.
+
+    python -m src.app.jobs.reencrypt_records
+    python -m src.app.jobs.reencrypt_records --rows-per-second 500 --max-replica-lag 10
+    python -m src.app.jobs.reencrypt_records --all --compression zstd --restart
+    python -m src.app.jobs.reencrypt_records --retry-failed
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.app.core.compression import select_compression
+from src.app.core.config import REENCRYPTION_JOB_CONFIG
+from src.app.core.encryption import hash_data, select_encryption_format
+from src.app.core.envelope import DataKeyManager, data_key_manager
+from src.app.core.metrics import metrics
+from src.app.crud import crud_medical_record, crud_reencryption
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint name of the default run
+DEFAULT_RUN_NAME = "reencrypt_records"
+
+
+def replica_lag_seconds(db: Session) -> Optional[float]:
+    """
+    Replay lag of the slowest streaming replica, measured on the primary. None if the
+    database is not PostgreSQL or has no replicas.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    lag = db.execute(text(
+        "SELECT EXTRACT(EPOCH FROM MAX(COALESCE(replay_lag, interval '0'))) FROM pg_stat_replication"
+    )).scalar()
+    db.rollback()  # Do not keep a transaction open between polls
+    return float(lag) if lag is not None else None
+
+
+class Throttle:
+    """
+    Paces a job to `rows_per_second` and holds it while `replica_lag()` reports more than
+    `max_replica_lag_seconds`, checking again every `poll_seconds`. A limit of 0 disables
+    that check. After a pause the rate is measured afresh, so the job does not burst to
+    catch up on the time it waited.
+    """
+
+    def __init__(
+        self,
+        rows_per_second: float = REENCRYPTION_JOB_CONFIG["rows_per_second"],
+        max_replica_lag_seconds: float = REENCRYPTION_JOB_CONFIG["max_replica_lag_seconds"],
+        replica_lag: Callable[[], Optional[float]] = lambda: None,
+        poll_seconds: float = REENCRYPTION_JOB_CONFIG["replica_lag_poll_seconds"],
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rows_per_second = rows_per_second
+        self.max_replica_lag_seconds = max_replica_lag_seconds
+        self.poll_seconds = poll_seconds
+        self._replica_lag = replica_lag
+        self._clock = clock
+        self._sleep = sleep
+        self._started = clock()
+        self._rows = 0
+
+    def _pause(self, seconds: float) -> None:
+        self._sleep(seconds)
+        metrics.observe("reencryption.throttle_seconds", seconds)
+
+    def wait(self, rows: int) -> None:
+        """
+        Called after each batch of `rows` rows; returns when the next batch may start.
+        """
+        self._rows += rows
+        if self.rows_per_second > 0:
+            delay = self._started + self._rows / self.rows_per_second - self._clock()
+            if delay > 0:
+                self._pause(delay)
+
+        if self.max_replica_lag_seconds > 0:
+            paused = False
+            while True:
+                lag = self._replica_lag()
+                metrics.set_gauge("reencryption.replica_lag_seconds", lag or 0)
+                if lag is None or lag <= self.max_replica_lag_seconds:
+                    break
+                if not paused:
+                    logger.info(f"Replica lag {lag:.1f}s is above {self.max_replica_lag_seconds}s; pausing re-encryption.")
+                    paused = True
+                self._pause(self.poll_seconds)
+            if paused:
+                self._started, self._rows = self._clock(), 0
+
+
+class RecordReencryptor:
+    """
+    Re-encrypts medical records in checkpointed batches, see the module docstring.
+    `name` identifies the checkpoint, so separate runs can be tracked side by side.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        manager: DataKeyManager = data_key_manager,
+        name: str = DEFAULT_RUN_NAME,
+        batch_size: int = REENCRYPTION_JOB_CONFIG["batch_size"],
+        workers: int = REENCRYPTION_JOB_CONFIG["workers"],
+        compression: Optional[str] = None,
+        include_current: bool = False,
+        throttle: Optional[Throttle] = None,
+    ):
+        self._session_factory = session_factory
+        self._manager = manager
+        self.name = name
+        self.batch_size = batch_size
+        self.workers = workers
+        self.compression = compression
+        self.include_current = include_current
+        self._throttle = throttle
+
+    def reencrypt(self, row: tuple) -> dict:
+        """
+        Returns the update for one (id, encrypted_data, encryption_format, wrapped_data_key,
+        key_version, data_hash) row. Raises ValueError if the record cannot be decrypted or
+        does not match its hash.
+        """
+        record_id, encrypted_data, encryption_format, wrapped_data_key, key_version, data_hash = row
+        data = self._manager.get_cipher(wrapped_data_key, key_version).decrypt_record(encrypted_data, encryption_format)
+        if hash_data(data) != data_hash:
+            raise ValueError("Decrypted data does not match the record hash.")
+
+        cipher, new_wrapped_data_key, new_key_version = self._manager.new_data_key()
+        codec = select_compression(len(data), self.compression)
+        new_format = select_encryption_format(len(data), codec)
+        return {
+            "id": record_id,
+            "encrypted_data": cipher.encrypt_record(data, new_format, codec),
+            "encryption_format": new_format,
+            "wrapped_data_key": new_wrapped_data_key,
+            "key_version": new_key_version,
+        }
+
+    def _try_reencrypt(self, row: tuple) -> Tuple[Optional[dict], Optional[str]]:
+        try:
+            return self.reencrypt(row), None
+        except ValueError as e:
+            logger.error(f"Could not re-encrypt record {row[0]}: {e}")
+            return None, str(e)
+
+    def run(self, restart: bool = False, retry_failed: bool = False) -> dict:
+        """
+        Re-encrypts records until none are left after the checkpoint. Starts over if
+        `restart` is set or the key version changed since the checkpoint was written.
+        With `retry_failed`, only the records recorded as failed by the run are processed
+        and the checkpoint stays where it is. Returns the totals of the run.
+        """
+        db = self._session_factory()
+        try:
+            key_version = self._manager.current_version
+            checkpoint = crud_reencryption.get_checkpoint(db, self.name)
+            if restart or checkpoint is None or checkpoint.key_version != key_version:
+                checkpoint = crud_reencryption.reset_checkpoint(db, self.name, key_version)
+
+            after_id = None if retry_failed else checkpoint.last_record_id
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reencrypt") as executor:
+                while True:
+                    started = time.perf_counter()
+                    if retry_failed:
+                        rows = crud_reencryption.get_failed_records(db, self.name, after_id, self.batch_size)
+                    else:
+                        rows = crud_medical_record.get_records_to_reencrypt(
+                            db, key_version, after_id, self.batch_size, self.include_current
+                        )
+                    if not rows:
+                        break
+                    updates, failures = [], []
+                    for row, (update, error) in zip(rows, executor.map(self._try_reencrypt, rows)):
+                        if update is not None:
+                            updates.append(update)
+                        else:
+                            failures.append((row[0], error))
+                    after_id = rows[-1][0]
+                    # Failed records are kept in reencryption_failures, so the checkpoint may move past them
+                    crud_reencryption.apply_reencrypted_batch(
+                        db, self.name, updates, None if retry_failed else after_id, failures
+                    )
+
+                    metrics.increment("reencryption.records", len(updates))
+                    metrics.increment("reencryption.failures", len(failures))
+                    metrics.observe("reencryption.batch_seconds", time.perf_counter() - started)
+                    if self._throttle is not None:
+                        self._throttle.wait(len(rows))
+
+            return {"done": checkpoint.records_done, "failed": checkpoint.records_failed}
+        finally:
+            db.close()
+
+
+def main():
+    from src.app.core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--name", default=DEFAULT_RUN_NAME, help="Checkpoint name of the run")
+    parser.add_argument("--all", action="store_true", help="Re-encrypt every record, not only those on an old key")
+    parser.add_argument("--compression", choices=["none", "zlib", "zstd"], default=None,
+                        help="Codec for every re-encrypted record (default: the configured selection)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first record")
+    parser.add_argument("--retry-failed", action="store_true", help="Only retry the records the run could not re-encrypt")
+    parser.add_argument("--batch-size", type=int, default=REENCRYPTION_JOB_CONFIG["batch_size"])
+    parser.add_argument("--workers", type=int, default=REENCRYPTION_JOB_CONFIG["workers"])
+    parser.add_argument("--rows-per-second", type=float, default=REENCRYPTION_JOB_CONFIG["rows_per_second"])
+    parser.add_argument("--max-replica-lag", type=float, default=REENCRYPTION_JOB_CONFIG["max_replica_lag_seconds"],
+                        help="Seconds of replica lag above which the job pauses")
+    args = parser.parse_args()
+
+    lag_db = SessionLocal()
+    try:
+        throttle = Throttle(
+            rows_per_second=args.rows_per_second,
+            max_replica_lag_seconds=args.max_replica_lag,
+            replica_lag=lambda: replica_lag_seconds(lag_db),
+        )
+        result = RecordReencryptor(
+            SessionLocal,
+            name=args.name,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            compression=args.compression,
+            include_current=args.all,
+            throttle=throttle,
+        ).run(restart=args.restart, retry_failed=args.retry_failed)
+    finally:
+        lag_db.close()
+    print(f"re-encrypted: {result['done']}, failed: {result['failed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Key-encryption key rotation for medical_records.
+
+Re-wraps the per-record data keys (see core/envelope.py) with the key-encryption key of
+the target version, by default the current ENCRYPTION_KEY_VERSION. Only the 40-byte
+wrapped keys are rewritten; encrypted_data is not read or changed. Rows are processed in
+id order, one committed batch at a time, so an interrupted run can simply be restarted.
+
+Records that predate envelope encryption have no data key and are left as they are.
+
+    python -m src.app.jobs.rotate_data_keys
+    python -m src.app.jobs.rotate_data_keys --target-version 3 --batch-size 5000
+"""
+import argparse
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from src.app.core.envelope import DataKeyManager, data_key_manager
+from src.app.crud import crud_medical_record
+
+logger = logging.getLogger(__name__)
+
+
+def rewrap_data_keys(
+    session_factory: Callable[[], Session],
+    manager: DataKeyManager = data_key_manager,
+    target_version: Optional[int] = None,
+    batch_size: int = 1000,
+) -> dict:
+    """
+    Re-wraps every data key not wrapped with `target_version`. Returns the number of keys
+    re-wrapped and of keys that could not be unwrapped (left unchanged and logged).
+    """
+    rewrapped = failed = 0
+    after_id = None
+    db = session_factory()
+    try:
+        while True:
+            rows = crud_medical_record.get_data_keys_to_rewrap(
+                db, target_version if target_version is not None else manager.current_version, after_id, batch_size
+            )
+            if not rows:
+                break
+            updates = []
+            for record_id, wrapped_data_key, key_version in rows:
+                try:
+                    new_wrapped, new_version = manager.rewrap(wrapped_data_key, key_version, target_version)
+                except ValueError as e:
+                    logger.error(f"Could not re-wrap the data key of record {record_id}: {e}")
+                    failed += 1
+                    continue
+                updates.append({"id": record_id, "wrapped_data_key": new_wrapped, "key_version": new_version})
+            crud_medical_record.update_wrapped_data_keys(db, updates)
+            rewrapped += len(updates)
+            after_id = rows[-1][0]
+    finally:
+        db.close()
+    return {"rewrapped": rewrapped, "failed": failed}
+
+
+def main():
+    from src.app.core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-version", type=int, default=None,
+                        help="Key version to wrap data keys with (default: the current version)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    result = rewrap_data_keys(SessionLocal, target_version=args.target_version, batch_size=args.batch_size)
+    print(f"re-wrapped: {result['rewrapped']}, failed: {result['failed']}")
+
+
+if __name__ == "__main__":
+    main()
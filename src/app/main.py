@@ -1,7 +1,20 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware # Added import
-from src.app.api.endpoints import users, auth, medical_records, nlp as nlp_router, ai
+from src.app.api.endpoints import users, auth, medical_records, nlp as nlp_router, ai, metrics
 from src.app.api.api_v1.endpoints import audit_logs # Import the new audit_logs router
+from src.app.core.blockchain import shutdown_blockchain_service, TX_SUBMISSION_FIRE_AND_TRACK
+from src.app.core.config import AUDIT_LOG_CONFIG, BLOCKCHAIN_CONFIG
+from src.app.core.encryption import shutdown_crypto_pool
+from src.app.core.pagination import NEXT_CURSOR_HEADER
+from src.app.core.request_metrics import bytes_fetched_middleware
+from src.app.services.access_event_watcher import get_access_event_watcher
+from src.app.services.anchor_batcher import get_anchor_batcher
+from src.app.services.chain_indexer import get_chain_event_indexer
+from src.app.services.chain_state_refresher import get_chain_state_refresher
+from src.app.services.audit_writer import get_audit_log_writer
+from src.app.services.receipt_tracker import get_receipt_tracker
 
 # Define allowed origins for CORS
 origins = [
@@ -10,10 +23,47 @@ origins = [
     # Add other origins if necessary, e.g., production frontend URL
 ]
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    audit_log_writer = get_audit_log_writer()
+    if AUDIT_LOG_CONFIG["async_writer_enabled"]:
+        audit_log_writer.start()
+    chain_state_refresher = get_chain_state_refresher()
+    if BLOCKCHAIN_CONFIG["chain_state_refresh_interval_seconds"] > 0:
+        chain_state_refresher.start()
+    receipt_tracker = get_receipt_tracker()
+    if BLOCKCHAIN_CONFIG["tx_submission_mode"] == TX_SUBMISSION_FIRE_AND_TRACK:
+        await receipt_tracker.load_pending_records()
+        receipt_tracker.start()
+    # Runs in both anchoring modes: bulk imports always queue their records for it
+    anchor_batcher = get_anchor_batcher()
+    anchor_batcher.start()
+    chain_event_indexer = get_chain_event_indexer()
+    access_event_watcher = get_access_event_watcher()
+    if BLOCKCHAIN_CONFIG["event_indexer_enabled"]:
+        # Only the worker holding the index lock polls, so it cannot keep the other
+        # workers' access caches up to date; every worker runs its own watcher for that
+        chain_event_indexer.start()
+    if BLOCKCHAIN_CONFIG["access_cache_ttl_seconds"] > 0:
+        access_event_watcher.start()
+    yield
+    await chain_event_indexer.stop()
+    await access_event_watcher.stop()
+    # Queued records stay QUEUED in the database and are anchored after the next start
+    await anchor_batcher.stop()
+    await receipt_tracker.stop()
+    await chain_state_refresher.stop()
+    # Writes every buffered audit entry before the process exits
+    await audit_log_writer.stop()
+    # Release pooled RPC connections on shutdown
+    await shutdown_blockchain_service()
+    shutdown_crypto_pool()
+
 app = FastAPI(
     title="MediTrustAI API",
     description="API for MediTrustAI blockchain-based user registry",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -24,8 +74,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all standard methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=[NEXT_CURSOR_HEADER],  # Lets the frontend read pagination cursors
 )
 
+# Tracks encrypted_data bytes loaded per request (see /api/v1/metrics)
+app.middleware("http")(bytes_fetched_middleware)
+
 # Include routers with consistent API versioning
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"]) # Corrected tag
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
@@ -33,6 +87,7 @@ app.include_router(medical_records.router, prefix="/api/v1/medical-records", tag
 app.include_router(nlp_router.router, prefix="/api/v1/nlp", tags=["NLP"])
 app.include_router(ai.router, prefix="/api/v1/ai", tags=["AI Predictive Service"])
 app.include_router(audit_logs.router, prefix="/api/v1/audit", tags=["Audit Logs"]) # Added audit_logs router
+app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["Metrics"])
 
 @app.get("/")
 async def root():
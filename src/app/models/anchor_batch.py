@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import relationship
+
+from src.app.core.database import Base
+
+
+class AnchorBatch(Base):
+    """
+    A batch of record hashes anchored on-chain as a single Merkle root.
+    Each member MedicalRecord stores its inclusion proof against `merkle_root`.
+    """
+    __tablename__ = "anchor_batches"
+
+    id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    merkle_root = Column(String(66), unique=True, nullable=False)
+    leaf_count = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False) # See BlockchainStatus
+    transaction_hash = Column(String(66), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    anchored_at = Column(DateTime(timezone=True), nullable=True)
+
+    records = relationship("MedicalRecord", back_populates="anchor_batch")
@@ -1,15 +1,18 @@
 import uuid
 from datetime import datetime, timezone # Added for default timestamp
-from sqlalchemy import Column, ForeignKey, String, TIMESTAMP, text
+from sqlalchemy import Column, ForeignKey, Index, String, TIMESTAMP, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 from ..core.database import Base # Corrected import path
 
 class AuditDataAccessLog(Base):
     __tablename__ = "audit_data_access_logs"
+    # On PostgreSQL the table is range-partitioned by month (see src/app/jobs/audit_partitions.py);
+    # the partition key has to be part of the primary key.
+    __table_args__ = {"postgresql_partition_by": 'RANGE ("timestamp")'}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4) # Changed for SQLite compatibility
-    timestamp = Column(TIMESTAMP(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)) # Changed for SQLite compatibility
+    timestamp = Column(TIMESTAMP(timezone=True), primary_key=True, nullable=False, default=lambda: datetime.now(timezone.utc)) # Changed for SQLite compatibility
     actor_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     owner_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     record_id = Column(UUID(as_uuid=True), ForeignKey("medical_records.id"), nullable=True)
@@ -17,7 +20,25 @@ class AuditDataAccessLog(Base):
     ip_address = Column(String(45), nullable=True)
     target_address = Column(String(42), nullable=True)
     details = Column(JSONB, nullable=True)
+    # Blockchain transaction the entry is about (fire-and-track grant/revoke); see ReceiptTracker
+    transaction_hash = Column(String(66), nullable=True)
 
     actor_user = relationship("User", foreign_keys=[actor_user_id])
     owner_user = relationship("User", foreign_keys=[owner_user_id])
     medical_record = relationship("MedicalRecord", foreign_keys=[record_id])
+
+
+# Owner history, newest first, paginated by (timestamp, id) keyset
+Index(
+    "ix_audit_data_access_logs_owner_user_id_timestamp_id",
+    AuditDataAccessLog.owner_user_id,
+    AuditDataAccessLog.timestamp.desc(),
+    AuditDataAccessLog.id.desc(),
+)
+
+# Unsettled transactions, reloaded by the ReceiptTracker after a restart
+Index(
+    "ix_audit_data_access_logs_transaction_hash",
+    AuditDataAccessLog.transaction_hash,
+    postgresql_where=AuditDataAccessLog.transaction_hash.isnot(None),
+)
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Index, Integer, String
+
+from src.app.core.database import Base
+
+# Local copy of MedicalRecordRegistry state, built from its events by ChainEventIndexer.
+# Hashes are stored as lowercase 0x-prefixed hex, addresses lowercased.
+
+
+class RecordAnchor(Base):
+    """
+    One RecordAdded event: a record hash registered on-chain for a patient.
+    The DID is an indexed string in the event, so only its keccak256 hash is known.
+    """
+    __tablename__ = "record_anchors"
+
+    record_hash = Column(String(66), primary_key=True)
+    patient_did_hash = Column(String(66), nullable=False, index=True)
+    record_type = Column(String(100), nullable=True)
+    submitter = Column(String(42), nullable=False)
+    anchored_at = Column(DateTime(timezone=True), nullable=True) # Block timestamp from the event
+    block_number = Column(BigInteger, nullable=False, index=True)
+    log_index = Column(Integer, nullable=False)
+    transaction_hash = Column(String(66), nullable=False)
+
+
+class RecordAccessGrant(Base):
+    """
+    One AccessGranted/AccessRevoked event. Rows are never updated: the current state of a
+    (record_hash, doctor_address) pair is its latest row, so a reorg rewind only has to
+    delete the rows above the rewind point.
+    """
+    __tablename__ = "record_access_grants"
+    __table_args__ = (
+        Index(
+            "ix_record_access_grants_record_hash_doctor_block",
+            "record_hash", "doctor_address", "block_number", "log_index",
+        ),
+    )
+
+    block_number = Column(BigInteger, primary_key=True)
+    log_index = Column(Integer, primary_key=True)
+    record_hash = Column(String(66), nullable=False)
+    owner_address = Column(String(42), nullable=False)
+    doctor_address = Column(String(42), nullable=False)
+    granted = Column(Boolean, nullable=False)
+    transaction_hash = Column(String(66), nullable=False)
+
+
+class ChainIndexCheckpoint(Base):
+    """
+    Last block fully applied by an indexer, with its hash to detect reorgs, and the chain
+    head seen at that time to tell how far the index lags.
+    """
+    __tablename__ = "chain_index_checkpoints"
+
+    name = Column(String(100), primary_key=True)
+    block_number = Column(BigInteger, nullable=False)
+    block_hash = Column(String(66), nullable=False)
+    head_block_number = Column(BigInteger, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False,
+        default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc),
+    )
@@ -1,14 +1,18 @@
 import uuid
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, field_validator
-from sqlalchemy import Column, DateTime, ForeignKey, String, Enum as SQLEnum, LargeBinary
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Enum as SQLEnum, LargeBinary, event
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from src.app.core.database import Base
+from src.app.core.compression import get_compression_codec
+from src.app.core.encryption import ENCRYPTION_FORMAT_AESGCM
+from src.app.core.request_metrics import add_bytes_fetched
+from src.app.models.anchor_batch import AnchorBatch  # noqa: F401 - registers the mapper used by MedicalRecord.anchor_batch
 
 
 class RecordType(PyEnum):
@@ -22,38 +26,100 @@ class RecordType(PyEnum):
     VACCINATION = "VACCINATION"
 
 
+class BlockchainStatus(str, PyEnum):
+    """
+    Anchoring state of a record's hash on the blockchain.
+    """
+    QUEUED = "QUEUED"          # Waiting to be included in the next Merkle anchor batch
+    SUBMITTING = "SUBMITTING"  # Claimed by an anchor batch whose transaction is being sent
+    PENDING = "PENDING"        # Transaction submitted, receipt not seen yet
+    CONFIRMED = "CONFIRMED"    # Transaction mined successfully
+    FAILED = "FAILED"          # Transaction reverted or could not be submitted
+
+
 class MedicalRecord(Base):
     __tablename__ = "medical_records"
+    __table_args__ = (
+        # Hash lookups scoped to a patient (/patient/me, verification, grant/revoke)
+        Index("ix_medical_records_patient_id_data_hash", "patient_id", "data_hash"),
+        # Per-patient record lists, paginated by (created_at, id) keyset
+        Index("ix_medical_records_patient_id_created_at_id", "patient_id", "created_at", "id"),
+    )
 
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4) # Changed server_default to default
-    patient_id = Column(PGUUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    patient_id = Column(PGUUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     blockchain_record_id = Column(String(66), unique=True, nullable=True)
+    blockchain_status = Column(String(20), nullable=True) # See BlockchainStatus
+    blockchain_tx_hash = Column(String(66), nullable=True, index=True) # Submitted tx, set before confirmation
+    anchor_batch_id = Column(PGUUID(as_uuid=True), ForeignKey("anchor_batches.id"), nullable=True, index=True)
+    merkle_leaf_index = Column(Integer, nullable=True)
+    merkle_proof = Column(JSONB, nullable=True) # Hex sibling hashes from leaf to the batch root
     record_type = Column(SQLEnum(RecordType, name="recordtype"), nullable=False)
     record_metadata = Column(JSONB, nullable=True) # Renamed from metadata
-    encrypted_data = Column(LargeBinary, nullable=False)
-    data_hash = Column(String(64), nullable=False)
+    # Deferred: list endpoints never return the blob. Load it explicitly with
+    # undefer(MedicalRecord.encrypted_data) where the data is decrypted.
+    encrypted_data = deferred(Column(LargeBinary, nullable=False))
+    # Blob format of encrypted_data: one of the ENCRYPTION_FORMAT_* constants of core.encryption
+    encryption_format = Column(Integer, nullable=False, default=ENCRYPTION_FORMAT_AESGCM, server_default=str(ENCRYPTION_FORMAT_AESGCM))
+    # Per-record data key wrapped with the key-encryption key of key_version (see core.envelope).
+    # NULL for records encrypted directly with the key-encryption key.
+    wrapped_data_key = Column(LargeBinary, nullable=True)
+    key_version = Column(Integer, nullable=True, index=True)
+    data_hash = Column(String(64), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     patient = relationship("User", back_populates="medical_records")
+    anchor_batch = relationship("AnchorBatch", back_populates="records")
+
+
+@event.listens_for(MedicalRecord, "load")
+def _count_blob_on_load(target, context):
+    blob = target.__dict__.get("encrypted_data")
+    if blob is not None:
+        add_bytes_fetched(len(blob))
+
+
+@event.listens_for(MedicalRecord, "refresh")
+def _count_blob_on_refresh(target, context, attrs):
+    # Fired when a deferred/expired encrypted_data is loaded on access
+    if attrs is None or "encrypted_data" in attrs:
+        blob = target.__dict__.get("encrypted_data")
+        if blob is not None:
+            add_bytes_fetched(len(blob))
 
 
 class MedicalRecordBase(BaseModel):
     record_type: RecordType
     record_metadata: Optional[dict] = None # Renamed from metadata
     raw_data: str
+    # Codec for this record ("none", "zlib" or "zstd"); the server default if omitted
+    compression: Optional[str] = None
+
+    @field_validator('compression')
+    @classmethod
+    def validate_compression(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None:
+            get_compression_codec(v)
+        return v
 
 
 class MedicalRecordCreate(MedicalRecordBase):
     pass
 
 
+class MedicalRecordImportLine(MedicalRecordBase):
+    """One line of a bulk NDJSON import. patient_id defaults to the importing user."""
+    patient_id: Optional[uuid.UUID] = None
+
+
 class MedicalRecordResponse(BaseModel):
     id: uuid.UUID
     patient_id: uuid.UUID
     record_type: RecordType
     record_metadata: Optional[dict] = None
     blockchain_record_id: Optional[str] = None
+    blockchain_status: Optional[str] = None
     data_hash: str
     created_at: datetime
     updated_at: datetime
@@ -65,6 +131,17 @@ class MedicalRecordDetailResponse(MedicalRecordResponse):
     raw_data: Optional[str] = None
 
 
+class InclusionProofResponse(BaseModel):
+    record_id: uuid.UUID
+    data_hash: str
+    merkle_root: str
+    leaf_index: int
+    proof: List[str]
+    batch_status: str
+    transaction_hash: Optional[str] = None
+    verified: bool
+
+
 from pydantic import BaseModel, ConfigDict, field_validator # Added field_validator
 
 # ... (rest of the existing imports) ...
@@ -94,3 +171,25 @@ class GrantAccessRequest(BaseModel):
 
 class RevokeAccessRequest(GrantAccessRequest): # Can reuse GrantAccessRequest structure
     pass
+
+
+class BulkAccessCheckRequest(BaseModel):
+    record_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=200)
+    accessor_address: str
+
+    @field_validator('accessor_address')
+    @classmethod
+    def validate_accessor_address(cls, v: str) -> str:
+        return GrantAccessRequest.validate_doctor_address(v)
+
+
+class AccessCheckResult(BaseModel):
+    record_id: uuid.UUID
+    has_access: Optional[bool] = None # None when the check failed, see error
+    error: Optional[str] = None
+
+
+class BulkAccessCheckResponse(BaseModel):
+    accessor_address: str
+    results: List[AccessCheckResult]
+    checked_at: datetime
@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+
+from src.app.core.database import Base
+
+
+class ReencryptionCheckpoint(Base):
+    """
+    Progress of a re-encryption run (see jobs/reencrypt_records.py): the last record id of
+    the last committed batch, for the key version the run re-encrypts to. It is updated in
+    the same transaction as the batch, so a restarted run resumes after that record.
+    `records_failed` is the number of ReencryptionFailure rows of the run.
+    """
+    __tablename__ = "reencryption_checkpoints"
+
+    name = Column(String(100), primary_key=True)
+    key_version = Column(Integer, nullable=False)
+    last_record_id = Column(PGUUID(as_uuid=True), nullable=True)
+    records_done = Column(BigInteger, nullable=False, default=0)
+    records_failed = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False,
+        default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
+class ReencryptionFailure(Base):
+    """
+    A record a re-encryption run could not re-encrypt. The checkpoint moves past it, so it
+    is kept here, in the same transaction as its batch, until a --retry-failed run
+    re-encrypts it or the run is restarted.
+    """
+    __tablename__ = "reencryption_failures"
+
+    name = Column(String(100), ForeignKey("reencryption_checkpoints.name", ondelete="CASCADE"), primary_key=True)
+    record_id = Column(PGUUID(as_uuid=True), ForeignKey("medical_records.id", ondelete="CASCADE"), primary_key=True)
+    error = Column(Text, nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from src.app.core.blockchain import BlockchainService, get_blockchain_service
+from src.app.core.config import BLOCKCHAIN_CONFIG
+from src.app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AccessEventWatcher:
+    """
+    Follows AccessGranted/AccessRevoked events and invalidates the matching entries of
+    the blockchain service's access cache.
+
+    Grants and revocations sent by this process invalidate the cache themselves; the
+    watcher covers changes made elsewhere (another API worker, a wallet calling the
+    contract directly) and fire-and-track transactions that are mined later.
+    """
+
+    def __init__(
+        self,
+        blockchain_service_factory: Callable[[], BlockchainService] = get_blockchain_service,
+        poll_interval: float = BLOCKCHAIN_CONFIG["access_event_poll_interval_seconds"],
+    ):
+        self._blockchain_service_factory = blockchain_service_factory
+        self.poll_interval = poll_interval
+        self.last_block: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def poll_once(self) -> int:
+        """
+        Applies the events of blocks mined since the last poll. Returns the number of events.
+        """
+        blockchain_service = self._blockchain_service_factory()
+        head = await blockchain_service.get_block_number()
+        if not head.get("success"):
+            logger.warning(f"Could not fetch the latest block: {head.get('error')}")
+            return 0
+
+        head_block = head["block_number"]
+        if self.last_block is None:
+            # Entries cached before start were checked against the current head at the latest
+            self.last_block = head_block
+            return 0
+        if head_block <= self.last_block:
+            return 0
+
+        result = await blockchain_service.get_access_change_events(self.last_block + 1, head_block)
+        if not result.get("success"):
+            logger.warning(f"Could not fetch access events: {result.get('error')}")
+            return 0
+
+        for event in result["events"]:
+            blockchain_service.access_cache.invalidate(event["record_hash"], event["doctor_address"])
+        self.last_block = head_block
+        metrics.increment("access_event_watcher.events", len(result["events"]))
+        return len(result["events"])
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Access event poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_access_event_watcher_instance: Optional[AccessEventWatcher] = None
+
+def get_access_event_watcher() -> AccessEventWatcher:
+    """
+    Returns the process-wide AccessEventWatcher.
+    """
+    global _access_event_watcher_instance
+    if _access_event_watcher_instance is None:
+        _access_event_watcher_instance = AccessEventWatcher()
+    return _access_event_watcher_instance
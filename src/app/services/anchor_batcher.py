@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.blockchain import (
+    BlockchainService,
+    get_blockchain_service,
+    TX_STATUS_PENDING,
+)
+from src.app.core.config import BLOCKCHAIN_CONFIG
+from src.app.core.database import AsyncSessionLocal
+from src.app.core.metrics import metrics
+from src.app.crud import crud_anchor_batch
+from src.app.models.anchor_batch import AnchorBatch
+from src.app.models.medical_record import BlockchainStatus
+from src.app.services.receipt_tracker import ReceiptTracker, get_receipt_tracker, TX_KIND_ANCHOR_BATCH
+
+logger = logging.getLogger(__name__)
+
+
+class AnchorBatcher:
+    """
+    Anchors queued record hashes on-chain as one Merkle root per batch.
+
+    Records created in batched anchoring mode are stored with blockchain_status QUEUED,
+    so the queue itself lives in the database and survives restarts. A background task
+    flushes a batch once `max_batch_size` records are queued or `max_wait_seconds` has
+    passed: it claims the records and stores the batch with every record's inclusion
+    proof (status SUBMITTING), then sends a single anchorBatch transaction for the root.
+    Records of batches that were not anchored go back to QUEUED.
+    """
+
+    def __init__(
+        self,
+        blockchain_service_factory: Callable[[], BlockchainService] = get_blockchain_service,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        receipt_tracker_factory: Callable[[], ReceiptTracker] = get_receipt_tracker,
+        max_batch_size: int = BLOCKCHAIN_CONFIG["anchor_batch_max_size"],
+        max_wait_seconds: float = BLOCKCHAIN_CONFIG["anchor_batch_max_wait_seconds"],
+        submit_timeout_seconds: float = BLOCKCHAIN_CONFIG["receipt_timeout_seconds"],
+    ):
+        self._blockchain_service_factory = blockchain_service_factory
+        self._session_factory = session_factory
+        self._receipt_tracker_factory = receipt_tracker_factory
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.submit_timeout_seconds = submit_timeout_seconds
+        self._queued_since_flush = 0
+        self._batch_full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def notify_queued(self, count: int = 1) -> None:
+        """
+        Called after records were stored as QUEUED; wakes the flush loop once a batch is full.
+        """
+        self._queued_since_flush += count
+        if self._queued_since_flush >= self.max_batch_size and self._batch_full is not None:
+            self._batch_full.set()
+
+    async def flush(self) -> Optional[AnchorBatch]:
+        """
+        Anchors up to `max_batch_size` queued records. Returns the stored batch, or None
+        if nothing was queued or the batch was not anchored (records are QUEUED again).
+        """
+        async with self._session_factory() as db:
+            batch = await crud_anchor_batch.claim_anchor_batch_async(db, limit=self.max_batch_size)
+            if batch is None:
+                return None
+
+            blockchain_service = self._blockchain_service_factory()
+            result = await blockchain_service.anchor_merkle_root(batch.merkle_root, batch.leaf_count)
+            if not result.get("success"):
+                logger.error(f"Failed to anchor batch of {batch.leaf_count} records: {result.get('error')}")
+                metrics.increment("anchor_batcher.failures")
+                # The send may have reached the chain before failing (e.g. a receipt timeout)
+                await self._settle_unsubmitted(db, blockchain_service, batch)
+                return None
+
+            tx_hash = result.get("transaction_hash")
+            status = BlockchainStatus.PENDING if result.get("status") == TX_STATUS_PENDING else BlockchainStatus.CONFIRMED
+            batch = await crud_anchor_batch.mark_anchor_batch_submitted_async(db, batch.id, status, tx_hash)
+            if status == BlockchainStatus.PENDING:
+                self._receipt_tracker_factory().track(tx_hash, TX_KIND_ANCHOR_BATCH, {"batch_id": batch.id})
+
+            self._queued_since_flush = max(0, self._queued_since_flush - batch.leaf_count)
+            metrics.increment("anchor_batcher.batches")
+            metrics.increment("anchor_batcher.records", batch.leaf_count)
+            metrics.observe("anchor_batcher.batch_size", batch.leaf_count)
+            return batch
+
+    async def _settle_unsubmitted(self, db: AsyncSession, blockchain_service: BlockchainService, batch: AnchorBatch) -> None:
+        """
+        Resolves a SUBMITTING batch without a stored transaction from the contract: anchored
+        roots are CONFIRMED, the records of roots that are not anchored are re-queued. If the
+        contract cannot be read the batch stays SUBMITTING for `recover_stale_batches`.
+        """
+        anchor = await blockchain_service.get_batch_anchor(batch.merkle_root)
+        if not anchor.get("success"):
+            logger.warning(f"Could not check batch {batch.merkle_root} on-chain: {anchor.get('error')}")
+        elif anchor.get("anchored"):
+            await crud_anchor_batch.mark_anchor_batch_submitted_async(db, batch.id, BlockchainStatus.CONFIRMED, None)
+        else:
+            requeued = await crud_anchor_batch.release_anchor_batch_async(db, batch.id)
+            metrics.increment("anchor_batcher.requeued_records", requeued)
+
+    async def recover_stale_batches(self) -> int:
+        """
+        Settles batches left SUBMITTING for longer than `submit_timeout_seconds`, e.g. by a
+        worker that stopped mid-send. Returns the number of batches checked.
+        """
+        created_before = datetime.now(timezone.utc) - timedelta(seconds=self.submit_timeout_seconds)
+        async with self._session_factory() as db:
+            batches = await crud_anchor_batch.get_submitting_anchor_batches_async(db, created_before)
+            blockchain_service = self._blockchain_service_factory()
+            for batch in batches:
+                await self._settle_unsubmitted(db, blockchain_service, batch)
+            return len(batches)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), timeout=self.max_wait_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_full.clear()
+            try:
+                await self.recover_stale_batches()
+                # Drain full batches back to back; a partial batch ends the round
+                while True:
+                    batch = await self.flush()
+                    if batch is None or batch.leaf_count < self.max_batch_size:
+                        break
+            except Exception as e:
+                logger.error(f"Anchor batch flush failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._batch_full = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_anchor_batcher_instance: Optional[AnchorBatcher] = None
+
+def get_anchor_batcher() -> AnchorBatcher:
+    """
+    Returns the process-wide AnchorBatcher.
+    """
+    global _anchor_batcher_instance
+    if _anchor_batcher_instance is None:
+        _anchor_batcher_instance = AnchorBatcher()
+    return _anchor_batcher_instance
@@ -0,0 +1,334 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.config import AUDIT_LOG_CONFIG
+from src.app.core.database import AsyncSessionLocal
+from src.app.core.metrics import metrics
+from src.app.crud import crud_audit_log
+
+logger = logging.getLogger(__name__)
+
+# Put on the queue by stop(); everything enqueued before it is written first
+_STOP = object()
+
+_UUID_FIELDS = ("id", "actor_user_id", "owner_user_id", "record_id")
+
+# Errors about the rows themselves: retrying the same rows fails the same way
+_REJECTED_ERRORS = (IntegrityError, DataError)
+
+
+class AuditLogSpool:
+    """
+    Append-only NDJSON file for audit entries the database did not accept.
+
+    `append` writes and fsyncs entries under an exclusive flock, so the workers of a host
+    can share one file. `replay` takes the same lock, hands the entries to `write` in order
+    and truncates the file only once all of them were written.
+    """
+
+    def __init__(self, path: str = AUDIT_LOG_CONFIG["spool_path"]):
+        self.path = path
+
+    @staticmethod
+    def _encode(entry: dict) -> str:
+        values = dict(entry)
+        for field in _UUID_FIELDS:
+            if values.get(field) is not None:
+                values[field] = str(values[field])
+        values["timestamp"] = values["timestamp"].isoformat()
+        return json.dumps(values)
+
+    @staticmethod
+    def _decode(line: str) -> dict:
+        values = json.loads(line)
+        for field in _UUID_FIELDS:
+            if values.get(field) is not None:
+                values[field] = uuid.UUID(values[field])
+        values["timestamp"] = datetime.fromisoformat(values["timestamp"])
+        return values
+
+    def has_entries(self) -> bool:
+        try:
+            return os.path.getsize(self.path) > 0
+        except OSError:
+            return False
+
+    def append(self, entries: List[dict]) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as spool:
+            fcntl.flock(spool, fcntl.LOCK_EX)
+            try:
+                spool.write("".join(self._encode(entry) + "\n" for entry in entries))
+                spool.flush()
+                os.fsync(spool.fileno())
+            finally:
+                fcntl.flock(spool, fcntl.LOCK_UN)
+
+    async def replay(self, write: Callable[[List[dict]], Awaitable[None]], batch_size: int) -> int:
+        """
+        Writes every spooled entry with `write`, `batch_size` at a time, then empties the
+        spool. Returns the number of entries replayed; if `write` raises, the spool is kept.
+        """
+        if not self.has_entries():
+            return 0
+        with open(self.path, "r+", encoding="utf-8") as spool:
+            await asyncio.to_thread(fcntl.flock, spool, fcntl.LOCK_EX)
+            try:
+                entries = [self._decode(line) for line in spool if line.strip()]
+                for start in range(0, len(entries), batch_size):
+                    await write(entries[start:start + batch_size])
+                spool.truncate(0)
+                spool.flush()
+                os.fsync(spool.fileno())
+                return len(entries)
+            finally:
+                fcntl.flock(spool, fcntl.LOCK_UN)
+
+
+class AuditLogWriter:
+    """
+    Writes audit log entries off the request path in multi-row INSERT batches.
+
+    While started, `log()` stamps the entry (id, timestamp) and puts it on a bounded
+    in-memory queue; a background task inserts a batch once `batch_max_size` entries are
+    waiting or `flush_interval_seconds` has passed since the first one. A full queue makes
+    `log()` wait for room (backpressure) instead of dropping entries. `stop()` drains the
+    queue and writes everything still buffered before it returns. A batch that still fails
+    after `max_write_attempts` is appended to the AuditLogSpool and written back once the
+    database accepts entries again (and when the writer starts). Only errors that may go
+    away are retried and spooled: when the database rejects a batch (constraint or data
+    error), the batch is split until the rejected entries are found, and those are moved
+    to the dead-letter file with their error while the rest is written.
+
+    When the writer is not running (disabled, not started, or stopped) `log()` writes the
+    entry inline on the caller's session, as before.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        queue_max_size: int = AUDIT_LOG_CONFIG["queue_max_size"],
+        batch_max_size: int = AUDIT_LOG_CONFIG["batch_max_size"],
+        flush_interval_seconds: float = AUDIT_LOG_CONFIG["flush_interval_seconds"],
+        max_write_attempts: int = 3,
+        retry_backoff_seconds: float = 0.5,
+        spool: Optional[AuditLogSpool] = None,
+        dead_letter: Optional[AuditLogSpool] = None,
+    ):
+        self._session_factory = session_factory
+        self._spool = spool if spool is not None else AuditLogSpool()
+        self._dead_letter = dead_letter if dead_letter is not None else AuditLogSpool(AUDIT_LOG_CONFIG["dead_letter_path"])
+        self.queue_max_size = queue_max_size
+        self.batch_max_size = batch_max_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_write_attempts = max_write_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    @property
+    def queued_count(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def log(
+        self,
+        db: AsyncSession,
+        actor_user_id: uuid.UUID,
+        owner_user_id: uuid.UUID,
+        action_type: str,
+        record_id: uuid.UUID = None,
+        ip_address: str = None,
+        target_address: str = None,
+        details: dict = None,
+        transaction_hash: str = None,
+    ) -> None:
+        """
+        Records an audit entry. `db` is only used when the writer is not running.
+        """
+        if not self.running:
+            await crud_audit_log.create_audit_log_async(
+                db=db,
+                actor_user_id=actor_user_id,
+                owner_user_id=owner_user_id,
+                action_type=action_type,
+                record_id=record_id,
+                ip_address=ip_address,
+                target_address=target_address,
+                details=details,
+                transaction_hash=transaction_hash,
+            )
+            return
+
+        entry = {
+            "id": uuid.uuid4(),
+            # Stamped now so the row keeps the time of the event, not of the flush
+            "timestamp": datetime.now(timezone.utc),
+            "actor_user_id": actor_user_id,
+            "owner_user_id": owner_user_id,
+            "action_type": action_type,
+            "record_id": record_id,
+            "ip_address": ip_address,
+            "target_address": target_address,
+            "details": details,
+            "transaction_hash": transaction_hash,
+        }
+        if self._queue.full():
+            metrics.increment("audit_writer.backpressure_waits")
+            with metrics.timer("audit_writer.backpressure_wait_seconds"):
+                await self._queue.put(entry)
+        else:
+            self._queue.put_nowait(entry)
+        metrics.increment("audit_writer.enqueued")
+        metrics.set_gauge("audit_writer.queue_depth", self._queue.qsize())
+
+    async def _quarantine(self, entry: dict, error: Exception) -> None:
+        metrics.increment("audit_writer.rejected")
+        logger.error(f"Audit log entry {entry['id']} was rejected by the database: {error}")
+        try:
+            await asyncio.to_thread(self._dead_letter.append, [dict(entry, error=str(error))])
+        except OSError as e:
+            metrics.increment("audit_writer.dropped")
+            logger.critical(f"Failed to write to the audit log dead-letter file {self._dead_letter.path}: {e}")
+            logger.critical(f"Dropped audit log entry: {entry}")
+
+    async def _insert(self, batch: List[dict], skip_existing: bool = False) -> int:
+        """
+        Inserts `batch`. If the database rejects it, the halves are inserted separately, down
+        to the single entries that are quarantined. Other errors are raised. With
+        `skip_existing`, entries already stored (e.g. by an earlier, partly written attempt)
+        are left out. Returns the number of entries inserted.
+        """
+        try:
+            async with self._session_factory() as db:
+                if skip_existing:
+                    existing = await crud_audit_log.get_existing_audit_log_ids_async(db, [entry["id"] for entry in batch])
+                    batch = [entry for entry in batch if entry["id"] not in existing]
+                return await crud_audit_log.create_audit_logs_bulk_async(db, batch)
+        except _REJECTED_ERRORS as e:
+            if len(batch) == 1:
+                await self._quarantine(batch[0], e)
+                return 0
+            middle = len(batch) // 2
+            # The halves are new transactions, so stored entries need not be checked again
+            return await self._insert(batch[:middle]) + await self._insert(batch[middle:])
+
+    async def _replay_spool(self) -> None:
+        async def write(batch: List[dict]) -> None:
+            # Spooled entries may have been committed before the spool was emptied
+            await self._insert(batch, skip_existing=True)
+
+        try:
+            replayed = await self._spool.replay(write, self.batch_max_size)
+        except Exception as e:
+            metrics.increment("audit_writer.write_errors")
+            logger.error(f"Failed to replay spooled audit log entries from {self._spool.path}: {e}")
+            return
+        if replayed:
+            metrics.increment("audit_writer.replayed", replayed)
+            logger.info(f"Replayed {replayed} spooled audit log entries from {self._spool.path}.")
+
+    async def _write_batch(self, batch: List[dict]) -> None:
+        for attempt in range(1, self.max_write_attempts + 1):
+            start = time.perf_counter()
+            try:
+                # A failed attempt may have stored some halves of a split batch already
+                written = await self._insert(batch, skip_existing=attempt > 1)
+            except Exception as e:
+                metrics.increment("audit_writer.write_errors")
+                logger.error(f"Failed to write {len(batch)} audit log entries (attempt {attempt}/{self.max_write_attempts}): {e}")
+                if attempt < self.max_write_attempts:
+                    await asyncio.sleep(self.retry_backoff_seconds * attempt)
+                continue
+            metrics.observe("audit_writer.flush_seconds", time.perf_counter() - start)
+            metrics.observe("audit_writer.batch_size", len(batch))
+            metrics.increment("audit_writer.written", written)
+            if self._spool.has_entries():
+                await self._replay_spool()
+            return
+
+        try:
+            await asyncio.to_thread(self._spool.append, batch)
+        except OSError as e:
+            # Neither the database nor the spool accepts the entries; log them as a last resort
+            metrics.increment("audit_writer.dropped", len(batch))
+            logger.critical(f"Failed to spool audit log entries to {self._spool.path}: {e}")
+            for entry in batch:
+                logger.critical(f"Dropped audit log entry: {entry}")
+            return
+        metrics.increment("audit_writer.spooled", len(batch))
+        logger.warning(f"Spooled {len(batch)} audit log entries to {self._spool.path}.")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        await self._replay_spool()
+        stopped = False
+        while not stopped:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval_seconds
+            while len(batch) < self.batch_max_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopped = True
+                    break
+                batch.append(item)
+            await self._write_batch(batch)
+            metrics.set_gauge("audit_writer.queue_depth", self._queue.qsize())
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.queue_max_size)
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Writes every queued entry, then stops the background task.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        if not self._task.done():
+            # Waits for room like any producer; the task keeps draining meanwhile
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+        metrics.set_gauge("audit_writer.queue_depth", 0)
+
+
+_audit_log_writer_instance: Optional[AuditLogWriter] = None
+
+def get_audit_log_writer() -> AuditLogWriter:
+    """
+    Returns the process-wide AuditLogWriter.
+    """
+    global _audit_log_writer_instance
+    if _audit_log_writer_instance is None:
+        _audit_log_writer_instance = AuditLogWriter()
+    return _audit_log_writer_instance
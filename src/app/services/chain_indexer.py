@@ -0,0 +1,196 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from web3 import Web3
+
+from src.app.core.blockchain import BlockchainService, get_blockchain_service
+from src.app.core.config import BLOCKCHAIN_CONFIG
+from src.app.core.database import AsyncSessionLocal
+from src.app.core.metrics import metrics
+from src.app.crud import crud_chain_index
+from src.app.models.chain_index import ChainIndexCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint name of the MedicalRecordRegistry index
+REGISTRY_INDEX = "medical_record_registry"
+
+
+class ChainEventIndexer:
+    """
+    Mirrors MedicalRecordRegistry state into record_anchors and record_access_grants.
+
+    Each poll reads the RecordAdded/AccessGranted/AccessRevoked logs of the blocks after
+    the checkpoint (at most `batch_blocks` at a time) and stores them together with the new
+    checkpoint in one transaction, so a restart resumes exactly where it stopped. Before
+    that, the stored hash of the checkpoint block is compared with the chain; if it changed,
+    a reorg replaced it and the index is rewound `reorg_rewind_blocks` blocks and re-read.
+    Deeper reorgs are caught on the following polls, one rewind at a time.
+
+    Every worker may run an indexer: each poll holds a PostgreSQL advisory lock for its
+    transaction, and a poll that does not get it leaves the round to the worker that has it.
+    """
+
+    def __init__(
+        self,
+        blockchain_service_factory: Callable[[], BlockchainService] = get_blockchain_service,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        start_block: int = BLOCKCHAIN_CONFIG["event_indexer_start_block"],
+        batch_blocks: int = BLOCKCHAIN_CONFIG["event_indexer_batch_blocks"],
+        reorg_rewind_blocks: int = BLOCKCHAIN_CONFIG["event_indexer_reorg_rewind_blocks"],
+        poll_interval: float = BLOCKCHAIN_CONFIG["event_indexer_poll_interval_seconds"],
+    ):
+        self._blockchain_service_factory = blockchain_service_factory
+        self._session_factory = session_factory
+        self.start_block = start_block
+        self.batch_blocks = batch_blocks
+        self.reorg_rewind_blocks = reorg_rewind_blocks
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _rewind(self, db: AsyncSession, blockchain_service: BlockchainService, checkpoint: ChainIndexCheckpoint) -> None:
+        target = checkpoint.block_number - self.reorg_rewind_blocks
+        block_hash = None
+        if target >= self.start_block:
+            result = await blockchain_service.get_block_hash(target)
+            if not result.get("success"):
+                raise ConnectionError(result.get("error"))
+            block_hash = result["block_hash"]
+        logger.warning(f"Reorg detected at block {checkpoint.block_number}; rewinding event index to block {target}.")
+        await crud_chain_index.rewind_registry_index_async(db, REGISTRY_INDEX, target, block_hash)
+        # Cached access checks may reflect the abandoned fork
+        blockchain_service.access_cache.clear()
+        metrics.increment("chain_indexer.reorgs")
+
+    async def poll_once(self) -> Optional[int]:
+        """
+        Indexes the next range of blocks. Returns the number of events applied, or None if
+        the index has caught up with the chain head or another worker is indexing.
+        """
+        blockchain_service = self._blockchain_service_factory()
+        head = await blockchain_service.get_block_number()
+        if not head.get("success"):
+            logger.warning(f"Event indexer could not fetch the latest block: {head.get('error')}")
+            return None
+        head_block = head["block_number"]
+
+        async with self._session_factory() as db:
+            if not await crud_chain_index.try_lock_index_async(db, REGISTRY_INDEX):
+                metrics.increment("chain_indexer.lock_skips")
+                return None
+            checkpoint = await crud_chain_index.get_checkpoint_async(db, REGISTRY_INDEX)
+            if checkpoint is not None:
+                current = await blockchain_service.get_block_hash(checkpoint.block_number)
+                if not current.get("success"):
+                    logger.warning(f"Event indexer could not fetch block {checkpoint.block_number}: {current.get('error')}")
+                    return None
+                if current["block_hash"] != checkpoint.block_hash:
+                    await self._rewind(db, blockchain_service, checkpoint)
+                    return 0
+
+            from_block = checkpoint.block_number + 1 if checkpoint is not None else self.start_block
+            if from_block > head_block:
+                await crud_chain_index.update_checkpoint_head_async(db, REGISTRY_INDEX, head_block)
+                metrics.set_gauge("chain_indexer.lag_blocks", 0)
+                return None
+            to_block = min(head_block, from_block + self.batch_blocks - 1)
+
+            result = await blockchain_service.get_registry_events(from_block, to_block)
+            if not result.get("success"):
+                logger.warning(f"Event indexer could not fetch events for blocks {from_block}-{to_block}: {result.get('error')}")
+                return None
+            to_block_hash = await blockchain_service.get_block_hash(to_block)
+            if not to_block_hash.get("success") or to_block_hash["block_hash"] is None:
+                logger.warning(f"Event indexer could not fetch block {to_block}: {to_block_hash.get('error')}")
+                return None
+
+            events = result["events"]
+            await crud_chain_index.apply_registry_events_async(
+                db, REGISTRY_INDEX, events, to_block, to_block_hash["block_hash"], head_block
+            )
+
+        for event in events:
+            if event["event"] != "RecordAdded":
+                blockchain_service.access_cache.invalidate(event["record_hash"], event["doctor_address"])
+        metrics.increment("chain_indexer.events", len(events))
+        metrics.set_gauge("chain_indexer.block", to_block)
+        metrics.set_gauge("chain_indexer.lag_blocks", head_block - to_block)
+        return len(events)
+
+    async def _run(self):
+        while True:
+            try:
+                # Back to back while catching up; sleep once the head is reached
+                while await self.poll_once() is not None:
+                    pass
+            except Exception as e:
+                logger.error(f"Event indexer poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            if self.start_block <= 0:
+                logger.warning(
+                    "Event indexer starts at block 0; set BLOCKCHAIN_EVENT_INDEXER_START_BLOCK to the "
+                    "contract deployment block to skip the blocks before it."
+                )
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_chain_event_indexer_instance: Optional[ChainEventIndexer] = None
+
+def get_chain_event_indexer() -> ChainEventIndexer:
+    """
+    Returns the process-wide ChainEventIndexer.
+    """
+    global _chain_event_indexer_instance
+    if _chain_event_indexer_instance is None:
+        _chain_event_indexer_instance = ChainEventIndexer()
+    return _chain_event_indexer_instance
+
+
+# Read paths: answer from the local index while it is current, otherwise from the chain.
+# Access checks are not served from the index: a grant revoked since the last poll would
+# still be found there. They go through BlockchainService and its AccessCheckCache.
+
+def index_is_current(
+    checkpoint: Optional[ChainIndexCheckpoint],
+    max_lag_blocks: int = BLOCKCHAIN_CONFIG["event_indexer_max_lag_blocks"],
+    max_staleness_seconds: float = BLOCKCHAIN_CONFIG["event_indexer_max_staleness_seconds"],
+) -> bool:
+    """
+    True if the indexer polled recently and was at most `max_lag_blocks` behind the head.
+    """
+    if checkpoint is None:
+        return False
+    updated_at = checkpoint.updated_at
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) - updated_at > timedelta(seconds=max_staleness_seconds):
+        return False
+    return checkpoint.head_block_number - checkpoint.block_number <= max_lag_blocks
+
+
+async def get_record_hashes_for_patient(db: AsyncSession, blockchain_service: BlockchainService, patient_did: str) -> dict:
+    """
+    Same result as BlockchainService.get_record_hashes_for_patient, from the index if it is current.
+    """
+    if index_is_current(await crud_chain_index.get_checkpoint_async(db, REGISTRY_INDEX)):
+        did_hash = Web3.to_hex(Web3.keccak(text=patient_did))
+        hashes = await crud_chain_index.get_record_hashes_by_patient_did_hash_async(db, did_hash)
+        metrics.increment("chain_index.reads")
+        return {'success': True, 'data': {'hashes': hashes}}
+    metrics.increment("chain_index.fallbacks")
+    return await blockchain_service.get_record_hashes_for_patient(patient_did)
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from src.app.core.blockchain import BlockchainService, get_blockchain_service
+from src.app.core.config import BLOCKCHAIN_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class ChainStateRefresher:
+    """
+    Keeps the blockchain service's chain state cache (connectivity, gas price, chain ID)
+    warm, so transactions and reads do not pay for those RPC calls themselves.
+
+    Without it the cache still works, but values are fetched inline whenever they expire.
+    """
+
+    def __init__(
+        self,
+        blockchain_service_factory: Callable[[], BlockchainService] = get_blockchain_service,
+        refresh_interval: float = BLOCKCHAIN_CONFIG["chain_state_refresh_interval_seconds"],
+    ):
+        self._blockchain_service_factory = blockchain_service_factory
+        self.refresh_interval = refresh_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh_once(self) -> bool:
+        result = await self._blockchain_service_factory().refresh_chain_state()
+        if not result.get("success"):
+            logger.warning(f"Could not refresh chain state: {result.get('error')}")
+        return bool(result.get("success"))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.error(f"Chain state refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_chain_state_refresher_instance: Optional[ChainStateRefresher] = None
+
+def get_chain_state_refresher() -> ChainStateRefresher:
+    """
+    Returns the process-wide ChainStateRefresher.
+    """
+    global _chain_state_refresher_instance
+    if _chain_state_refresher_instance is None:
+        _chain_state_refresher_instance = ChainStateRefresher()
+    return _chain_state_refresher_instance
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.blockchain import (
+    BlockchainService,
+    get_blockchain_service,
+    TX_STATUS_CONFIRMED,
+    TX_STATUS_PENDING,
+)
+from src.app.core.config import BLOCKCHAIN_CONFIG
+from src.app.core.database import AsyncSessionLocal
+from src.app.core.metrics import metrics
+from src.app.crud import crud_anchor_batch, crud_audit_log, crud_medical_record
+from src.app.models.medical_record import BlockchainStatus
+
+logger = logging.getLogger(__name__)
+
+# Kinds of transactions the tracker knows how to settle
+TX_KIND_MEDICAL_RECORD = "medical_record"
+TX_KIND_GRANT_ACCESS = "grant_access"
+TX_KIND_REVOKE_ACCESS = "revoke_access"
+TX_KIND_ANCHOR_BATCH = "anchor_batch"
+
+
+@dataclass
+class TrackedTransaction:
+    tx_hash: str
+    kind: str
+    context: dict = field(default_factory=dict)
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+async def _settle_medical_record(
+    db: AsyncSession, blockchain_service: BlockchainService, tracked: TrackedTransaction, status: str
+) -> None:
+    record_status = BlockchainStatus.CONFIRMED if status == TX_STATUS_CONFIRMED else BlockchainStatus.FAILED
+    await crud_medical_record.update_medical_record_blockchain_status_async(
+        db, blockchain_tx_hash=tracked.tx_hash, status=record_status
+    )
+
+
+async def _settle_anchor_batch(
+    db: AsyncSession, blockchain_service: BlockchainService, tracked: TrackedTransaction, status: str
+) -> None:
+    batch_status = BlockchainStatus.CONFIRMED if status == TX_STATUS_CONFIRMED else BlockchainStatus.FAILED
+    await crud_anchor_batch.update_anchor_batch_status_async(
+        db, transaction_hash=tracked.tx_hash, status=batch_status
+    )
+
+
+def _settle_access_change(action_prefix: str):
+    async def settle(
+        db: AsyncSession, blockchain_service: BlockchainService, tracked: TrackedTransaction, status: str
+    ) -> None:
+        context = tracked.context
+        # Checks made while the transaction was being mined may have cached the old state
+        record_hash = context.get("record_hash")
+        if record_hash is None and context.get("record_id") is not None:
+            # Reloaded after a restart, the context has no record hash
+            record = await crud_medical_record.get_medical_record_by_id_async(db, context["record_id"])
+            record_hash = record.data_hash if record is not None else None
+        if record_hash is not None:
+            blockchain_service.access_cache.invalidate(record_hash, context.get("target_address"))
+        if status == TX_STATUS_CONFIRMED:
+            action_type = f"{action_prefix}_SUCCESS"
+            details = {"transaction_hash": tracked.tx_hash}
+        else:
+            action_type = f"{action_prefix}_FAILURE_BLOCKCHAIN"
+            details = {"transaction_hash": tracked.tx_hash, "error": "Transaction failed on blockchain."}
+        await crud_audit_log.create_audit_log_async(
+            db=db,
+            actor_user_id=context["actor_user_id"],
+            owner_user_id=context["owner_user_id"],
+            record_id=context.get("record_id"),
+            action_type=action_type,
+            ip_address=context.get("ip_address"),
+            target_address=context.get("target_address"),
+            details=details,
+            transaction_hash=tracked.tx_hash,
+        )
+    return settle
+
+
+SETTLE_HANDLERS: Dict[str, Callable[[AsyncSession, BlockchainService, TrackedTransaction, str], Awaitable[None]]] = {
+    TX_KIND_MEDICAL_RECORD: _settle_medical_record,
+    TX_KIND_GRANT_ACCESS: _settle_access_change("GRANT_ACCESS"),
+    TX_KIND_REVOKE_ACCESS: _settle_access_change("REVOKE_ACCESS"),
+    TX_KIND_ANCHOR_BATCH: _settle_anchor_batch,
+}
+
+# Audit entries written on submission of a grant/revoke; settled by the entry with the outcome
+PENDING_AUDIT_ACTIONS = {
+    "GRANT_ACCESS_PENDING": TX_KIND_GRANT_ACCESS,
+    "REVOKE_ACCESS_PENDING": TX_KIND_REVOKE_ACCESS,
+}
+
+
+class ReceiptTracker:
+    """
+    Follows transactions submitted in fire-and-track mode and applies their outcome.
+
+    Endpoints register a transaction with `track()` right after submission and return
+    immediately. A background task polls `get_transaction_status` for every tracked hash
+    and, once mined, updates the owning MedicalRecord (blockchain_record_id/status) or
+    writes the final audit entry for grant/revoke requests.
+
+    Everything needed to resume is in the database (PENDING records and batches, and
+    *_PENDING audit entries with their transaction_hash), so `load_pending_records()`
+    picks up transactions left unsettled by a previous process.
+    """
+
+    def __init__(
+        self,
+        blockchain_service_factory: Callable[[], BlockchainService] = get_blockchain_service,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        poll_interval: float = BLOCKCHAIN_CONFIG["receipt_poll_interval_seconds"],
+        timeout: float = BLOCKCHAIN_CONFIG["receipt_timeout_seconds"],
+    ):
+        self._blockchain_service_factory = blockchain_service_factory
+        self._session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._pending: Dict[str, TrackedTransaction] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def track(self, tx_hash: str, kind: str, context: Optional[dict] = None) -> None:
+        """
+        Registers a submitted transaction to be followed up.
+        """
+        if kind not in SETTLE_HANDLERS:
+            raise ValueError(f"Unknown tracked transaction kind: {kind}")
+        self._pending[tx_hash] = TrackedTransaction(tx_hash=tx_hash, kind=kind, context=context or {})
+        metrics.set_gauge("receipt_tracker.pending", len(self._pending))
+
+    async def load_pending_records(self) -> int:
+        """
+        Re-registers medical records, anchor batches and grant/revoke requests left PENDING
+        by a previous process (e.g. after a restart). Returns the number re-registered.
+        """
+        loaded = 0
+        async with self._session_factory() as db:
+            batches = await crud_anchor_batch.get_anchor_batches_pending_on_blockchain_async(db)
+            for batch in batches:
+                if batch.transaction_hash and batch.transaction_hash not in self._pending:
+                    self.track(batch.transaction_hash, TX_KIND_ANCHOR_BATCH, {"batch_id": batch.id})
+                    loaded += 1
+
+            records = await crud_medical_record.get_medical_records_pending_on_blockchain_async(db)
+            for record in records:
+                # Records of a pending batch share its transaction and settle with it
+                if record.anchor_batch_id is None and record.blockchain_tx_hash and record.blockchain_tx_hash not in self._pending:
+                    self.track(record.blockchain_tx_hash, TX_KIND_MEDICAL_RECORD, {"record_id": record.id})
+                    loaded += 1
+
+            entries = await crud_audit_log.get_unsettled_transactions_async(db, list(PENDING_AUDIT_ACTIONS))
+            for entry in entries:
+                if entry.transaction_hash not in self._pending:
+                    self.track(entry.transaction_hash, PENDING_AUDIT_ACTIONS[entry.action_type], {
+                        "actor_user_id": entry.actor_user_id,
+                        "owner_user_id": entry.owner_user_id,
+                        "record_id": entry.record_id,
+                        "ip_address": entry.ip_address,
+                        "target_address": entry.target_address,
+                    })
+                    loaded += 1
+        return loaded
+
+    async def poll_once(self) -> int:
+        """
+        Checks every tracked transaction once. Returns the number of transactions settled.
+        """
+        if not self._pending:
+            return 0
+
+        blockchain_service = self._blockchain_service_factory()
+        settled = 0
+        try:
+            async with self._session_factory() as db:
+                for tx_hash, tracked in list(self._pending.items()):
+                    result = await blockchain_service.get_transaction_status(tx_hash)
+                    if not result.get("success"):
+                        logger.warning(f"Could not fetch receipt for {tx_hash}: {result.get('error')}")
+                        continue
+
+                    status = result.get("status")
+                    if status == TX_STATUS_PENDING:
+                        if time.monotonic() - tracked.submitted_at > self.timeout:
+                            # Leave the row PENDING; it is picked up again by load_pending_records()
+                            logger.warning(f"Transaction {tx_hash} ({tracked.kind}) not mined after {self.timeout}s; no longer tracking.")
+                            metrics.increment("receipt_tracker.timeouts")
+                            del self._pending[tx_hash]
+                        continue
+
+                    try:
+                        await SETTLE_HANDLERS[tracked.kind](db, blockchain_service, tracked, status)
+                    except Exception as e:
+                        await db.rollback()
+                        logger.error(f"Failed to apply outcome of transaction {tx_hash} ({tracked.kind}): {e}")
+                        continue
+
+                    del self._pending[tx_hash]
+                    settled += 1
+                    metrics.increment("receipt_tracker.confirmed" if status == TX_STATUS_CONFIRMED else "receipt_tracker.failed")
+                    metrics.observe("receipt_tracker.confirmation_seconds", time.monotonic() - tracked.submitted_at)
+        finally:
+            metrics.set_gauge("receipt_tracker.pending", len(self._pending))
+        return settled
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Receipt tracker poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_receipt_tracker_instance: Optional[ReceiptTracker] = None
+
+def get_receipt_tracker() -> ReceiptTracker:
+    """
+    Returns the process-wide ReceiptTracker.
+    """
+    global _receipt_tracker_instance
+    if _receipt_tracker_instance is None:
+        _receipt_tracker_instance = ReceiptTracker()
+    return _receipt_tracker_instance
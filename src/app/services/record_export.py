@@ -0,0 +1,178 @@
+import asyncio
+import json
+import uuid
+import zipfile
+from typing import AsyncIterator, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.config import MEDICAL_RECORD_EXPORT_CONFIG
+from src.app.core.encryption import run_in_crypto_pool
+from src.app.core.envelope import DataKeyManager, data_key_manager
+from src.app.core.metrics import metrics
+from src.app.core.pagination import CursorPosition
+from src.app.crud import crud_medical_record
+from src.app.models.medical_record import MedicalRecordDetailResponse
+
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_FORMAT_ZIP = "zip"
+
+
+class _ZipBuffer:
+    """
+    Write-only file for zipfile that hands out the bytes written so far. zipfile writes
+    data descriptors instead of seeking back when the file cannot seek.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class MedicalRecordExporter:
+    """
+    Streams every record of one patient, decrypted, oldest first.
+
+    Records are read `page_size` at a time with one keyset query each, and each page is
+    decrypted on the crypto thread pool in chunks of `decrypt_chunk_size` records. The next
+    page is queried while the current one is being decrypted, so at most two pages are in
+    memory. A record that cannot be decrypted is exported as {"id", "error"} and counted in
+    `failed`; the export goes on.
+
+    Callers check access before exporting: this class does not, and writes no audit entry.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        patient_id: uuid.UUID,
+        manager: DataKeyManager = data_key_manager,
+        page_size: int = MEDICAL_RECORD_EXPORT_CONFIG["page_size"],
+        decrypt_chunk_size: int = MEDICAL_RECORD_EXPORT_CONFIG["decrypt_chunk_size"],
+    ):
+        self.db = db
+        self.patient_id = patient_id
+        self._manager = manager
+        self.page_size = page_size
+        self.decrypt_chunk_size = decrypt_chunk_size
+        self.exported = 0
+        self.failed = 0
+
+    def _decrypt_chunk(self, items: List[tuple]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Decrypts (wrapped_data_key, key_version, encrypted_data, encryption_format) items on
+        a pool thread. Returns (raw_data, None) or (None, error) per item.
+        """
+        results = []
+        for wrapped_data_key, key_version, encrypted_data, encryption_format in items:
+            try:
+                cipher = self._manager.get_cipher(wrapped_data_key, key_version)
+                results.append((cipher.decrypt_record(encrypted_data, encryption_format), None))
+            except ValueError as e:
+                results.append((None, str(e)))
+        return results
+
+    async def _fetch_page(self, after: Optional[CursorPosition]):
+        """
+        Queries one page and submits its decryption. Returns (entries, pending decryption
+        tasks, position of the next page or None).
+        """
+        page = await crud_medical_record.get_medical_records_for_export_async(
+            self.db, self.patient_id, self.page_size, after
+        )
+        entries = [MedicalRecordDetailResponse.model_validate(record).model_dump(mode="json") for record in page]
+        items = [
+            (record.wrapped_data_key, record.key_version, record.encrypted_data, record.encryption_format)
+            for record in page
+        ]
+        next_after = (page[-1].created_at, page[-1].id) if len(page) == self.page_size else None
+        # Only the extracted values are used from here on; keep the session from holding every blob
+        for record in page:
+            self.db.expunge(record)
+        tasks = [
+            asyncio.ensure_future(run_in_crypto_pool(self._decrypt_chunk, items[i:i + self.decrypt_chunk_size]))
+            for i in range(0, len(items), self.decrypt_chunk_size)
+        ]
+        return entries, tasks, next_after
+
+    async def records(self) -> AsyncIterator[dict]:
+        """
+        Yields each record as a MedicalRecordDetailResponse dict (JSON types), or {"id", "error"}.
+        """
+        current = await self._fetch_page(None)
+        following = None
+        try:
+            while current is not None:
+                entries, tasks, after = current
+                # Query the next page while this one is decrypted
+                following = await self._fetch_page(after) if after is not None else None
+                start = 0
+                for task in tasks:
+                    results = await task
+                    for entry, (raw_data, error) in zip(entries[start:start + len(results)], results):
+                        if error is not None:
+                            self.failed += 1
+                            yield {"id": entry["id"], "error": error}
+                        else:
+                            self.exported += 1
+                            entry["raw_data"] = raw_data
+                            yield entry
+                    start += len(results)
+                current, following = following, None
+        finally:
+            # If the consumer stopped early, drop the decryptions nobody will read
+            for page in (current, following):
+                if page is not None:
+                    for task in page[1]:
+                        task.cancel()
+            metrics.increment("record_export.records", self.exported)
+            metrics.increment("record_export.failures", self.failed)
+
+    def summary(self) -> dict:
+        return {"records": self.exported, "failed": self.failed}
+
+    async def ndjson(self) -> AsyncIterator[bytes]:
+        """
+        One JSON record per line, followed by a {"summary": {...}} line.
+        """
+        async for entry in self.records():
+            yield (json.dumps(entry) + "\n").encode("utf-8")
+        yield (json.dumps({"summary": self.summary()}) + "\n").encode("utf-8")
+
+    async def zip(self) -> AsyncIterator[bytes]:
+        """
+        A zip archive with records/<n>_<id>.json per record (or <n>_<id>.error.json) and a
+        summary.json, streamed as it is written. Compression runs on the pool, one page at a time.
+        """
+        buffer = _ZipBuffer()
+        archive = zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED)
+
+        def write(files: List[Tuple[str, str]]) -> bytes:
+            for name, content in files:
+                archive.writestr(name, content)
+            return buffer.drain()
+
+        files: List[Tuple[str, str]] = []
+        number = 0
+        async for entry in self.records():
+            number += 1
+            suffix = ".error.json" if "error" in entry else ".json"
+            files.append((f"records/{number:06d}_{entry['id']}{suffix}", json.dumps(entry, indent=2)))
+            if len(files) >= self.page_size:
+                yield await run_in_crypto_pool(write, files)
+                files = []
+        files.append(("summary.json", json.dumps(self.summary(), indent=2)))
+        data = await run_in_crypto_pool(write, files)
+        archive.close()
+        yield data + buffer.drain()
@@ -0,0 +1,190 @@
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.config import MEDICAL_RECORD_IMPORT_CONFIG
+from src.app.core.encryption import encrypt_and_hash_async
+from src.app.core.envelope import data_key_manager
+from src.app.core.metrics import metrics
+from src.app.crud import crud_medical_record, crud_user
+from src.app.models.medical_record import BlockchainStatus, MedicalRecordImportLine
+from src.app.models.user import User, UserRole
+from src.app.services.anchor_batcher import AnchorBatcher
+
+logger = logging.getLogger(__name__)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Splits a byte stream into (line_number, line) pairs without holding more than one
+    line in memory. Lines longer than `max_line_bytes` are discarded and yielded as None.
+    """
+    buffer = bytearray()
+    line_number = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end == -1:
+                break
+            line_number += 1
+            too_long = oversized or end - start > max_line_bytes
+            yield line_number, None if too_long else bytes(buffer[start:end])
+            oversized = False
+            start = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            oversized = True
+            buffer.clear()
+    if buffer or oversized:
+        yield line_number + 1, None if oversized else bytes(buffer)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors()
+    )
+
+
+class MedicalRecordImporter:
+    """
+    Imports medical records from an NDJSON stream: each line is parsed, hashed and
+    encrypted, and the records are inserted `batch_size` at a time (COPY on PostgreSQL).
+
+    Records are stored QUEUED and anchored later by the AnchorBatcher as Merkle roots,
+    so an import sends no transaction per record. `ndjson` yields one JSON result per
+    input line, in line order, as soon as its batch is inserted: {"line", "id",
+    "data_hash"} or {"line", "error"}; blank lines are skipped. A failing line or batch
+    does not stop the import.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        importer: User,
+        anchor_batcher: AnchorBatcher,
+        batch_size: int = MEDICAL_RECORD_IMPORT_CONFIG["batch_size"],
+        max_line_bytes: int = MEDICAL_RECORD_IMPORT_CONFIG["max_line_bytes"],
+    ):
+        self.db = db
+        self.importer = importer
+        self.anchor_batcher = anchor_batcher
+        self.batch_size = batch_size
+        self.max_line_bytes = max_line_bytes
+        self.lines = 0
+        self.created = 0
+        self.failed = 0
+        # (line number, row or None, error) in input order, so results keep the line order
+        self._batch: List[Tuple[int, Optional[dict], Optional[str]]] = []
+
+    async def _prepare(self, line: bytes) -> dict:
+        """
+        Parses one line into a row for create_medical_records_bulk_async. Raises ValueError.
+        """
+        try:
+            record_in = MedicalRecordImportLine.model_validate_json(line)
+        except ValidationError as e:
+            raise ValueError(_validation_message(e))
+
+        patient_id = record_in.patient_id or self.importer.id
+        if patient_id != self.importer.id and self.importer.role != UserRole.ADMIN:
+            raise ValueError("Only administrators can import records for other patients.")
+
+        record_cipher, wrapped_data_key, key_version = data_key_manager.new_data_key()
+        encrypted_data, data_hash, encryption_format = await encrypt_and_hash_async(
+            record_in.raw_data, record_cipher, record_in.compression
+        )
+        now = datetime.now(timezone.utc)
+        return {
+            "id": uuid.uuid4(),
+            "patient_id": patient_id,
+            "record_type": record_in.record_type,
+            "record_metadata": record_in.record_metadata,
+            "encrypted_data": encrypted_data,
+            "encryption_format": encryption_format,
+            "wrapped_data_key": wrapped_data_key,
+            "key_version": key_version,
+            "data_hash": data_hash,
+            "blockchain_status": BlockchainStatus.QUEUED.value,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    async def _flush(self) -> List[dict]:
+        """
+        Inserts the pending batch and returns the results of its lines.
+        """
+        batch, self._batch = self._batch, []
+        other_patients = {
+            row["patient_id"] for _, row, _ in batch if row is not None and row["patient_id"] != self.importer.id
+        }
+        known_patients = await crud_user.get_patient_ids_async(self.db, other_patients)
+        for i, (line_number, row, error) in enumerate(batch):
+            if row is not None and row["patient_id"] in other_patients and row["patient_id"] not in known_patients:
+                batch[i] = (line_number, None, f"Patient {row['patient_id']} not found.")
+
+        rows = [row for _, row, _ in batch if row is not None]
+        insert_error = None
+        if rows:
+            try:
+                await crud_medical_record.create_medical_records_bulk_async(self.db, rows)
+            except Exception as e:
+                await self.db.rollback()
+                logger.error(f"Bulk insert of {len(rows)} imported records failed: {e}")
+                insert_error = f"Database error: {e}"
+
+        results = []
+        for line_number, row, error in batch:
+            if row is None or insert_error:
+                self.failed += 1
+                results.append({"line": line_number, "error": error or insert_error})
+            else:
+                results.append({"line": line_number, "id": str(row["id"]), "data_hash": row["data_hash"]})
+        if rows and not insert_error:
+            self.created += len(rows)
+            metrics.increment("record_import.records", len(rows))
+            self.anchor_batcher.notify_queued(len(rows))
+        return results
+
+    async def results(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[List[dict]]:
+        """
+        Imports every line of `chunks`, yielding the results of each batch once it is inserted.
+        """
+        async for line_number, line in iter_lines(chunks, self.max_line_bytes):
+            self.lines = line_number
+            row, error = None, None
+            if line is None:
+                error = f"Line is longer than {self.max_line_bytes} bytes."
+            elif not line.strip():
+                continue
+            else:
+                try:
+                    row = await self._prepare(line)
+                except ValueError as e:
+                    error = str(e)
+            self._batch.append((line_number, row, error))
+            if len(self._batch) >= self.batch_size:
+                yield await self._flush()
+        if self._batch:
+            yield await self._flush()
+        if self.failed:
+            metrics.increment("record_import.failures", self.failed)
+
+    def summary(self) -> dict:
+        return {"lines": self.lines, "created": self.created, "failed": self.failed}
+
+    async def ndjson(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        One JSON result per input line, a chunk per batch, followed by a {"summary": {...}} line.
+        """
+        async for results in self.results(chunks):
+            yield "".join(json.dumps(result) + "\n" for result in results).encode("utf-8")
+        yield (json.dumps({"summary": self.summary()}) + "\n").encode("utf-8")
@@ -1,13 +1,15 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 import os
+import tempfile
 from unittest.mock import patch, MagicMock, AsyncMock # Added AsyncMock
 
 from src.app.main import app
-from src.app.core.database import Base, get_db
+from src.app.core.database import Base, get_async_db, get_db
 from src.app.models.user import User
 from src.app.core.blockchain import get_blockchain_service
 
@@ -21,8 +23,10 @@ from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
 from sqlalchemy import TypeDecorator, TEXT, types as sa_types
 import json
 
-# Create in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite://"
+# Create a temporary SQLite database file for testing
+_TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="meditrustal-tests-"), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{_TEST_DB_PATH}"
+SQLALCHEMY_ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{_TEST_DB_PATH}"
 
 # Custom type for SQLite to handle JSONB (stores as TEXT)
 class SQLiteJSONB(TypeDecorator):
@@ -70,6 +74,18 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The API uses AsyncSession (aiosqlite). Both engines must see the same data, so the
+# test database is a temporary file (WAL mode: readers do not block the other engine's writer).
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 @pytest.fixture
 def db_session():
     # Apply workaround for UUID and ENUM if not already handled by specific type decorators for SQLite
@@ -134,6 +150,11 @@ def db_session():
         db.close()
         Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture
+def async_db_engine():
+    """The async engine behind the API's AsyncSession in tests."""
+    return async_engine
+
 @pytest.fixture
 def client(db_session):
     def override_get_db():
@@ -159,8 +180,13 @@ def client(db_session):
             'is_registered': True
         }
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     # Apply mocks
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     
     # Get the service instance and mock its methods
     # This ensures we are mocking the actual instance that will be used by the app
@@ -183,6 +209,7 @@ def client(db_session):
     
     # Clean up: remove dependency overrides
     del app.dependency_overrides[get_db]
+    del app.dependency_overrides[get_async_db]
     # It's also good practice to reset mocks on the singleton if tests might interfere,
     # though pytest fixtures usually provide good isolation for the test client.
     # For instance, if a test modifies service_instance.get_record_hashes_for_patient.return_value,
@@ -1,14 +1,32 @@
 import pytest
 import os
+from unittest.mock import patch
 
+from src.app.core.config import CRYPTO_WORKER_CONFIG, RECORD_ENCRYPTION_CONFIG
 from src.app.core.encryption import (
     generate_encryption_key,
     encrypt_data,
     decrypt_data,
     hash_data,
+    CipherContext,
+    get_cipher_context,
+    encrypt_stream,
+    decrypt_stream,
+    encrypt_record_data,
+    decrypt_record_data,
+    select_encryption_format,
+    ENCRYPTION_FORMAT_AESGCM_COMPRESSED,
+    ENCRYPTION_FORMAT_CHUNKED_COMPRESSED,
+    ENCRYPTION_FORMAT_AESGCM,
+    ENCRYPTION_FORMAT_CHUNKED,
+    STREAM_HEADER_SIZE,
+    decrypt_data_async,
+    encrypt_and_hash_async,
     AES_NONCE_SIZE,
     AES_TAG_SIZE
 )
+from src.app.core.compression import COMPRESSION_NONE, COMPRESSION_ZLIB, frame, unframe
+from src.app.core.metrics import metrics
 
 def test_generate_encryption_key():
     """
@@ -188,3 +206,129 @@ def test_hash_empty_data():
     assert len(hash_val) == 64
     # Known SHA-256 hash for an empty string
     assert hash_val == "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+
+@pytest.mark.asyncio
+async def test_async_crypto_offloads_only_large_payloads():
+    """
+    Payloads at or above the threshold run on the crypto pool, smaller ones inline.
+    """
+    key = generate_encryption_key()
+    metrics.reset()
+    with patch.dict(CRYPTO_WORKER_CONFIG, {"offload_threshold_bytes": 1024}), \
+            patch.dict(RECORD_ENCRYPTION_CONFIG, {"compression": "none"}):
+        small_blob, small_hash, _ = await encrypt_and_hash_async("small", key)
+        assert metrics.get_counter("crypto.offloaded") == 0
+
+        large = "x" * 4096
+        large_blob, large_hash, large_format = await encrypt_and_hash_async(large, key)
+        assert await decrypt_data_async(large_blob, key, large_format) == large
+
+    assert decrypt_data(small_blob, key) == "small"
+    assert small_hash == hash_data("small")
+    assert large_hash == hash_data(large)
+    assert metrics.get_counter("crypto.offloaded") == 3
+    assert metrics.get_summary("crypto_pool.latency_seconds")["count"] == 3
+    assert metrics.get_gauge("crypto_pool.queue_depth") == 0
+
+
+def test_cipher_context_round_trip_and_compatibility():
+    """
+    CipherContext blobs are interchangeable with encrypt_data/decrypt_data ones.
+    """
+    key = generate_encryption_key()
+    context = CipherContext(key)
+    items = ["first", "", "third record"]
+
+    blobs = context.encrypt_many(items)
+    assert context.decrypt_many(blobs) == items
+    assert decrypt_data(blobs[0], key) == "first"
+    assert context.decrypt(encrypt_data("legacy", key)) == "legacy"
+    assert get_cipher_context(key) is get_cipher_context(key)
+
+    with pytest.raises(ValueError, match="Decryption failed"):
+        CipherContext(generate_encryption_key()).decrypt(blobs[0])
+    with pytest.raises(ValueError, match="32 bytes"):
+        CipherContext(b"short")
+
+
+def _split(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("length", [0, 1, 16, 17, 100])
+def test_stream_round_trip_with_arbitrary_chunking(length):
+    """
+    The chunked format decrypts regardless of how input and ciphertext are split.
+    """
+    key = generate_encryption_key()
+    plaintext = os.urandom(length)
+
+    blob = b"".join(encrypt_stream(_split(plaintext, 7) or [b""], key, chunk_size=16))
+    assert blob[0] == ENCRYPTION_FORMAT_CHUNKED
+    assert len(blob) == STREAM_HEADER_SIZE + length + AES_TAG_SIZE * (max(length - 1, 0) // 16 + 1)
+    assert b"".join(decrypt_stream(_split(blob, 5), key)) == plaintext
+
+
+def test_stream_detects_reordered_and_truncated_chunks():
+    key = generate_encryption_key()
+    blob = b"".join(encrypt_stream([b"a" * 40], key, chunk_size=16))
+    header, body = blob[:STREAM_HEADER_SIZE], blob[STREAM_HEADER_SIZE:]
+    sealed = _split(body, 16 + AES_TAG_SIZE)
+
+    with pytest.raises(ValueError, match="Decryption failed"):
+        b"".join(decrypt_stream([header, sealed[1], sealed[0], sealed[2]], key))
+    with pytest.raises(ValueError, match="Decryption failed"):
+        b"".join(decrypt_stream([header, sealed[0], sealed[1]], key))  # Dropped last chunk
+    with pytest.raises(ValueError, match="truncated"):
+        b"".join(decrypt_stream([header[:5]], key))
+
+
+def test_record_data_in_chunked_format():
+    key = generate_encryption_key()
+    blob = encrypt_record_data("large imaging report", key, ENCRYPTION_FORMAT_CHUNKED)
+    assert decrypt_record_data(blob, key, ENCRYPTION_FORMAT_CHUNKED) == "large imaging report"
+    with pytest.raises(ValueError, match="Unknown encryption format"):
+        decrypt_record_data(blob, key, 99)
+
+
+def test_select_encryption_format_uses_chunked_format_above_threshold():
+    with patch.dict(RECORD_ENCRYPTION_CONFIG, {"chunked_threshold_bytes": 1024}):
+        assert select_encryption_format(1023) == ENCRYPTION_FORMAT_AESGCM
+        assert select_encryption_format(1024) == ENCRYPTION_FORMAT_CHUNKED
+
+
+@pytest.mark.parametrize("encryption_format", [ENCRYPTION_FORMAT_AESGCM_COMPRESSED, ENCRYPTION_FORMAT_CHUNKED_COMPRESSED])
+def test_compressed_formats_round_trip_and_shrink_text(encryption_format):
+    key = generate_encryption_key()
+    report = '{"panel": "CBC", "results": [' + ", ".join('{"code": "HGB", "value": 13.9}' for _ in range(200)) + "]}"
+
+    blob = encrypt_record_data(report, key, encryption_format, COMPRESSION_ZLIB)
+    assert len(blob) < len(report) / 5
+    assert decrypt_record_data(blob, key, encryption_format) == report
+
+
+def test_frame_falls_back_to_uncompressed_and_rejects_bad_payloads():
+    data = os.urandom(256)  # Does not compress
+    assert frame(data, COMPRESSION_ZLIB) == bytes([COMPRESSION_NONE]) + data
+    assert unframe(frame(b"abc" * 100, COMPRESSION_ZLIB)) == b"abc" * 100
+
+    with pytest.raises(ValueError, match="truncated"):
+        unframe(frame(b"abc" * 100, COMPRESSION_ZLIB)[:-4])
+    with pytest.raises(ValueError, match="Unsupported compression codec"):
+        unframe(b"\x09data")
+    with pytest.raises(ValueError, match="codec byte"):
+        unframe(b"")
+
+
+async def test_encrypt_and_hash_async_compresses_large_payloads_only():
+    key = generate_encryption_key()
+    with patch.dict(RECORD_ENCRYPTION_CONFIG, {"compression": "zlib", "compression_min_bytes": 1024}):
+        _, _, small_format = await encrypt_and_hash_async("short note", key)
+        blob, data_hash, large_format = await encrypt_and_hash_async("note " * 1000, key)
+        _, _, opted_out_format = await encrypt_and_hash_async("note " * 1000, key, "none")
+
+    assert small_format == opted_out_format == ENCRYPTION_FORMAT_AESGCM
+    assert large_format == ENCRYPTION_FORMAT_AESGCM_COMPRESSED
+    assert data_hash == hash_data("note " * 1000)
+    assert await decrypt_data_async(blob, key, large_format) == "note " * 1000
@@ -0,0 +1,76 @@
+import hashlib
+import pytest
+from unittest.mock import patch
+
+from src.app.core.key_provider import KeyProvider
+from src.app.core.metrics import MetricsRegistry
+
+
+def make_provider(secrets=None, current_version=1):
+    secrets = secrets or {1: "secret-v1", 2: "secret-v2"}
+    registry = MetricsRegistry()
+    provider = KeyProvider(
+        secret_resolver=lambda version: secrets[version],
+        salt=b"test_salt",
+        iterations=1000,
+        current_version=current_version,
+        registry=registry,
+    )
+    return provider, registry
+
+def test_get_key_matches_pbkdf2_derivation():
+    """
+    The cached key must be identical to a direct PBKDF2 derivation.
+    """
+    provider, _ = make_provider()
+    expected = hashlib.pbkdf2_hmac('sha256', b"secret-v1", b"test_salt", 1000)[:32]
+    assert provider.get_key() == expected
+    assert len(provider.get_key()) == 32
+
+def test_key_is_derived_once_per_version():
+    """
+    Repeated calls must not re-run the KDF; each version is derived once.
+    """
+    provider, registry = make_provider()
+    with patch("src.app.core.key_provider.hashlib.pbkdf2_hmac", wraps=hashlib.pbkdf2_hmac) as kdf:
+        for _ in range(5):
+            provider.get_key()
+        provider.get_key(2)
+        provider.get_key(2)
+    assert kdf.call_count == 2
+    assert registry.get_counter("key_provider.cache_misses") == 2
+    assert registry.get_counter("key_provider.cache_hits") == 5
+    assert registry.get_summary("key_provider.derivation_seconds")["count"] == 2
+
+def test_versions_produce_different_keys():
+    provider, _ = make_provider()
+    assert provider.get_key(1) != provider.get_key(2)
+
+def test_invalidate_forces_rederivation_after_rotation():
+    """
+    After rotating the secret behind a version, invalidate() must drop the stale key.
+    """
+    secrets = {1: "old-secret"}
+    provider, _ = make_provider(secrets=secrets)
+    old_key = provider.get_key()
+
+    secrets[1] = "new-secret"
+    assert provider.get_key() == old_key  # Still cached until invalidated
+
+    provider.invalidate(1)
+    new_key = provider.get_key()
+    assert new_key != old_key
+    assert new_key == hashlib.pbkdf2_hmac('sha256', b"new-secret", b"test_salt", 1000)[:32]
+
+def test_invalidate_all_versions():
+    provider, _ = make_provider()
+    provider.get_key(1)
+    provider.get_key(2)
+    assert provider.stats()["cached_versions"] == [1, 2]
+    provider.invalidate()
+    assert provider.stats()["cached_versions"] == []
+
+def test_unknown_version_raises():
+    provider, _ = make_provider()
+    with pytest.raises(KeyError):
+        provider.get_key(3)
@@ -163,3 +163,71 @@ def test_get_my_record_access_history(
     assert str(test_user_for_audit.id) in actor_ids_in_log3_response
     # The actor for Log 4 (another_actor_id) is not explicitly checked here beyond ensuring the log is present.
     # The key is that both logs for test_actor_user_for_audit as owner are returned.
+
+
+def test_my_record_access_history_since_bounds_the_history(
+    client: TestClient, db_session: Session, test_user_for_audit: User, test_actor_user_for_audit: User
+):
+    headers = get_user_token_headers(client, "auditowner", "testpassword")
+
+    recent = crud_create_audit_log(
+        db_session,
+        actor_user_id=test_actor_user_for_audit.id,
+        owner_user_id=test_user_for_audit.id,
+        action_type="VIEW_RECORD_SUCCESS",
+    )
+    old = crud_create_audit_log(
+        db_session,
+        actor_user_id=test_actor_user_for_audit.id,
+        owner_user_id=test_user_for_audit.id,
+        action_type="VIEW_RECORD_SUCCESS",
+    )
+    old.timestamp = datetime.utcnow() - timedelta(days=800)
+    db_session.commit()
+
+    # Without `since` the whole history is returned
+    response = client.get(f"{API_V1_STR}/audit/my-record-access-history", headers=headers)
+    assert response.status_code == 200
+    assert [log["id"] for log in response.json()] == [str(recent.id), str(old.id)]
+
+    since = (datetime.utcnow() - timedelta(days=365)).isoformat()
+    response = client.get(f"{API_V1_STR}/audit/my-record-access-history", headers=headers, params={"since": since})
+    assert response.status_code == 200
+    assert [log["id"] for log in response.json()] == [str(recent.id)]
+
+
+def test_my_record_access_history_cursor_pagination(
+    client: TestClient, db_session: Session, test_user_for_audit: User, test_actor_user_for_audit: User
+):
+    headers = get_user_token_headers(client, "auditowner", "testpassword")
+    created = []
+    for minutes_ago in range(5):
+        log = crud_create_audit_log(
+            db_session,
+            actor_user_id=test_actor_user_for_audit.id,
+            owner_user_id=test_user_for_audit.id,
+            action_type="VIEW_RECORD_SUCCESS",
+        )
+        log.timestamp = datetime.utcnow() - timedelta(minutes=minutes_ago)
+        created.append(log)
+    db_session.commit()
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get(f"{API_V1_STR}/audit/my-record-access-history", headers=headers, params=params)
+        assert response.status_code == 200
+        seen.extend(log["id"] for log in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 2, "cursor": cursor}
+
+    # Newest first, each entry exactly once
+    assert seen == [str(log.id) for log in created]
+
+
+def test_my_record_access_history_rejects_malformed_cursor(client: TestClient, test_user_for_audit: User):
+    headers = get_user_token_headers(client, "auditowner", "testpassword")
+    response = client.get(f"{API_V1_STR}/audit/my-record-access-history", headers=headers, params={"cursor": "bogus"})
+    assert response.status_code == 400
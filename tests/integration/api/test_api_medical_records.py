@@ -1,20 +1,30 @@
+import asyncio
+import json
 import uuid
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock # Added MagicMock
 
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import Session
 
 from src.app.core.config import JWT_CONFIG # For deriving encryption key
-from src.app.core.encryption import encrypt_data, decrypt_data, hash_data
+from src.app.core.metrics import metrics
+from src.app.core.encryption import encrypt_data, decrypt_data, get_cipher_context, hash_data
+from src.app.core.envelope import data_key_manager
 from src.app.core.security_config import get_encryption_key
-from src.app.crud import crud_user, crud_medical_record
+from src.app.crud import crud_anchor_batch, crud_audit_log, crud_user, crud_medical_record
 from src.app.models.user import User
 from src.app.schemas.user import UserCreate, UserRole
 from src.app.models.medical_record import MedicalRecord, MedicalRecordCreate, RecordType, MedicalRecordDetailResponse, MedicalRecordResponse
 from src.app.main import app # To ensure app context for client
 from src.app.core.blockchain import get_blockchain_service # Import for overriding
+from src.app.models.anchor_batch import AnchorBatch
+from src.app.models.audit_log import AuditDataAccessLog
+from src.app.services.anchor_batcher import AnchorBatcher, get_anchor_batcher
+from src.app.services.receipt_tracker import ReceiptTracker, get_receipt_tracker
 
 # Use the same encryption key function as the main application
 TEST_ENCRYPTION_KEY = get_encryption_key()
@@ -152,8 +162,13 @@ def test_create_medical_record_success(
     assert db_record.data_hash == hash_data(raw_data_content)
     assert db_record.blockchain_record_id == "0xmock_tx_hash_success"
     
-    decrypted_db_data = decrypt_data(db_record.encrypted_data, TEST_ENCRYPTION_KEY)
-    assert decrypted_db_data == raw_data_content
+    # Encrypted with its own data key, which only the wrapped key in the row unlocks
+    assert db_record.key_version == data_key_manager.current_version
+    with pytest.raises(ValueError):
+        decrypt_data(db_record.encrypted_data, TEST_ENCRYPTION_KEY)
+    data_key_manager.clear()
+    record_cipher = data_key_manager.get_cipher(db_record.wrapped_data_key, db_record.key_version)
+    assert record_cipher.decrypt(db_record.encrypted_data) == raw_data_content
 
     mock_blockchain_service_instance.add_medical_record_hash.assert_called_once_with(
         record_hash_hex=db_record.data_hash,
@@ -219,6 +234,11 @@ def test_create_medical_record_invalid_input(client: TestClient, authenticated_p
     response = client.post("/api/v1/medical-records/", headers=headers, json=invalid_data_type)
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
+    # Unknown compression codec
+    invalid_compression = {"record_type": RecordType.LAB_RESULT.value, "raw_data": "test", "compression": "lzma"}
+    response = client.post("/api/v1/medical-records/", headers=headers, json=invalid_compression)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
 
 # --- GET /api/v1/medical-records/patient/me ---
 
@@ -405,6 +425,81 @@ def test_get_my_medical_records_scenario5_pagination(client: TestClient, authent
     assert records_response[0]["record_metadata"] == {"index": 1}
 
 
+def test_get_my_medical_records_query_count_is_constant(client: TestClient, authenticated_patient_token, db_session: Session, async_db_engine):
+    """Regression guard for the former N+1 lookup: one query per page, whatever the number of hashes."""
+    user_id = authenticated_patient_token["user_id"]
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+
+    chain_hashes = []
+    for i in range(40):
+        raw_data = f"Bulk record {i}"
+        record = crud_medical_record.create_medical_record(
+            db_session,
+            medical_record_in=MedicalRecordCreate(record_type=RecordType.LAB_RESULT, raw_data=raw_data),
+            patient_id=user_id,
+            encrypted_data=encrypt_data(raw_data, TEST_ENCRYPTION_KEY),
+            data_hash=hash_data(raw_data),
+        )
+        chain_hashes.append("0x" + record.data_hash) # Contract returns 0x-prefixed hashes
+    missing_hash = "0x" + "e" * 64
+    blockchain_service_mock = get_blockchain_service()
+    blockchain_service_mock.get_record_hashes_for_patient.return_value = {
+        "success": True,
+        "data": {"hashes": chain_hashes + [missing_hash]},
+    }
+
+    statements = []
+    def count_medical_record_queries(conn, cursor, statement, parameters, context, executemany):
+        if "FROM medical_records" in statement:
+            statements.append(statement)
+
+    engine = async_db_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", count_medical_record_queries)
+    try:
+        with patch("src.app.api.endpoints.medical_records.logging.warning") as mock_warning:
+            response = client.get("/api/v1/medical-records/patient/me?skip=10&limit=5", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_medical_record_queries)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [r["data_hash"] for r in response.json()] == [h[2:] for h in chain_hashes[10:15]]
+    assert len(statements) == 2 # existence check for the warning + one paginated page query
+    mock_warning.assert_called_once()
+    assert missing_hash in mock_warning.call_args.args[0]
+
+
+def test_list_endpoint_does_not_fetch_encrypted_blobs(client: TestClient, authenticated_patient_token, db_session: Session):
+    user_id = authenticated_patient_token["user_id"]
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    raw_data = "Large imaging report " * 500
+    encrypted_blob = encrypt_data(raw_data, TEST_ENCRYPTION_KEY)
+    record = crud_medical_record.create_medical_record(
+        db_session,
+        medical_record_in=MedicalRecordCreate(record_type=RecordType.IMAGING, raw_data=raw_data),
+        patient_id=user_id,
+        encrypted_data=encrypted_blob,
+        data_hash=hash_data(raw_data),
+    )
+    record_id = record.id
+    db_session.expunge_all() # Drop the blob cached by the create call
+    get_blockchain_service().get_record_hashes_for_patient.return_value = {
+        "success": True, "data": {"hashes": [record.data_hash]}
+    }
+    metrics.reset()
+
+    response = client.get("/api/v1/medical-records/patient/me", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 1
+    assert metrics.get_summary("medical_records.bytes_fetched_per_request")["sum"] == 0
+
+    response = client.get(f"/api/v1/medical-records/{record_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["raw_data"] == raw_data
+    summary = metrics.get_summary("medical_records.bytes_fetched_per_request")
+    assert summary["count"] == 2
+    assert summary["max"] == len(encrypted_blob)
+
+
 # --- GET /api/v1/medical-records/{record_id} ---
 
 # Fixture for a doctor user with a known blockchain address
@@ -558,7 +653,7 @@ def test_get_medical_record_detail_malformed_uuid(client: TestClient, authentica
     response = client.get(f"/api/v1/medical-records/{malformed_id}", headers=headers)
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
-@patch('src.app.api.endpoints.medical_records.decrypt_data')
+@patch('src.app.api.endpoints.medical_records.decrypt_data_async', new_callable=AsyncMock)
 def test_get_medical_record_detail_decryption_failure(
     mock_decrypt_data, client: TestClient, authenticated_patient_token, db_session: Session
 ):
@@ -587,7 +682,8 @@ def test_get_medical_record_detail_decryption_failure(
     response = client.get(f"/api/v1/medical-records/{record_id}", headers=headers)
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert "Failed to decrypt record data" in response.json()["detail"]
-    mock_decrypt_data.assert_called_once_with(encrypted_data_val, TEST_ENCRYPTION_KEY)
+    # Records without a wrapped data key are decrypted with the key-encryption key
+    mock_decrypt_data.assert_awaited_once_with(encrypted_data_val, get_cipher_context(TEST_ENCRYPTION_KEY), 1)
 
 
 # --- Doctor Access Tests for GET /api/v1/medical-records/{record_id} ---
@@ -702,7 +798,7 @@ def test_get_medical_record_detail_doctor_record_no_data_hash(
 
     try:
         # Patch the CRUD function to return this simple mock
-        with patch('src.app.api.endpoints.medical_records.crud_medical_record.get_medical_record_by_id', return_value=mock_record_object):
+        with patch('src.app.api.endpoints.medical_records.crud_medical_record.get_medical_record_by_id_async', AsyncMock(return_value=mock_record_object)):
             doctor_token = authenticated_doctor_token["token"]
             headers = {"Authorization": f"Bearer {doctor_token}"}
             
@@ -974,3 +1070,409 @@ def test_revoke_access_blockchain_service_failure_revert(client: TestClient, cre
     del app.dependency_overrides[get_blockchain_service]
 
 # --- END POST /api/v1/medical-records/{record_id}/revoke-access ---
+
+
+# --- Fire-and-track transaction mode ---
+
+def _tracker_for_engine(async_db_engine, blockchain_service) -> ReceiptTracker:
+    # The tracker opens its own AsyncSessions on the test database
+    return ReceiptTracker(
+        blockchain_service_factory=lambda: blockchain_service,
+        session_factory=async_sessionmaker(async_db_engine, expire_on_commit=False),
+        poll_interval=0,
+        timeout=60,
+    )
+
+def test_create_medical_record_fire_and_track(client: TestClient, authenticated_patient_token, db_session: Session, async_db_engine):
+    mock_bs = AsyncMock()
+    mock_bs.add_medical_record_hash.return_value = {
+        "success": True, "status": "PENDING", "transaction_hash": "0xpending_create_tx"
+    }
+    mock_bs.get_transaction_status.return_value = {
+        "success": True, "status": "CONFIRMED", "transaction_hash": "0xpending_create_tx", "block_number": 12
+    }
+    tracker = _tracker_for_engine(async_db_engine, mock_bs)
+    app.dependency_overrides[get_blockchain_service] = lambda: mock_bs
+    app.dependency_overrides[get_receipt_tracker] = lambda: tracker
+
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    payload = {"record_type": RecordType.LAB_RESULT.value, "raw_data": "Fire and track record"}
+    response = client.post("/api/v1/medical-records/", headers=headers, json=payload)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    created = response.json()
+    assert created["blockchain_status"] == "PENDING"
+    assert created["blockchain_record_id"] is None
+    assert tracker.pending_count == 1
+
+    # Receipt arrives later; the tracker fills in the blockchain id
+    assert asyncio.run(tracker.poll_once()) == 1
+    db_record = crud_medical_record.get_medical_record_by_id(db_session, record_id=uuid.UUID(created["id"]))
+    assert db_record.blockchain_status == "CONFIRMED"
+    assert db_record.blockchain_record_id == "0xpending_create_tx"
+    assert tracker.pending_count == 0
+
+    del app.dependency_overrides[get_blockchain_service]
+    del app.dependency_overrides[get_receipt_tracker]
+
+
+def test_grant_access_fire_and_track(client: TestClient, created_record_for_access_tests, db_session: Session, async_db_engine):
+    record_id = created_record_for_access_tests["id"]
+    headers = {"Authorization": f"Bearer {created_record_for_access_tests['owner_token']}"}
+
+    mock_bs = AsyncMock()
+    mock_bs.grant_record_access.return_value = {
+        "success": True, "status": "PENDING", "transaction_hash": "0xpending_grant_tx"
+    }
+    mock_bs.get_transaction_status.return_value = {
+        "success": True, "status": "CONFIRMED", "transaction_hash": "0xpending_grant_tx", "block_number": 13
+    }
+    tracker = _tracker_for_engine(async_db_engine, mock_bs)
+    app.dependency_overrides[get_blockchain_service] = lambda: mock_bs
+    app.dependency_overrides[get_receipt_tracker] = lambda: tracker
+
+    response = client.post(
+        f"/api/v1/medical-records/{record_id}/grant-access", headers=headers, json={"doctor_address": VALID_DOCTOR_ADDRESS}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "PENDING"
+    actions = [log.action_type for log in db_session.query(AuditDataAccessLog).filter(AuditDataAccessLog.record_id == record_id)]
+    assert actions == ["GRANT_ACCESS_PENDING"]
+
+    asyncio.run(tracker.poll_once())
+    actions = {log.action_type for log in db_session.query(AuditDataAccessLog).filter(AuditDataAccessLog.record_id == record_id)}
+    assert actions == {"GRANT_ACCESS_PENDING", "GRANT_ACCESS_SUCCESS"}
+
+    del app.dependency_overrides[get_blockchain_service]
+    del app.dependency_overrides[get_receipt_tracker]
+
+
+def test_receipt_tracker_reloads_pending_access_changes(client: TestClient, created_record_for_access_tests, db_session: Session, async_db_engine):
+    record_id = created_record_for_access_tests["id"]
+    owner_id = created_record_for_access_tests["owner_id"]
+    log_entry = dict(actor_user_id=owner_id, owner_user_id=owner_id, record_id=record_id, target_address=VALID_DOCTOR_ADDRESS)
+    # Submitted before a restart: one grant still unsettled, one revoke already settled
+    crud_audit_log.create_audit_log(db_session, action_type="GRANT_ACCESS_PENDING", transaction_hash="0xgrant_before_restart", **log_entry)
+    crud_audit_log.create_audit_log(db_session, action_type="REVOKE_ACCESS_PENDING", transaction_hash="0xrevoke_before_restart", **log_entry)
+    crud_audit_log.create_audit_log(db_session, action_type="REVOKE_ACCESS_SUCCESS", transaction_hash="0xrevoke_before_restart", **log_entry)
+
+    mock_bs = AsyncMock()
+    mock_bs.get_transaction_status.return_value = {"success": True, "status": "CONFIRMED", "block_number": 14}
+    tracker = _tracker_for_engine(async_db_engine, mock_bs)
+
+    assert asyncio.run(tracker.load_pending_records()) == 1
+    assert asyncio.run(tracker.poll_once()) == 1
+
+    mock_bs.get_transaction_status.assert_awaited_once_with("0xgrant_before_restart")
+    settled = db_session.query(AuditDataAccessLog).filter(AuditDataAccessLog.action_type == "GRANT_ACCESS_SUCCESS").one()
+    assert settled.transaction_hash == "0xgrant_before_restart"
+    assert settled.target_address == VALID_DOCTOR_ADDRESS
+
+
+# --- Batched Merkle anchoring ---
+
+def _batcher_for_engine(async_db_engine, blockchain_service, tracker=None):
+    return AnchorBatcher(
+        blockchain_service_factory=lambda: blockchain_service,
+        session_factory=async_sessionmaker(async_db_engine, expire_on_commit=False),
+        receipt_tracker_factory=lambda: tracker,
+        max_batch_size=10,
+    )
+
+
+def test_create_medical_records_batched_anchoring(client: TestClient, authenticated_patient_token, db_session: Session, async_db_engine):
+    mock_bs = AsyncMock()
+    mock_bs.anchor_merkle_root.return_value = {
+        "success": True, "status": "CONFIRMED", "transaction_hash": "0xbatch_tx"
+    }
+    mock_bs.verify_batched_record.return_value = {"success": True, "verified": True}
+    batcher = _batcher_for_engine(async_db_engine, mock_bs)
+    app.dependency_overrides[get_blockchain_service] = lambda: mock_bs
+    app.dependency_overrides[get_anchor_batcher] = lambda: batcher
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+
+    with patch.dict("src.app.core.config.BLOCKCHAIN_CONFIG", {"anchoring_mode": "batched"}):
+        created = []
+        for i in range(3):
+            payload = {"record_type": RecordType.LAB_RESULT.value, "raw_data": f"Batched record {i}"}
+            response = client.post("/api/v1/medical-records/", headers=headers, json=payload)
+            assert response.status_code == status.HTTP_201_CREATED
+            assert response.json()["blockchain_status"] == "QUEUED"
+            created.append(response.json())
+
+    mock_bs.add_medical_record_hash.assert_not_called()
+
+    batch = asyncio.run(batcher.flush())
+    assert batch.leaf_count == 3
+    mock_bs.anchor_merkle_root.assert_awaited_once_with(batch.merkle_root, 3)
+
+    for record in created:
+        response = client.get(f"/api/v1/medical-records/{record['id']}/inclusion-proof", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        proof = response.json()
+        assert proof["merkle_root"] == batch.merkle_root
+        assert proof["batch_status"] == "CONFIRMED"
+        assert proof["verified"] is True
+        mock_bs.verify_batched_record.assert_awaited_with(record["data_hash"], proof["proof"], batch.merkle_root)
+
+    # Batch-anchored records are listed even though the chain has no per-patient entry for them
+    mock_bs.get_record_hashes_for_patient.return_value = {"success": True, "data": {"hashes": ["0xunrelated"]}}
+    response = client.get("/api/v1/medical-records/patient/me", headers=headers)
+    assert {r["id"] for r in response.json()} == {r["id"] for r in created}
+
+    del app.dependency_overrides[get_blockchain_service]
+    del app.dependency_overrides[get_anchor_batcher]
+
+
+def _queue_batched_records(client: TestClient, headers, mock_bs, count):
+    app.dependency_overrides[get_blockchain_service] = lambda: mock_bs
+    with patch.dict("src.app.core.config.BLOCKCHAIN_CONFIG", {"anchoring_mode": "batched"}):
+        for i in range(count):
+            payload = {"record_type": RecordType.LAB_RESULT.value, "raw_data": f"Queued record {i}"}
+            assert client.post("/api/v1/medical-records/", headers=headers, json=payload).status_code == status.HTTP_201_CREATED
+    del app.dependency_overrides[get_blockchain_service]
+
+
+def _record_statuses(db_session: Session):
+    db_session.expire_all()
+    return [(record.blockchain_status, record.anchor_batch_id) for record in db_session.query(MedicalRecord)]
+
+
+def test_anchor_batch_claims_records_once(client: TestClient, authenticated_patient_token, db_session: Session, async_db_engine):
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    mock_bs = AsyncMock()
+    _queue_batched_records(client, headers, mock_bs, 3)
+    session_factory = async_sessionmaker(async_db_engine, expire_on_commit=False)
+
+    async def claim_twice():
+        async with session_factory() as db:
+            first = await crud_anchor_batch.claim_anchor_batch_async(db, limit=2)
+            second = await crud_anchor_batch.claim_anchor_batch_async(db, limit=2)
+            third = await crud_anchor_batch.claim_anchor_batch_async(db, limit=2)
+            return first, second, third
+
+    first, second, third = asyncio.run(claim_twice())
+    assert (first.leaf_count, second.leaf_count, third) == (2, 1, None)
+    statuses = _record_statuses(db_session)
+    assert {status_ for status_, _ in statuses} == {"SUBMITTING"}
+    assert sorted(str(batch_id) for _, batch_id in statuses) == sorted([str(first.id)] * 2 + [str(second.id)])
+
+
+def test_anchor_batch_of_same_payloads_joins_existing_batch(client: TestClient, authenticated_patient_token, db_session: Session, async_db_engine):
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    mock_bs = AsyncMock()
+    mock_bs.anchor_merkle_root.return_value = {"success": True, "status": "CONFIRMED", "transaction_hash": "0xfirst"}
+    batcher = _batcher_for_engine(async_db_engine, mock_bs)
+    _queue_batched_records(client, headers, mock_bs, 2)
+    first = asyncio.run(batcher.flush())
+
+    # The same payloads again have the same hashes, so they form the same Merkle root
+    _queue_batched_records(client, headers, mock_bs, 2)
+    assert asyncio.run(batcher.flush()) is None
+
+    mock_bs.anchor_merkle_root.assert_awaited_once()
+    assert db_session.query(AnchorBatch).count() == 1
+    assert _record_statuses(db_session) == [("CONFIRMED", first.id)] * 4
+    assert {record.blockchain_tx_hash for record in db_session.query(MedicalRecord)} == {"0xfirst"}
+
+
+def test_anchor_batch_not_sent_is_requeued(client: TestClient, authenticated_patient_token, db_session: Session, async_db_engine):
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    mock_bs = AsyncMock()
+    mock_bs.anchor_merkle_root.return_value = {"success": False, "error": "node down"}
+    mock_bs.get_batch_anchor.return_value = {"success": True, "anchored": False, "leaf_count": 0}
+    _queue_batched_records(client, headers, mock_bs, 2)
+    batcher = _batcher_for_engine(async_db_engine, mock_bs)
+
+    assert asyncio.run(batcher.flush()) is None
+    assert _record_statuses(db_session) == [("QUEUED", None)] * 2
+    assert db_session.query(AnchorBatch).count() == 0
+
+    # The next flush batches the same records again
+    mock_bs.anchor_merkle_root.return_value = {"success": True, "status": "CONFIRMED", "transaction_hash": "0xretry"}
+    assert asyncio.run(batcher.flush()).leaf_count == 2
+    assert {status_ for status_, _ in _record_statuses(db_session)} == {"CONFIRMED"}
+
+
+def test_anchor_batch_sent_despite_error_is_confirmed(client: TestClient, authenticated_patient_token, db_session: Session, async_db_engine):
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    mock_bs = AsyncMock()
+    mock_bs.anchor_merkle_root.return_value = {"success": False, "error": "receipt timeout"}
+    mock_bs.get_batch_anchor.return_value = {"success": True, "anchored": True, "leaf_count": 2}
+    _queue_batched_records(client, headers, mock_bs, 2)
+
+    assert asyncio.run(_batcher_for_engine(async_db_engine, mock_bs).flush()) is None
+    assert {status_ for status_, _ in _record_statuses(db_session)} == {"CONFIRMED"}
+    assert db_session.query(AnchorBatch).one().status == "CONFIRMED"
+
+
+def test_anchor_batch_left_submitting_is_recovered(client: TestClient, authenticated_patient_token, db_session: Session, async_db_engine):
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    mock_bs = AsyncMock()
+    mock_bs.anchor_merkle_root.return_value = {"success": False, "error": "connection reset"}
+    mock_bs.get_batch_anchor.return_value = {"success": False, "error": "node down"}
+    _queue_batched_records(client, headers, mock_bs, 2)
+    batcher = _batcher_for_engine(async_db_engine, mock_bs)
+
+    assert asyncio.run(batcher.flush()) is None
+    assert {status_ for status_, _ in _record_statuses(db_session)} == {"SUBMITTING"}
+    assert asyncio.run(batcher.recover_stale_batches()) == 0
+
+    batcher.submit_timeout_seconds = -60
+    mock_bs.get_batch_anchor.return_value = {"success": True, "anchored": False, "leaf_count": 0}
+    assert asyncio.run(batcher.recover_stale_batches()) == 1
+    assert _record_statuses(db_session) == [("QUEUED", None)] * 2
+
+
+def test_failed_anchor_batch_is_requeued(client: TestClient, authenticated_patient_token, db_session: Session, async_db_engine):
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    mock_bs = AsyncMock()
+    mock_bs.anchor_merkle_root.return_value = {"success": True, "status": "PENDING", "transaction_hash": "0xreverted"}
+    mock_bs.get_transaction_status.return_value = {"success": True, "status": "FAILED", "error": "reverted"}
+    _queue_batched_records(client, headers, mock_bs, 2)
+    tracker = _tracker_for_engine(async_db_engine, mock_bs)
+
+    assert asyncio.run(_batcher_for_engine(async_db_engine, mock_bs, tracker).flush()).leaf_count == 2
+    assert {status_ for status_, _ in _record_statuses(db_session)} == {"PENDING"}
+
+    assert asyncio.run(tracker.poll_once()) == 1
+    assert _record_statuses(db_session) == [("QUEUED", None)] * 2
+    assert db_session.query(AnchorBatch).count() == 0
+
+
+def test_inclusion_proof_not_available_for_per_record_anchoring(client: TestClient, created_record_for_access_tests):
+    headers = {"Authorization": f"Bearer {created_record_for_access_tests['owner_token']}"}
+    response = client.get(
+        f"/api/v1/medical-records/{created_record_for_access_tests['id']}/inclusion-proof", headers=headers
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_bulk_check_access(client: TestClient, created_record_for_access_tests):
+    headers = {"Authorization": f"Bearer {created_record_for_access_tests['owner_token']}"}
+    record_id = created_record_for_access_tests["id"]
+    missing_id = uuid.uuid4()
+
+    mock_bs = AsyncMock()
+    mock_bs.check_record_access_many.return_value = {
+        "success": True, "results": [{"success": True, "has_access": True}]
+    }
+    app.dependency_overrides[get_blockchain_service] = lambda: mock_bs
+    try:
+        response = client.post(
+            "/api/v1/medical-records/check-access",
+            headers=headers,
+            json={"record_ids": [str(missing_id), str(record_id)], "accessor_address": VALID_DOCTOR_ADDRESS},
+        )
+    finally:
+        del app.dependency_overrides[get_blockchain_service]
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["results"]
+    assert results[0] == {"record_id": str(missing_id), "has_access": None, "error": "Medical record not found"}
+    assert results[1] == {"record_id": str(record_id), "has_access": True, "error": None}
+    mock_bs.check_record_access_many.assert_awaited_once_with(
+        [(created_record_for_access_tests["data_hash"], VALID_DOCTOR_ADDRESS)]
+    )
+
+
+def test_bulk_check_access_invalid_address(client: TestClient, created_record_for_access_tests):
+    headers = {"Authorization": f"Bearer {created_record_for_access_tests['owner_token']}"}
+    response = client.post(
+        "/api/v1/medical-records/check-access",
+        headers=headers,
+        json={"record_ids": [str(created_record_for_access_tests["id"])], "accessor_address": INVALID_DOCTOR_ADDRESS},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_bulk_import_medical_records(client: TestClient, authenticated_patient_token, db_session: Session):
+    batcher = MagicMock()
+    app.dependency_overrides[get_anchor_batcher] = lambda: batcher
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}", "Content-Type": "application/x-ndjson"}
+    body = "\n".join([
+        '{"record_type": "LAB_RESULT", "raw_data": "Imported record 1", "record_metadata": {"source": "legacy"}}',
+        '{"record_type": "UNKNOWN", "raw_data": "Bad type"}',
+        "",
+        f'{{"record_type": "DIAGNOSIS", "raw_data": "Other patient", "patient_id": "{uuid.uuid4()}"}}',
+        '{"record_type": "DIAGNOSIS", "raw_data": "Imported record 2"}',
+    ])
+    try:
+        response = client.post("/api/v1/medical-records/import", headers=headers, content=body)
+    finally:
+        del app.dependency_overrides[get_anchor_batcher]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r.get("line") for r in results[:-1]] == [1, 2, 4, 5]
+    assert results[0]["data_hash"] == hash_data("Imported record 1")
+    assert "record_type" in results[1]["error"]
+    assert "Only administrators" in results[2]["error"]
+    assert results[-1] == {"summary": {"lines": 5, "created": 2, "failed": 2}}
+    batcher.notify_queued.assert_called_once_with(2)
+
+    imported = crud_medical_record.get_medical_record_by_id(db_session, uuid.UUID(results[3]["id"]), load_encrypted_data=True)
+    assert str(imported.patient_id) == str(authenticated_patient_token["user_id"])
+    assert imported.blockchain_status == "QUEUED"
+    record_cipher = data_key_manager.get_cipher(imported.wrapped_data_key, imported.key_version)
+    assert record_cipher.decrypt(imported.encrypted_data) == "Imported record 2"
+
+    imports = db_session.query(AuditDataAccessLog).filter(AuditDataAccessLog.action_type.startswith("IMPORT_RECORDS")).all()
+    assert [log.action_type for log in imports] == ["IMPORT_RECORDS_SUCCESS"]
+    assert imports[0].details == {"lines": 5, "created": 2, "failed": 2}
+
+
+def test_export_medical_records_ndjson(client: TestClient, authenticated_patient_token, db_session: Session):
+    user_id = authenticated_patient_token["user_id"]
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    contents = ["Export note 1", "Export note 2 " * 200, "Export note 3"]
+    record_ids = []
+    for content in contents:
+        cipher, wrapped_data_key, key_version = data_key_manager.new_data_key()
+        record = crud_medical_record.create_medical_record(
+            db_session,
+            medical_record_in=MedicalRecordCreate(record_type=RecordType.DIAGNOSIS, raw_data=content),
+            patient_id=user_id,
+            encrypted_data=cipher.encrypt(content),
+            data_hash=hash_data(content),
+            wrapped_data_key=wrapped_data_key,
+            key_version=key_version,
+        )
+        record_ids.append(str(record.id))
+    # A record whose blob was damaged is reported, not fatal
+    broken = crud_medical_record.get_medical_record_by_id(db_session, uuid.UUID(record_ids[1]), load_encrypted_data=True)
+    broken.encrypted_data = broken.encrypted_data[:-1] + bytes([broken.encrypted_data[-1] ^ 1])
+    db_session.commit()
+
+    response = client.get("/api/v1/medical-records/export", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    exported = {line["id"]: line for line in lines[:-1]}
+    assert set(exported) == set(record_ids)
+    assert exported[record_ids[0]]["raw_data"] == "Export note 1"
+    assert exported[record_ids[0]]["record_type"] == RecordType.DIAGNOSIS.value
+    assert set(exported[record_ids[1]]) == {"id", "error"}
+    assert exported[record_ids[2]]["raw_data"] == "Export note 3"
+    assert lines[-1] == {"summary": {"records": 2, "failed": 1}}
+
+    logs = db_session.query(AuditDataAccessLog).filter(AuditDataAccessLog.owner_user_id == user_id).all()
+    exports = [log for log in logs if log.action_type.startswith("EXPORT_RECORDS")]
+    assert len(exports) == 1
+    assert exports[0].action_type == "EXPORT_RECORDS_SUCCESS"
+    assert exports[0].details == {"format": "ndjson", "records": 2, "failed": 1}
+
+
+def test_export_medical_records_other_patient_forbidden(client: TestClient, authenticated_patient_token):
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    response = client.get(f"/api/v1/medical-records/export?patient_id={uuid.uuid4()}", headers=headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_export_medical_records_invalid_format(client: TestClient, authenticated_patient_token):
+    headers = {"Authorization": f"Bearer {authenticated_patient_token['token']}"}
+    response = client.get("/api/v1/medical-records/export?format=csv", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
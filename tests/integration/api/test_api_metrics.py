@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from src.app.core.config import API_V1_STR
+from src.app.crud.crud_user import create_user
+from src.app.schemas.user import UserCreate
+
+
+def get_token_headers(client: TestClient, db_session: Session, username: str, role: str) -> dict:
+    user_in = UserCreate(
+        email=f"{username}@example.com", username=username, password="testpassword", full_name=username, role=role
+    )
+    create_user(db=db_session, user_in=user_in, did=f"did:example:{username}")
+    response = client.post(f"{API_V1_STR}/auth/login", data={"username": username, "password": "testpassword"})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_metrics_require_authentication(client: TestClient):
+    assert client.get(f"{API_V1_STR}/metrics/").status_code == 401
+
+
+def test_metrics_are_only_served_to_admins(client: TestClient, db_session: Session):
+    patient_headers = get_token_headers(client, db_session, "metricspatient", "PATIENT")
+    assert client.get(f"{API_V1_STR}/metrics/", headers=patient_headers).status_code == 403
+
+    admin_headers = get_token_headers(client, db_session, "metricsadmin", "ADMIN")
+    response = client.get(f"{API_V1_STR}/metrics/", headers=admin_headers)
+    assert response.status_code == 200
+    assert isinstance(response.json(), dict)
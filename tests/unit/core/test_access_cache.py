@@ -0,0 +1,70 @@
+from src.app.core.access_cache import AccessCheckCache
+
+RECORD_HASH = "0x" + "a" * 64
+DOCTOR = "0xDoctor0000000000000000000000000000000001"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = AccessCheckCache(max_entries=10, ttl_seconds=30, clock=clock)
+    cache.set(RECORD_HASH, DOCTOR, True)
+
+    clock.now = 29
+    assert cache.get(RECORD_HASH, DOCTOR) is True
+    clock.now = 30
+    assert cache.get(RECORD_HASH, DOCTOR) is None
+
+
+def test_key_ignores_hash_prefix_and_address_case():
+    cache = AccessCheckCache(max_entries=10, ttl_seconds=30)
+    cache.set(RECORD_HASH, DOCTOR, False)
+    assert cache.get(RECORD_HASH[2:].upper(), DOCTOR.lower()) is False
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AccessCheckCache(max_entries=2, ttl_seconds=30)
+    cache.set(RECORD_HASH, "0xa", True)
+    cache.set(RECORD_HASH, "0xb", True)
+    cache.get(RECORD_HASH, "0xa")
+    cache.set(RECORD_HASH, "0xc", True)
+
+    assert cache.get(RECORD_HASH, "0xb") is None
+    assert cache.get(RECORD_HASH, "0xa") is True
+    assert cache.get(RECORD_HASH, "0xc") is True
+
+
+def test_invalidate_single_entry_or_whole_record():
+    cache = AccessCheckCache(max_entries=10, ttl_seconds=30)
+    other_hash = "0x" + "b" * 64
+    cache.set(RECORD_HASH, "0xa", True)
+    cache.set(RECORD_HASH, "0xb", True)
+    cache.set(other_hash, "0xa", True)
+
+    assert cache.invalidate(RECORD_HASH, "0xA") == 1
+    assert cache.get(RECORD_HASH, "0xa") is None
+    assert cache.invalidate(RECORD_HASH) == 1
+    assert cache.get(other_hash, "0xa") is True
+
+
+def test_stats_report_hit_rate():
+    cache = AccessCheckCache(max_entries=10, ttl_seconds=30)
+    cache.get(RECORD_HASH, DOCTOR)
+    cache.set(RECORD_HASH, DOCTOR, True)
+    cache.get(RECORD_HASH, DOCTOR)
+    cache.get(RECORD_HASH, DOCTOR)
+
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "size": 1}
+
+
+def test_zero_ttl_disables_cache():
+    cache = AccessCheckCache(max_entries=10, ttl_seconds=0)
+    cache.set(RECORD_HASH, DOCTOR, True)
+    assert cache.get(RECORD_HASH, DOCTOR) is None
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 import os
 
 from src.app.core.blockchain import BlockchainService, get_blockchain_service
@@ -594,3 +594,341 @@ async def test_check_record_access_test_mode(mock_web3_and_contracts):
     assert result_no_access['has_access'] is False
     
     blockchain_module._blockchain_service_instance = None # Clean up global instance
+
+
+async def _awaitable(value):
+    return value
+
+
+@pytest.fixture
+def async_backend_service(mock_web3_and_contracts):
+    """
+    Reuses the mocked service but swaps in an AsyncWeb3-like w3 whose RPC methods are coroutines.
+    """
+    service, _, _, mock_medical_record_contract, mock_tx_receipt = mock_web3_and_contracts
+    async_w3 = MagicMock()
+    async_w3.is_connected = AsyncMock(return_value=True)
+    # AsyncEth.gas_price is a property returning a coroutine; build a fresh one per access
+    type(async_w3.eth).gas_price = PropertyMock(side_effect=lambda: _awaitable(10**9))
+    async_w3.eth.get_transaction_count = AsyncMock(return_value=1)
+    async_w3.eth.account.sign_transaction.return_value = MagicMock(raw_transaction=b"raw_tx_bytes")
+    async_w3.eth.send_raw_transaction = AsyncMock(return_value=b"tx_hash_bytes")
+    async_w3.eth.wait_for_transaction_receipt = AsyncMock(return_value=mock_tx_receipt)
+    async_w3.is_address.return_value = True
+    mock_tx_receipt.status = 1
+
+    service.w3 = async_w3
+    service.is_async = True
+    service._http_session = MagicMock(closed=False) # Pretend the pooled session already exists
+    yield service, async_w3, mock_medical_record_contract
+
+
+@pytest.mark.asyncio
+async def test_async_backend_add_medical_record_hash(async_backend_service):
+    service, async_w3, mock_medical_record_contract = async_backend_service
+    mock_medical_record_contract.functions.addRecord.return_value.build_transaction = AsyncMock(return_value={})
+
+    result = await service.add_medical_record_hash("0x" + "a" * 64, "did:example:async", "DIAGNOSIS")
+
+    assert result['success'] is True
+    assert result['transaction_hash'] == "0xmockedtransactionhash"
+    async_w3.is_connected.assert_awaited_once()
+    async_w3.eth.send_raw_transaction.assert_awaited_once()
+    async_w3.eth.wait_for_transaction_receipt.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_async_backend_check_record_access(async_backend_service):
+    service, _, mock_medical_record_contract = async_backend_service
+    mock_medical_record_contract.functions.checkAccess.return_value.call = AsyncMock(return_value=True)
+
+    result = await service.check_record_access("0x" + "b" * 64, "0xAccessorHasAccess0000000000000000000000")
+
+    assert result['success'] is True
+    assert result['has_access'] is True
+    mock_medical_record_contract.functions.checkAccess.return_value.call.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_async_provider_mode_builds_async_web3():
+    from web3 import AsyncWeb3
+    with patch.dict(BLOCKCHAIN_CONFIG, {
+        "sender_private_key": "0x1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef",
+        "user_registry_address": None,
+        "medical_record_registry_address": None,
+    }):
+        service = BlockchainService(provider_mode="async")
+
+    assert service.is_async is True
+    assert isinstance(service.w3, AsyncWeb3)
+
+    await service._ensure_http_session()
+    session = service._http_session
+    assert session is not None and not session.closed
+    await service._ensure_http_session()
+    assert service._http_session is session # Session is pooled, not recreated per call
+
+    await service.close()
+    assert session.closed
+
+
+def test_unknown_provider_mode_raises():
+    with pytest.raises(ValueError):
+        BlockchainService(provider_mode="websocket")
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_uses_local_nonces(mock_web3_and_contracts):
+    service, mock_w3, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    mock_w3.eth.get_transaction_count.return_value = 5
+    build_tx = mock_medical_record_contract.functions.addRecord.return_value.build_transaction
+
+    await service.add_medical_record_hash("0x" + "a" * 64, "did:example:1", "DIAGNOSIS")
+    await service.add_medical_record_hash("0x" + "b" * 64, "did:example:1", "DIAGNOSIS")
+
+    used_nonces = [c.args[0]['nonce'] for c in build_tx.call_args_list]
+    assert used_nonces == [5, 6]
+    mock_w3.eth.get_transaction_count.assert_called_once_with(service.account, 'pending')
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_resyncs_on_nonce_too_low(mock_web3_and_contracts):
+    service, mock_w3, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    mock_w3.eth.get_transaction_count.side_effect = [1, 4]
+    mock_w3.eth.send_raw_transaction.side_effect = [ValueError("nonce too low"), b"tx_hash_bytes"]
+    build_tx = mock_medical_record_contract.functions.addRecord.return_value.build_transaction
+
+    result = await service.add_medical_record_hash("0x" + "c" * 64, "did:example:2", "LAB_RESULT")
+
+    assert result['success'] is True
+    assert [c.args[0]['nonce'] for c in build_tx.call_args_list] == [1, 4]
+    assert mock_w3.eth.send_raw_transaction.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_already_known_is_not_resent(mock_web3_and_contracts):
+    from src.app.core import blockchain as blockchain_module
+    service, mock_w3, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    mock_w3.eth.get_transaction_count.return_value = 2
+    mock_w3.eth.account.sign_transaction.return_value = MagicMock(raw_transaction=b"raw", hash=b"signed_tx_hash")
+    mock_w3.eth.send_raw_transaction.side_effect = [ValueError("already known"), b"next_tx_hash"]
+    build_tx = mock_medical_record_contract.functions.addRecord.return_value.build_transaction
+
+    first = await service.add_medical_record_hash("0x" + "f" * 64, "did:example:4", "DIAGNOSIS", wait_for_receipt=False)
+    await service.add_medical_record_hash("0x" + "1" * 64, "did:example:4", "DIAGNOSIS", wait_for_receipt=False)
+
+    assert first['success'] is True
+    blockchain_module.Web3.to_hex.assert_any_call(b"signed_tx_hash")
+    # The first transaction kept its nonce and was not rebuilt with another one
+    assert [c.args[0]['nonce'] for c in build_tx.call_args_list] == [2, 3]
+    mock_w3.eth.get_transaction_count.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_releases_nonce_on_failure(mock_web3_and_contracts):
+    service, mock_w3, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    mock_w3.eth.get_transaction_count.return_value = 9
+    mock_w3.eth.account.sign_transaction.side_effect = [Exception("Signing failed"), MagicMock(raw_transaction=b"raw")]
+    build_tx = mock_medical_record_contract.functions.addRecord.return_value.build_transaction
+
+    failed = await service.add_medical_record_hash("0x" + "d" * 64, "did:example:3", "DIAGNOSIS")
+    succeeded = await service.add_medical_record_hash("0x" + "e" * 64, "did:example:3", "DIAGNOSIS")
+
+    assert failed['success'] is False
+    assert "Signing failed" in failed['error']
+    assert succeeded['success'] is True
+    assert [c.args[0]['nonce'] for c in build_tx.call_args_list] == [9, 9]
+
+
+@pytest.mark.asyncio
+async def test_add_medical_record_hash_without_waiting_for_receipt(mock_web3_and_contracts):
+    service, mock_w3, _, _, _ = mock_web3_and_contracts
+
+    result = await service.add_medical_record_hash("0x" + "f" * 64, "did:example:4", "DIAGNOSIS", wait_for_receipt=False)
+
+    assert result['success'] is True
+    assert result['status'] == "PENDING"
+    assert 'transaction_hash' in result
+    mock_w3.eth.wait_for_transaction_receipt.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_transaction_status_pending_and_confirmed(mock_web3_and_contracts):
+    from web3.exceptions import TransactionNotFound
+    service, mock_w3, _, _, mock_tx_receipt = mock_web3_and_contracts
+
+    mock_w3.eth.get_transaction_receipt.side_effect = TransactionNotFound("not yet")
+    pending = await service.get_transaction_status("0xabc")
+    assert pending['status'] == "PENDING"
+
+    mock_w3.eth.get_transaction_receipt.side_effect = None
+    mock_w3.eth.get_transaction_receipt.return_value = mock_tx_receipt
+    mock_tx_receipt.status = 1
+    mock_tx_receipt.blockNumber = 42
+    confirmed = await service.get_transaction_status("0xabc")
+    assert confirmed['status'] == "CONFIRMED"
+    assert confirmed['block_number'] == 42
+
+
+@pytest.mark.asyncio
+async def test_anchor_merkle_root_success(mock_web3_and_contracts):
+    service, mock_w3, _, mock_medical_record_registry_contract, mock_tx_receipt = mock_web3_and_contracts
+    mock_tx_receipt.status = 1
+    merkle_root = "0x" + "ab" * 32
+
+    result = await service.anchor_merkle_root(merkle_root, 7)
+
+    assert result['success'] is True
+    assert result['status'] == "CONFIRMED"
+    mock_medical_record_registry_contract.functions.anchorBatch.assert_called_once_with(bytes.fromhex("ab" * 32), 7)
+
+
+@pytest.mark.asyncio
+async def test_anchor_merkle_root_invalid_root(mock_web3_and_contracts):
+    service, _, _, _, _ = mock_web3_and_contracts
+    result = await service.anchor_merkle_root("0x1234", 2)
+    assert result['success'] is False
+    assert "64 characters" in result['error']
+
+
+@pytest.mark.asyncio
+async def test_check_record_access_is_served_from_cache(mock_web3_and_contracts):
+    service, mock_w3, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    record_hash_hex = "0x" + "e" * 64
+    accessor_address = "0xAccessorHasAccess0000000000000000000000"
+    mock_w3.is_address.return_value = True
+    mock_medical_record_contract.functions.checkAccess.return_value.call.return_value = True
+
+    first = await service.check_record_access(record_hash_hex, accessor_address)
+    second = await service.check_record_access(record_hash_hex, accessor_address)
+
+    assert first['has_access'] is True and second['has_access'] is True
+    mock_medical_record_contract.functions.checkAccess.return_value.call.assert_called_once()
+    assert service.access_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_revoke_record_access_invalidates_cached_check(mock_web3_and_contracts):
+    service, mock_w3, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    record_hash_hex = "0x" + "f" * 64
+    doctor_address = "0xDoctorAddress00000000000000000000000000"
+    mock_w3.is_address.return_value = True
+    mock_medical_record_contract.functions.checkAccess.return_value.call.return_value = True
+    await service.check_record_access(record_hash_hex, doctor_address)
+
+    result = await service.revoke_record_access(record_hash_hex, doctor_address)
+
+    assert result['success'] is True
+    assert service.access_cache.get(record_hash_hex, doctor_address) is None
+
+
+@pytest.mark.asyncio
+async def test_check_record_access_many_batches_uncached_checks(mock_web3_and_contracts):
+    service, mock_w3, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    accessor_address = "0xAccessorHasAccess0000000000000000000000"
+    cached_hash, granted_hash, denied_hash = "0x" + "1" * 64, "0x" + "2" * 64, "0x" + "3" * 64
+    mock_w3.is_address.return_value = True
+    service.access_cache.set(cached_hash, accessor_address, True)
+    batch = mock_w3.batch_requests.return_value.__enter__.return_value
+    batch.execute.return_value = [True, False]
+
+    result = await service.check_record_access_many([
+        (cached_hash, accessor_address),
+        (granted_hash, accessor_address),
+        ("0x1234", accessor_address),
+        (denied_hash, accessor_address),
+    ])
+
+    assert result['success'] is True
+    assert [r['success'] for r in result['results']] == [True, True, False, True]
+    assert [r.get('has_access') for r in result['results']] == [True, True, None, False]
+    assert "64 characters" in result['results'][2]['error']
+    assert batch.add.call_count == 2
+    batch.execute.assert_called_once()
+    mock_medical_record_contract.functions.checkAccess.return_value.call.assert_not_called()
+    assert service.access_cache.get(denied_hash, accessor_address) is False
+
+
+@pytest.mark.asyncio
+async def test_check_record_access_many_splits_large_batches(mock_web3_and_contracts):
+    service, mock_w3, _, _, _ = mock_web3_and_contracts
+    mock_w3.is_address.return_value = True
+    batch = mock_w3.batch_requests.return_value.__enter__.return_value
+    batch.execute.side_effect = lambda: [True] * batch.add.call_count
+
+    with patch.dict(BLOCKCHAIN_CONFIG, {"read_batch_max_size": 2}):
+        result = await service.check_record_access_many(
+            [("0x" + f"{i:064x}", "0xAccessorHasAccess0000000000000000000000") for i in range(5)]
+        )
+
+    assert result['success'] is True
+    assert len(result['results']) == 5
+    assert mock_w3.batch_requests.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_async_backend_check_record_access_many(async_backend_service):
+    service, async_w3, _ = async_backend_service
+    batch = async_w3.batch_requests.return_value.__aenter__.return_value
+    batch.add = MagicMock()
+    batch.async_execute = AsyncMock(return_value=[True])
+
+    result = await service.check_record_access_many([("0x" + "b" * 64, "0xAccessorHasAccess0000000000000000000000")])
+
+    assert result['results'][0]['has_access'] is True
+    batch.async_execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_check_record_access_many_test_mode():
+    service = BlockchainService(test_mode=True)
+
+    result = await service.check_record_access_many([("0x" + "a" * 64, "0xDoctorHasAccess"), ("0x" + "a" * 64, "0xOther")])
+
+    assert [r['has_access'] for r in result['results']] == [True, False]
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_serves_chain_state_from_cache(mock_web3_and_contracts):
+    service, mock_w3, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    add_record = mock_medical_record_contract.functions.addRecord.return_value
+    add_record.estimate_gas.return_value = 100000
+    gas_price_reads = PropertyMock(return_value=10**9)
+    type(mock_w3.eth).gas_price = gas_price_reads
+    type(mock_w3.eth).chain_id = PropertyMock(return_value=1337)
+
+    await service.add_medical_record_hash("0x" + "a" * 64, "did:example:1", "DIAGNOSIS")
+    await service.add_medical_record_hash("0x" + "b" * 64, "did:example:1", "DIAGNOSIS")
+
+    assert mock_w3.is_connected.call_count == 1
+    assert gas_price_reads.call_count == 1
+    add_record.estimate_gas.assert_called_once()
+    tx_params = add_record.build_transaction.call_args.args[0]
+    assert tx_params['gas'] == 150000
+    assert tx_params['gasPrice'] == 10**9
+    assert tx_params['chainId'] == 1337
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_falls_back_to_default_gas_when_estimate_fails(mock_web3_and_contracts):
+    service, _, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    add_record = mock_medical_record_contract.functions.addRecord.return_value
+    add_record.estimate_gas.side_effect = ValueError("execution reverted")
+
+    await service.add_medical_record_hash("0x" + "c" * 64, "did:example:2", "DIAGNOSIS")
+
+    assert add_record.build_transaction.call_args.args[0]['gas'] == 300000
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_refetches_gas_price_when_underpriced(mock_web3_and_contracts):
+    service, mock_w3, _, mock_medical_record_contract, _ = mock_web3_and_contracts
+    type(mock_w3.eth).gas_price = PropertyMock(side_effect=[10**9, 2 * 10**9])
+    mock_w3.eth.send_raw_transaction.side_effect = [ValueError("transaction underpriced"), b"tx_hash_bytes"]
+    build_tx = mock_medical_record_contract.functions.addRecord.return_value.build_transaction
+
+    result = await service.add_medical_record_hash("0x" + "d" * 64, "did:example:3", "DIAGNOSIS")
+
+    assert result['success'] is True
+    assert [c.args[0]['gasPrice'] for c in build_tx.call_args_list] == [10**9, 2 * 10**9]
+    assert [c.args[0]['nonce'] for c in build_tx.call_args_list] == [1, 1]
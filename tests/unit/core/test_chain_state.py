@@ -0,0 +1,53 @@
+from src.app.core.chain_state import (
+    CHAIN_STATE_CHAIN_ID,
+    CHAIN_STATE_GAS_PRICE,
+    ChainStateCache,
+    is_underpriced_error,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(clock, ttl_seconds=10, gas_limit_ttl_seconds=100, gas_limit_multiplier=1.5):
+    return ChainStateCache(
+        ttl_seconds=ttl_seconds,
+        gas_limit_ttl_seconds=gas_limit_ttl_seconds,
+        gas_limit_multiplier=gas_limit_multiplier,
+        clock=clock,
+    )
+
+
+def test_values_expire_except_chain_id():
+    clock = FakeClock()
+    cache = make_cache(clock)
+    cache.set(CHAIN_STATE_GAS_PRICE, 10**9)
+    cache.set(CHAIN_STATE_CHAIN_ID, 1337, expires=False)
+
+    assert cache.get(CHAIN_STATE_GAS_PRICE) == 10**9
+    clock.now = 10
+    assert cache.get(CHAIN_STATE_GAS_PRICE) is None
+    assert cache.get(CHAIN_STATE_CHAIN_ID) == 1337
+
+
+def test_gas_limit_keeps_largest_estimate_until_expiry():
+    clock = FakeClock()
+    cache = make_cache(clock)
+
+    assert cache.record_gas_estimate("addRecord", 100000) == 150000
+    assert cache.record_gas_estimate("addRecord", 50000) == 150000
+    assert cache.get_gas_limit("addRecord") == 150000
+    assert cache.get_gas_limit("grantAccess") is None
+    clock.now = 100
+    assert cache.get_gas_limit("addRecord") is None
+
+
+def test_is_underpriced_error():
+    assert is_underpriced_error(Exception("transaction underpriced"))
+    assert is_underpriced_error(ValueError("max fee per gas less than block base fee"))
+    assert not is_underpriced_error(Exception("execution reverted"))
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from src.app.core.db_pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    engine_pool_options,
+    instrument_pool,
+)
+from src.app.core.metrics import MetricsRegistry
+
+POOL_CONFIG = {"pool_size": 3, "max_overflow": 2, "pool_timeout": 7.5, "pool_recycle": 600, "pool_pre_ping": True}
+
+
+@pytest.fixture
+def instrumented_engine(tmp_path):
+    registry = MetricsRegistry()
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    instrument_pool(engine.pool, "test", registry)
+    yield engine, registry
+    engine.dispose()
+
+
+def test_engine_pool_options_from_config():
+    options = engine_pool_options("postgresql://u:p@db/app", POOL_CONFIG)
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 2
+    assert options["pool_timeout"] == 7.5
+    assert options["pool_recycle"] == 600
+    assert options["pool_pre_ping"] is True
+
+    async_options = engine_pool_options("postgresql://u:p@db/app", POOL_CONFIG, async_engine=True)
+    assert async_options["poolclass"] is InstrumentedAsyncAdaptedQueuePool
+
+
+def test_engine_pool_options_skip_sqlite():
+    assert engine_pool_options("sqlite:///./test.db", POOL_CONFIG) == {}
+
+
+def test_checkout_wait_and_churn_metrics(instrumented_engine):
+    engine, registry = instrumented_engine
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert registry.get_gauge("db_pool.test.checked_out") == 1
+    assert registry.get_gauge("db_pool.test.checked_out") == 0
+
+    assert registry.get_counter("db_pool.test.connections_opened") == 1
+    assert registry.get_summary("db_pool.test.checkout_wait_seconds")["count"] == 1
+
+    engine.dispose()
+    assert registry.get_counter("db_pool.test.connections_closed") == 1
+
+
+def test_exhaustion_and_timeout_metrics(instrumented_engine):
+    engine, registry = instrumented_engine
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    assert registry.get_counter("db_pool.test.exhausted") == 1
+    assert registry.get_counter("db_pool.test.timeouts") == 1
+    assert registry.get_summary("db_pool.test.checkout_wait_seconds")["max"] >= 0.05
@@ -0,0 +1,52 @@
+import hashlib
+
+import pytest
+from web3 import Web3
+
+from src.app.core.merkle import MerkleTree, hash_leaf, hash_pair, verify_proof
+
+
+def record_hashes(count):
+    return [hashlib.sha256(f"record-{i}".encode()).hexdigest() for i in range(count)]
+
+
+def test_single_leaf_root_is_the_leaf():
+    hashes = record_hashes(1)
+    tree = MerkleTree(hashes)
+    assert tree.root == hash_leaf(hashes[0])
+    assert tree.proof(0) == []
+    assert verify_proof(hashes[0], [], tree.root)
+
+
+def test_two_leaf_root_matches_contract_hashing():
+    hashes = record_hashes(2)
+    leaf_a = Web3.keccak(bytes.fromhex(hashes[0]))
+    leaf_b = Web3.keccak(bytes.fromhex(hashes[1]))
+    expected = Web3.keccak(min(leaf_a, leaf_b) + max(leaf_a, leaf_b))
+
+    assert MerkleTree(hashes).root == expected
+    assert hash_pair(leaf_a, leaf_b) == hash_pair(leaf_b, leaf_a)
+
+
+@pytest.mark.parametrize("count", [2, 3, 5, 8, 13])
+def test_every_leaf_proof_verifies(count):
+    hashes = record_hashes(count)
+    tree = MerkleTree(hashes)
+    root_hex = "0x" + tree.root.hex()
+    for index, record_hash in enumerate(hashes):
+        proof_hex = ["0x" + p.hex() for p in tree.proof(index)]
+        assert verify_proof(record_hash, proof_hex, root_hex)
+
+
+def test_proof_rejects_other_record():
+    hashes = record_hashes(4)
+    tree = MerkleTree(hashes)
+    outsider = hashlib.sha256(b"not in batch").hexdigest()
+    assert not verify_proof(outsider, tree.proof(0), tree.root)
+
+
+def test_empty_tree_and_bad_hash_rejected():
+    with pytest.raises(ValueError):
+        MerkleTree([])
+    with pytest.raises(ValueError):
+        hash_leaf("abcd")
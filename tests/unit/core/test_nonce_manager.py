@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from src.app.core.nonce_manager import NonceManager, is_already_known_error, is_nonce_error
+
+
+@pytest.mark.asyncio
+async def test_allocate_fetches_once_then_counts_locally():
+    fetch = AsyncMock(return_value=7)
+    manager = NonceManager(fetch)
+
+    nonces = [await manager.allocate() for _ in range(3)]
+
+    assert nonces == [7, 8, 9]
+    fetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_allocations_are_unique():
+    async def slow_fetch():
+        await asyncio.sleep(0.01)
+        return 0
+
+    manager = NonceManager(slow_fetch)
+    nonces = await asyncio.gather(*(manager.allocate() for _ in range(50)))
+
+    assert sorted(nonces) == list(range(50))
+
+
+@pytest.mark.asyncio
+async def test_release_of_latest_nonce_steps_back():
+    manager = NonceManager(AsyncMock(return_value=3))
+    nonce = await manager.allocate()
+    manager.release(nonce)
+    assert await manager.allocate() == 3
+
+
+@pytest.mark.asyncio
+async def test_release_creating_gap_forces_resync():
+    fetch = AsyncMock(side_effect=[10, 11])
+    manager = NonceManager(fetch)
+    first = await manager.allocate()   # 10
+    await manager.allocate()           # 11 (in flight)
+
+    manager.release(first)             # 10 was never broadcast -> gap
+
+    # Node reports the first missing nonce as the pending count
+    assert await manager.allocate() == 11
+    assert fetch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_resync_replaces_local_counter():
+    fetch = AsyncMock(side_effect=[1, 5])
+    manager = NonceManager(fetch)
+    assert await manager.allocate() == 1
+    await manager.resync()
+    assert await manager.allocate() == 5
+
+
+def test_is_nonce_error():
+    assert is_nonce_error(ValueError({'code': -32000, 'message': 'nonce too low'}))
+    assert not is_nonce_error(Exception("Transaction with the same hash was already known"))
+    assert not is_nonce_error(Exception("insufficient funds for gas * price + value"))
+
+
+def test_is_already_known_error():
+    assert is_already_known_error(ValueError({'code': -32000, 'message': 'already known'}))
+    assert is_already_known_error(Exception("known transaction: 0xabc"))
+    assert not is_already_known_error(Exception("nonce too low"))
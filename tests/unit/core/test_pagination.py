@@ -0,0 +1,21 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from src.app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    position = datetime(2026, 10, 18, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+    cursor = encode_cursor(position, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (position, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "WzFd", encode_cursor(datetime.now(), uuid.uuid4())[:-4]])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
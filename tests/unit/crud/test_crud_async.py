@@ -0,0 +1,81 @@
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.app.core.database import Base, get_async_database_url
+from src.app.core.encryption import encrypt_data, hash_data
+from src.app.core.security_config import get_encryption_key
+from src.app.crud import crud_audit_log, crud_medical_record, crud_user
+from src.app.models.medical_record import MedicalRecordCreate, RecordType
+from src.app.schemas.user import UserCreate, UserRole
+
+
+@pytest.fixture
+async def async_db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+
+async def create_patient(db):
+    user_id = uuid.uuid4()
+    user_in = UserCreate(
+        email=f"async_{user_id.hex[:8]}@example.com",
+        username=f"async_{user_id.hex[:8]}",
+        password="testpassword123",
+        full_name="Async Test User",
+        role=UserRole.PATIENT,
+    )
+    return await crud_user.create_user_async(db, user_in=user_in, did=f"did:example:{user_id}", user_id_override=user_id)
+
+
+async def test_user_lookups(async_db):
+    user = await create_patient(async_db)
+
+    assert (await crud_user.get_user_by_username_async(async_db, user.username)).id == user.id
+    assert (await crud_user.get_user_by_email_async(async_db, user.email)).id == user.id
+    assert (await crud_user.get_user_by_id_async(async_db, user.id)).did == user.did
+    assert await crud_user.get_user_by_username_async(async_db, "nobody") is None
+
+
+async def test_medical_record_roundtrip(async_db):
+    user = await create_patient(async_db)
+    raw_data = "Async record"
+    encrypted = encrypt_data(raw_data, get_encryption_key())
+    record = await crud_medical_record.create_medical_record_async(
+        async_db,
+        medical_record_in=MedicalRecordCreate(record_type=RecordType.DIAGNOSIS, raw_data=raw_data),
+        patient_id=user.id,
+        encrypted_data=encrypted,
+        data_hash=hash_data(raw_data),
+    )
+
+    fetched = await crud_medical_record.get_medical_record_by_id_async(async_db, record.id, load_encrypted_data=True)
+    assert fetched.encrypted_data == encrypted
+    assert (await crud_medical_record.get_by_hash_async(async_db, "0x" + record.data_hash, patient_id=user.id)).id == record.id
+    assert await crud_medical_record.get_existing_data_hashes_async(async_db, user.id, [record.data_hash, "f" * 64]) == {record.data_hash}
+
+    updated = await crud_medical_record.update_medical_record_blockchain_id_async(async_db, record.id, "0xtx")
+    assert updated.blockchain_record_id == "0xtx"
+    assert updated.blockchain_status == "CONFIRMED"
+
+
+async def test_audit_log_roundtrip(async_db):
+    user = await create_patient(async_db)
+    await crud_audit_log.create_audit_log_async(
+        async_db, actor_user_id=user.id, owner_user_id=user.id, action_type="VIEW_RECORD_SUCCESS"
+    )
+    logs = await crud_audit_log.get_audit_logs_by_owner_async(async_db, owner_user_id=user.id)
+    assert [log.action_type for log in logs] == ["VIEW_RECORD_SUCCESS"]
+
+
+def test_async_database_url_mapping():
+    assert get_async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert get_async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert get_async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert get_async_database_url("postgresql+asyncpg://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
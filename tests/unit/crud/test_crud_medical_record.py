@@ -182,6 +182,33 @@ def test_get_medical_records_by_patient_id(db_session: Session, test_patient: cr
     assert len(no_records) == 0
 
 
+
+def test_get_medical_records_by_patient_id_keyset_pagination(db_session: Session, test_patient: crud_user.User):
+    created = []
+    for i in range(5):
+        raw_data = f"Keyset record {i}"
+        created.append(crud_medical_record.create_medical_record(
+            db=db_session,
+            medical_record_in=MedicalRecordCreate(record_type=RecordType.LAB_RESULT, raw_data=raw_data),
+            patient_id=test_patient.id,
+            encrypted_data=encrypt_data(raw_data, TEST_ENCRYPTION_KEY),
+            data_hash=hash_data(raw_data)
+        ))
+
+    seen = []
+    after = None
+    while True:
+        page = crud_medical_record.get_medical_records_by_patient_id(
+            db_session, patient_id=test_patient.id, limit=2, after=after
+        )
+        if not page:
+            break
+        seen.extend(record.id for record in page)
+        after = (page[-1].created_at, page[-1].id)
+
+    expected = [r.id for r in sorted(created, key=lambda r: (r.created_at, str(r.id)))]
+    assert seen == expected
+
 def test_update_medical_record_blockchain_id(db_session: Session, test_patient: crud_user.User):
     """
     Test updating the blockchain_record_id of a medical record.
@@ -211,3 +238,35 @@ def test_update_medical_record_blockchain_id(db_session: Session, test_patient:
         db=db_session, record_id=non_existent_id, blockchain_tx_hash="0xwhatever"
     )
     assert updated_none is None
+
+
+def test_get_by_hash(db_session: Session, test_patient: crud_user.User):
+    """
+    Test looking up a record by data hash, with and without patient scoping.
+    """
+    raw_data_content = "Record looked up by hash."
+    data_h = hash_data(raw_data_content)
+    created_record = crud_medical_record.create_medical_record(
+        db=db_session,
+        medical_record_in=MedicalRecordCreate(record_type=RecordType.IMAGING, raw_data=raw_data_content),
+        patient_id=test_patient.id,
+        encrypted_data=encrypt_data(raw_data_content, TEST_ENCRYPTION_KEY),
+        data_hash=data_h
+    )
+
+    assert crud_medical_record.get_by_hash(db_session, data_h).id == created_record.id
+    # On-chain hashes carry a 0x prefix
+    assert crud_medical_record.get_by_hash(db_session, "0x" + data_h, patient_id=test_patient.id).id == created_record.id
+
+    other_patient = create_test_user(db_session, user_id=uuid.uuid4())
+    assert crud_medical_record.get_by_hash(db_session, data_h, patient_id=other_patient.id) is None
+    assert crud_medical_record.get_by_hash(db_session, "0" * 64) is None
+
+
+def test_data_hash_indexes_declared():
+    index_columns = {
+        index.name: [column.name for column in index.columns]
+        for index in crud_medical_record.MedicalRecord.__table__.indexes
+    }
+    assert index_columns["ix_medical_records_data_hash"] == ["data_hash"]
+    assert index_columns["ix_medical_records_patient_id_data_hash"] == ["patient_id", "data_hash"]
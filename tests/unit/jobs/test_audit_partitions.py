@@ -0,0 +1,35 @@
+from datetime import date
+
+from src.app.jobs.audit_partitions import (
+    add_months,
+    parse_partition_month,
+    partition_name,
+    partitions_to_create,
+    partitions_to_detach,
+)
+
+
+def test_add_months_crosses_year_boundaries():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_name_roundtrip():
+    name = partition_name(date(2026, 3, 1))
+    assert name == "audit_data_access_logs_y2026m03"
+    assert parse_partition_month(name) == date(2026, 3, 1)
+    assert parse_partition_month("audit_data_access_logs_default") is None
+
+
+def test_creates_current_and_upcoming_months_that_are_missing():
+    existing = [date(2026, 10, 1), date(2026, 11, 1)]
+    assert partitions_to_create(existing, date(2026, 10, 18), months_ahead=3) == [
+        date(2026, 12, 1),
+        date(2027, 1, 1),
+    ]
+
+
+def test_detaches_only_months_entirely_outside_retention():
+    existing = [date(2025, 8, 1), date(2025, 9, 1), date(2025, 10, 1), date(2026, 10, 1)]
+    # Retention of 13 months from October 2026 keeps September 2025 onwards
+    assert partitions_to_detach(existing, date(2026, 10, 18), retention_months=13) == [date(2025, 8, 1)]
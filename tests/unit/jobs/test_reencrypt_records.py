@@ -0,0 +1,152 @@
+import uuid
+
+import pytest
+
+from src.app.core.encryption import encrypt_data, hash_data
+from src.app.core.envelope import DataKeyManager
+from src.app.core.key_provider import KeyProvider
+from src.app.core.metrics import MetricsRegistry
+from src.app.crud import crud_medical_record, crud_reencryption
+from src.app.jobs.reencrypt_records import RecordReencryptor, Throttle
+from src.app.models.medical_record import MedicalRecord, MedicalRecordCreate, RecordType
+from src.app.models.reencryption_checkpoint import ReencryptionFailure
+from src.app.models.user import User, UserRole
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_manager(current_version=1):
+    registry = MetricsRegistry()
+    provider = KeyProvider(
+        secret_resolver=lambda version: f"secret-v{version}",
+        salt=b"test_salt",
+        iterations=1000,
+        current_version=current_version,
+        registry=registry,
+    )
+    return DataKeyManager(provider=provider, registry=registry), provider
+
+
+def add_legacy_records(db, key, count, corrupt=()):
+    patient = User(
+        id=uuid.uuid4(), email="reencrypt@example.com", username="reencrypt", hashed_password="x",
+        did="did:example:reencrypt", role=UserRole.PATIENT, is_active=True,
+    )
+    db.add(patient)
+    db.commit()
+    for i in range(count):
+        crud_medical_record.create_medical_record(
+            db,
+            medical_record_in=MedicalRecordCreate(record_type=RecordType.LAB_RESULT, raw_data=f"record {i}"),
+            patient_id=patient.id,
+            encrypted_data=encrypt_data(f"record {i}", key),
+            data_hash=hash_data("tampered" if i in corrupt else f"record {i}"),
+        )
+
+
+def test_throttle_paces_rows_and_waits_for_replica_lag():
+    clock = FakeClock()
+    lags = iter([None, 12.0, 8.0, 1.0])
+    throttle = Throttle(
+        rows_per_second=100, max_replica_lag_seconds=5, replica_lag=lambda: next(lags),
+        poll_seconds=2, clock=clock, sleep=clock.sleep,
+    )
+
+    throttle.wait(50)
+    assert clock.sleeps == [0.5]
+    throttle.wait(50)  # Lag 12s, then 8s, then 1s
+    assert clock.sleeps == [0.5, 0.5, 2, 2]
+    assert throttle._rows == 0
+
+
+def test_reencrypts_legacy_records_and_skips_unreadable_ones(db_session):
+    manager, provider = make_manager()
+    add_legacy_records(db_session, provider.get_key(), 5, corrupt={3})
+
+    result = RecordReencryptor(lambda: db_session, manager, batch_size=2, workers=2).run()
+    assert result == {"done": 4, "failed": 1}
+
+    db_session.expire_all()
+    for record in db_session.query(MedicalRecord).all():
+        if record.data_hash == hash_data("tampered"):
+            assert record.wrapped_data_key is None
+            continue
+        assert record.key_version == 1
+        cipher = manager.get_cipher(record.wrapped_data_key, record.key_version)
+        assert hash_data(cipher.decrypt_record(record.encrypted_data, record.encryption_format)) == record.data_hash
+
+    failure = db_session.query(ReencryptionFailure).one()
+    assert failure.name == "reencrypt_records" and "does not match" in failure.error
+    assert db_session.get(MedicalRecord, failure.record_id).data_hash == hash_data("tampered")
+
+
+def test_retry_failed_reencrypts_recorded_failures(db_session):
+    manager, provider = make_manager()
+    add_legacy_records(db_session, provider.get_key(), 4, corrupt={1})
+    assert RecordReencryptor(lambda: db_session, manager, batch_size=2).run() == {"done": 3, "failed": 1}
+
+    # The checkpoint has moved past the failed record; a normal run does not revisit it
+    assert RecordReencryptor(lambda: db_session, manager, batch_size=2).run() == {"done": 3, "failed": 1}
+
+    record_id = db_session.query(ReencryptionFailure).one().record_id
+    db_session.get(MedicalRecord, record_id).data_hash = hash_data("record 1")
+    db_session.commit()
+
+    result = RecordReencryptor(lambda: db_session, manager, batch_size=2).run(retry_failed=True)
+    assert result == {"done": 4, "failed": 0}
+    assert db_session.query(ReencryptionFailure).count() == 0
+    db_session.expire_all()
+    assert db_session.get(MedicalRecord, record_id).wrapped_data_key is not None
+
+
+def test_legacy_records_are_reencrypted_after_version_bump(db_session):
+    manager, provider = make_manager(current_version=1)
+    add_legacy_records(db_session, provider.get_key(1), 3)
+
+    provider.current_version = 2
+    result = RecordReencryptor(lambda: db_session, manager, batch_size=2).run()
+    assert result == {"done": 3, "failed": 0}
+
+    db_session.expire_all()
+    for record in db_session.query(MedicalRecord).all():
+        assert record.key_version == 2 and record.wrapped_data_key is not None
+        cipher = manager.get_cipher(record.wrapped_data_key, record.key_version)
+        assert hash_data(cipher.decrypt_record(record.encrypted_data, record.encryption_format)) == record.data_hash
+
+
+def test_interrupted_run_resumes_after_last_committed_batch(db_session, monkeypatch):
+    manager, provider = make_manager()
+    add_legacy_records(db_session, provider.get_key(), 5)
+
+    class StopAfterFirstBatch:
+        def wait(self, rows):
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        RecordReencryptor(lambda: db_session, manager, batch_size=2, throttle=StopAfterFirstBatch()).run()
+    checkpoint = crud_reencryption.get_checkpoint(db_session, "reencrypt_records")
+    assert checkpoint.records_done == 2
+
+    fetched = []
+    original = crud_medical_record.get_records_to_reencrypt
+
+    def spy(db, key_version, after_id, limit, include_current=False):
+        rows = original(db, key_version, after_id, limit, include_current)
+        fetched.extend(row[0] for row in rows)
+        return rows
+
+    monkeypatch.setattr(crud_medical_record, "get_records_to_reencrypt", spy)
+    result = RecordReencryptor(lambda: db_session, manager, batch_size=2).run()
+    assert result == {"done": 5, "failed": 0}
+    assert len(fetched) == 3
@@ -0,0 +1,65 @@
+import uuid
+
+from src.app.core.encryption import encrypt_data, hash_data
+from src.app.core.envelope import DataKeyManager
+from src.app.core.key_provider import KeyProvider
+from src.app.core.metrics import MetricsRegistry
+from src.app.core.security_config import get_encryption_key
+from src.app.crud import crud_medical_record
+from src.app.jobs.rotate_data_keys import rewrap_data_keys
+from src.app.models.medical_record import MedicalRecord, MedicalRecordCreate, RecordType
+from src.app.models.user import User, UserRole
+
+
+def make_manager(current_version):
+    registry = MetricsRegistry()
+    provider = KeyProvider(
+        secret_resolver=lambda version: f"secret-v{version}",
+        salt=b"test_salt",
+        iterations=1000,
+        current_version=current_version,
+        registry=registry,
+    )
+    return DataKeyManager(provider=provider, registry=registry)
+
+
+def test_rewraps_data_keys_in_batches_without_touching_payloads(db_session):
+    patient = User(
+        id=uuid.uuid4(), email="rotate@example.com", username="rotate", hashed_password="x",
+        did="did:example:rotate", role=UserRole.PATIENT, is_active=True,
+    )
+    db_session.add(patient)
+    db_session.commit()
+
+    old_manager = make_manager(current_version=1)
+    for i in range(3):
+        cipher, wrapped, version = old_manager.new_data_key()
+        crud_medical_record.create_medical_record(
+            db_session,
+            medical_record_in=MedicalRecordCreate(record_type=RecordType.LAB_RESULT, raw_data=f"record {i}"),
+            patient_id=patient.id,
+            encrypted_data=cipher.encrypt(f"record {i}"),
+            data_hash=hash_data(f"record {i}"),
+            wrapped_data_key=wrapped,
+            key_version=version,
+        )
+    crud_medical_record.create_medical_record(
+        db_session,
+        medical_record_in=MedicalRecordCreate(record_type=RecordType.LAB_RESULT, raw_data="legacy"),
+        patient_id=patient.id,
+        encrypted_data=encrypt_data("legacy", get_encryption_key()),
+        data_hash=hash_data("legacy"),
+    )
+    blobs_before = {r.id: r.encrypted_data for r in db_session.query(MedicalRecord).all()}
+
+    new_manager = make_manager(current_version=2)
+    assert rewrap_data_keys(lambda: db_session, new_manager, batch_size=2) == {"rewrapped": 3, "failed": 0}
+    assert rewrap_data_keys(lambda: db_session, new_manager, batch_size=2) == {"rewrapped": 0, "failed": 0}
+
+    db_session.expire_all()
+    records = db_session.query(MedicalRecord).filter(MedicalRecord.wrapped_data_key.isnot(None)).all()
+    assert {r.key_version for r in records} == {2}
+    for record in records:
+        assert record.encrypted_data == blobs_before[record.id]
+        plaintext = new_manager.get_cipher(record.wrapped_data_key, record.key_version).decrypt(record.encrypted_data)
+        assert plaintext.startswith("record ")
@@ -0,0 +1,52 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.app.core.access_cache import AccessCheckCache
+from src.app.services.access_event_watcher import AccessEventWatcher
+
+RECORD_HASH = "0x" + "d" * 64
+DOCTOR = "0xDoctor0000000000000000000000000000000001"
+
+
+def make_watcher(block_numbers, events):
+    blockchain_service = MagicMock()
+    blockchain_service.access_cache = AccessCheckCache(max_entries=10, ttl_seconds=60)
+    blockchain_service.get_block_number = AsyncMock(
+        side_effect=[{"success": True, "block_number": n} for n in block_numbers]
+    )
+    blockchain_service.get_access_change_events = AsyncMock(return_value={"success": True, "events": events})
+    return AccessEventWatcher(blockchain_service_factory=lambda: blockchain_service), blockchain_service
+
+
+@pytest.mark.asyncio
+async def test_first_poll_only_records_the_head():
+    watcher, blockchain_service = make_watcher([100], [])
+    assert await watcher.poll_once() == 0
+    assert watcher.last_block == 100
+    blockchain_service.get_access_change_events.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_events_invalidate_cached_checks():
+    events = [{"event": "AccessRevoked", "record_hash": RECORD_HASH, "doctor_address": DOCTOR}]
+    watcher, blockchain_service = make_watcher([100, 105], events)
+    await watcher.poll_once()
+    blockchain_service.access_cache.set(RECORD_HASH, DOCTOR, True)
+
+    assert await watcher.poll_once() == 1
+    blockchain_service.get_access_change_events.assert_awaited_once_with(101, 105)
+    assert blockchain_service.access_cache.get(RECORD_HASH, DOCTOR) is None
+    assert watcher.last_block == 105
+
+
+@pytest.mark.asyncio
+async def test_failed_event_fetch_retries_the_same_range():
+    watcher, blockchain_service = make_watcher([100, 105, 106], [])
+    blockchain_service.get_access_change_events.return_value = {"success": False, "error": "node down"}
+    await watcher.poll_once()
+    await watcher.poll_once()
+    assert watcher.last_block == 100
+
+    blockchain_service.get_access_change_events.return_value = {"success": True, "events": []}
+    await watcher.poll_once()
+    blockchain_service.get_access_change_events.assert_awaited_with(101, 106)
@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.app.models.medical_record import BlockchainStatus
+from src.app.services.anchor_batcher import AnchorBatcher
+from src.app.services.receipt_tracker import TX_KIND_ANCHOR_BATCH
+
+CRUD = "src.app.services.anchor_batcher.crud_anchor_batch"
+
+
+def make_batcher(anchor_result, tracker=None, batch_anchor=None):
+    blockchain_service = MagicMock()
+    blockchain_service.anchor_merkle_root = AsyncMock(return_value=anchor_result)
+    blockchain_service.get_batch_anchor = AsyncMock(return_value=batch_anchor)
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    batcher = AnchorBatcher(
+        blockchain_service_factory=lambda: blockchain_service,
+        session_factory=lambda: session,
+        receipt_tracker_factory=lambda: tracker,
+        max_batch_size=4,
+    )
+    return batcher, blockchain_service
+
+
+def claimed_batch(leaf_count=3):
+    return MagicMock(id="batch-id", merkle_root="0x" + "ab" * 32, leaf_count=leaf_count)
+
+
+@pytest.mark.asyncio
+async def test_flush_without_queued_records_does_nothing():
+    batcher, blockchain_service = make_batcher({"success": True})
+    with patch(f"{CRUD}.claim_anchor_batch_async", AsyncMock(return_value=None)):
+        assert await batcher.flush() is None
+    blockchain_service.anchor_merkle_root.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_anchor_requeues_records():
+    batcher, blockchain_service = make_batcher(
+        {"success": False, "error": "node down"}, batch_anchor={"success": True, "anchored": False}
+    )
+    batch = claimed_batch()
+    with patch(f"{CRUD}.claim_anchor_batch_async", AsyncMock(return_value=batch)), \
+         patch(f"{CRUD}.release_anchor_batch_async", AsyncMock(return_value=3)) as release, \
+         patch(f"{CRUD}.mark_anchor_batch_submitted_async", AsyncMock()) as mark:
+        assert await batcher.flush() is None
+
+    blockchain_service.get_batch_anchor.assert_awaited_once_with(batch.merkle_root)
+    assert release.await_args.args[1] == "batch-id"
+    mark.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_anchor_stays_claimed_if_chain_cannot_be_read():
+    batcher, _ = make_batcher({"success": False, "error": "timeout"}, batch_anchor={"success": False, "error": "node down"})
+    with patch(f"{CRUD}.claim_anchor_batch_async", AsyncMock(return_value=claimed_batch())), \
+         patch(f"{CRUD}.release_anchor_batch_async", AsyncMock()) as release, \
+         patch(f"{CRUD}.mark_anchor_batch_submitted_async", AsyncMock()) as mark:
+        assert await batcher.flush() is None
+
+    release.assert_not_called()
+    mark.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_pending_anchor_is_tracked():
+    tracker = MagicMock()
+    batcher, _ = make_batcher({"success": True, "status": "PENDING", "transaction_hash": "0xbatch"}, tracker)
+    stored_batch = claimed_batch(leaf_count=2)
+    with patch(f"{CRUD}.claim_anchor_batch_async", AsyncMock(return_value=claimed_batch(leaf_count=2))), \
+         patch(f"{CRUD}.mark_anchor_batch_submitted_async", AsyncMock(return_value=stored_batch)) as mark:
+        assert await batcher.flush() is stored_batch
+
+    assert mark.await_args.args[1:] == ("batch-id", BlockchainStatus.PENDING, "0xbatch")
+    tracker.track.assert_called_once_with("0xbatch", TX_KIND_ANCHOR_BATCH, {"batch_id": "batch-id"})
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.app.core.database import Base
+from src.app.core.metrics import metrics
+from src.app.crud import crud_audit_log
+from src.app.models.audit_log import AuditDataAccessLog
+from src.app.models.user import User, UserRole
+from src.app.services.audit_writer import AuditLogSpool, AuditLogWriter
+
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def count_logs(session_factory):
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(AuditDataAccessLog))
+
+
+async def log_entry(writer, db=None, action_type="VIEW_RECORD_SUCCESS"):
+    await writer.log(db, actor_user_id=uuid.uuid4(), owner_user_id=uuid.uuid4(), action_type=action_type)
+
+
+async def test_writes_inline_when_not_started(session_factory):
+    writer = AuditLogWriter(session_factory=session_factory)
+    async with session_factory() as db:
+        await log_entry(writer, db)
+    assert await count_logs(session_factory) == 1
+
+
+async def test_flushes_full_batch_without_waiting_for_interval(session_factory):
+    metrics.reset()
+    writer = AuditLogWriter(session_factory=session_factory, batch_max_size=5, flush_interval_seconds=60)
+    writer.start()
+    for _ in range(5):
+        await log_entry(writer)
+    for _ in range(50):
+        if await count_logs(session_factory) == 5:
+            break
+        await asyncio.sleep(0.01)
+    assert await count_logs(session_factory) == 5
+    assert metrics.get_summary("audit_writer.batch_size")["max"] == 5
+    await writer.stop()
+
+
+async def test_flushes_partial_batch_after_interval(session_factory):
+    writer = AuditLogWriter(session_factory=session_factory, batch_max_size=100, flush_interval_seconds=0.05)
+    writer.start()
+    await log_entry(writer)
+    await asyncio.sleep(0.3)
+    assert await count_logs(session_factory) == 1
+    await writer.stop()
+
+
+async def test_stop_writes_every_queued_entry(session_factory):
+    writer = AuditLogWriter(session_factory=session_factory, batch_max_size=4, flush_interval_seconds=60)
+    writer.start()
+    for _ in range(10):
+        await log_entry(writer)
+    await writer.stop()
+
+    assert await count_logs(session_factory) == 10
+    assert not writer.running
+
+
+async def test_full_queue_applies_backpressure(session_factory):
+    metrics.reset()
+    writer = AuditLogWriter(session_factory=session_factory, queue_max_size=2, batch_max_size=2, flush_interval_seconds=60)
+    writer.start()
+    for _ in range(6):
+        await log_entry(writer)
+    await writer.stop()
+
+    assert await count_logs(session_factory) == 6
+    assert metrics.get_counter("audit_writer.backpressure_waits") > 0
+
+
+async def test_failed_batch_is_retried(session_factory):
+    calls = []
+
+    def flaky_factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        return session_factory()
+
+    writer = AuditLogWriter(session_factory=flaky_factory, flush_interval_seconds=0.01, retry_backoff_seconds=0)
+    writer.start()
+    await log_entry(writer)
+    await writer.stop()
+
+    assert len(calls) == 2
+    assert await count_logs(session_factory) == 1
+
+
+async def test_failed_batch_is_spooled_and_replayed(session_factory, tmp_path):
+    database_up = False
+
+    def flaky_factory():
+        if not database_up:
+            raise RuntimeError("database unavailable")
+        return session_factory()
+
+    spool = AuditLogSpool(str(tmp_path / "audit_spool.ndjson"))
+    writer = AuditLogWriter(
+        session_factory=flaky_factory, flush_interval_seconds=0.01, max_write_attempts=2,
+        retry_backoff_seconds=0, spool=spool,
+    )
+    writer.start()
+    await log_entry(writer)
+    await log_entry(writer)
+    for _ in range(50):
+        if spool.has_entries():
+            break
+        await asyncio.sleep(0.01)
+    assert spool.has_entries()
+
+    database_up = True
+    await log_entry(writer)
+    await writer.stop()
+
+    assert await count_logs(session_factory) == 3
+    assert not spool.has_entries()
+
+
+async def test_spool_is_replayed_on_start_without_duplicates(session_factory, tmp_path):
+    spool = AuditLogSpool(str(tmp_path / "audit_spool.ndjson"))
+    entries = [
+        {
+            "id": uuid.uuid4(), "timestamp": datetime.now(timezone.utc), "actor_user_id": uuid.uuid4(),
+            "owner_user_id": uuid.uuid4(), "action_type": "VIEW_RECORD_SUCCESS", "record_id": None,
+            "ip_address": "127.0.0.1", "target_address": None, "details": {"n": i}, "transaction_hash": None,
+        }
+        for i in range(3)
+    ]
+    spool.append(entries)
+    # The first entry was committed before the spool could be emptied
+    async with session_factory() as db:
+        await crud_audit_log.create_audit_logs_bulk_async(db, entries[:1])
+
+    writer = AuditLogWriter(session_factory=session_factory, spool=spool)
+    writer.start()
+    await writer.stop()
+
+    assert await count_logs(session_factory) == 3
+    assert not spool.has_entries()
+    async with session_factory() as db:
+        stored = await db.get(AuditDataAccessLog, (entries[2]["id"], entries[2]["timestamp"]))
+    assert stored.details == {"n": 2}
+
+
+async def test_rejected_entry_is_quarantined_and_the_rest_of_the_batch_is_written(tmp_path):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    event.listen(engine.sync_engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user = User(
+        id=uuid.uuid4(), email="p@example.com", username="p", hashed_password="x", did="did:example:p",
+        role=UserRole.PATIENT,
+    )
+    async with session_factory() as db:
+        db.add(user)
+        await db.commit()
+
+    spool = AuditLogSpool(str(tmp_path / "audit_spool.ndjson"))
+    dead_letter = AuditLogSpool(str(tmp_path / "audit_dead_letter.ndjson"))
+    writer = AuditLogWriter(
+        session_factory=session_factory, flush_interval_seconds=0.01, retry_backoff_seconds=0,
+        spool=spool, dead_letter=dead_letter,
+    )
+    writer.start()
+    for i in range(5):
+        await writer.log(
+            None, actor_user_id=user.id, owner_user_id=user.id, action_type="GRANT_ACCESS_FAILURE_RECORD_NOT_FOUND",
+            # The third entry references a medical record that does not exist
+            record_id=uuid.uuid4() if i == 2 else None, details={"n": i},
+        )
+    await writer.stop()
+
+    async with session_factory() as db:
+        stored = sorted(log.details["n"] for log in (await db.scalars(select(AuditDataAccessLog))).all())
+    await engine.dispose()
+    assert stored == [0, 1, 3, 4]
+    assert not spool.has_entries()
+    with open(dead_letter.path, encoding="utf-8") as f:
+        quarantined = [json.loads(line) for line in f]
+    assert [entry["details"] for entry in quarantined] == [{"n": 2}]
+    assert "FOREIGN KEY" in quarantined[0]["error"]
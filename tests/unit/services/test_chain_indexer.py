@@ -0,0 +1,151 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from web3 import Web3
+
+from src.app.core.access_cache import AccessCheckCache
+from src.app.core.database import Base
+from src.app.crud import crud_chain_index
+from src.app.models.chain_index import RecordAccessGrant, RecordAnchor
+from src.app.services import chain_indexer
+from src.app.services.chain_indexer import ChainEventIndexer
+
+PATIENT_DID = "did:example:patient"
+DOCTOR = "0xD0c70r0000000000000000000000000000000001"
+
+
+def record_hash(i):
+    return "0x" + f"{i:064x}"
+
+
+def record_added(block, i):
+    return {
+        "event": "RecordAdded", "block_number": block, "log_index": 0, "transaction_hash": "0x" + "1" * 64,
+        "record_hash": record_hash(i), "patient_did_hash": Web3.to_hex(Web3.keccak(text=PATIENT_DID)),
+        "record_type": "LAB_RESULT", "submitter": "0x" + "5" * 40, "timestamp": 1700000000,
+    }
+
+
+def access_event(name, block, i, log_index=1):
+    return {
+        "event": name, "block_number": block, "log_index": log_index, "transaction_hash": "0x" + "2" * 64,
+        "record_hash": record_hash(i), "owner_address": "0x" + "5" * 40, "doctor_address": DOCTOR, "timestamp": 1700000000,
+    }
+
+
+class FakeChain:
+    """Blocks, block hashes and registry events the indexer reads through BlockchainService."""
+
+    def __init__(self):
+        self.head = 0
+        self.hashes = {0: "0xgenesis"}
+        self.events = []
+        self.access_cache = AccessCheckCache(max_entries=10, ttl_seconds=60)
+        self.get_record_hashes_for_patient = AsyncMock(return_value={"success": True, "data": {"hashes": ["0xfromchain"]}})
+
+    def mine(self, *events, fork="a"):
+        self.head += 1
+        self.hashes[self.head] = f"0x{fork}{self.head}"
+        self.events.extend(dict(e, block_number=self.head) for e in events)
+
+    async def get_block_number(self):
+        return {"success": True, "block_number": self.head}
+
+    async def get_block_hash(self, block_number):
+        return {"success": True, "block_hash": self.hashes.get(block_number) if block_number <= self.head else None}
+
+    async def get_registry_events(self, from_block, to_block):
+        return {"success": True, "events": [e for e in self.events if from_block <= e["block_number"] <= to_block]}
+
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def count(session_factory, model):
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(model))
+
+
+def make_indexer(chain, session_factory, **kwargs):
+    return ChainEventIndexer(blockchain_service_factory=lambda: chain, session_factory=session_factory, start_block=1, **kwargs)
+
+
+async def drain(indexer):
+    while await indexer.poll_once() is not None:
+        pass
+
+
+async def test_indexes_events_and_serves_reads_locally(session_factory):
+    chain = FakeChain()
+    chain.mine(record_added(0, 1))
+    chain.mine(access_event("AccessGranted", 0, 1))
+    indexer = make_indexer(chain, session_factory, batch_blocks=1)
+    await drain(indexer)
+
+    async with session_factory() as db:
+        hashes = await chain_indexer.get_record_hashes_for_patient(db, chain, PATIENT_DID)
+
+    assert hashes == {"success": True, "data": {"hashes": [record_hash(1)]}}
+    chain.get_record_hashes_for_patient.assert_not_called()
+    assert await count(session_factory, RecordAccessGrant) == 1
+
+
+async def test_stale_index_falls_back_to_chain(session_factory):
+    chain = FakeChain()
+    chain.mine(record_added(0, 1))
+    await drain(make_indexer(chain, session_factory))
+
+    async with session_factory() as db:
+        checkpoint = await crud_chain_index.get_checkpoint_async(db, chain_indexer.REGISTRY_INDEX)
+        assert chain_indexer.index_is_current(checkpoint)
+        assert not chain_indexer.index_is_current(checkpoint, max_staleness_seconds=0)
+        checkpoint.head_block_number += 3
+        assert not chain_indexer.index_is_current(checkpoint, max_lag_blocks=2)
+        await db.commit()
+
+        hashes = await chain_indexer.get_record_hashes_for_patient(db, chain, PATIENT_DID)
+    assert hashes["data"]["hashes"] == ["0xfromchain"]
+
+
+async def test_poll_is_skipped_while_another_worker_holds_the_index_lock(session_factory):
+    chain = FakeChain()
+    chain.mine(record_added(0, 1))
+    indexer = make_indexer(chain, session_factory)
+
+    with patch.object(crud_chain_index, "try_lock_index_async", AsyncMock(return_value=False)):
+        assert await indexer.poll_once() is None
+    assert await count(session_factory, RecordAnchor) == 0
+
+    await drain(indexer)
+    assert await count(session_factory, RecordAnchor) == 1
+
+
+async def test_reorg_rewinds_and_reindexes(session_factory):
+    chain = FakeChain()
+    for i in range(1, 6):
+        chain.mine(record_added(0, i))
+    indexer = make_indexer(chain, session_factory, reorg_rewind_blocks=3)
+    await drain(indexer)
+
+    # Blocks 4 and 5 are replaced by a fork that only has record 40 in block 4
+    chain.head = 3
+    chain.events = [e for e in chain.events if e["block_number"] <= 3]
+    chain.mine(record_added(0, 40), fork="b")
+    chain.mine(fork="b")
+    chain.access_cache.set(record_hash(1), DOCTOR, True)
+
+    assert await indexer.poll_once() == 0  # Rewind to block 2
+    await drain(indexer)
+
+    async with session_factory() as db:
+        anchored = set((await db.scalars(select(RecordAnchor.record_hash))).all())
+    assert await count(session_factory, RecordAccessGrant) == 0
+    assert anchored == {record_hash(1), record_hash(2), record_hash(3), record_hash(40)}
+    assert chain.access_cache.get(record_hash(1), DOCTOR) is None
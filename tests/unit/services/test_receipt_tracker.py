@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.app.models.medical_record import BlockchainStatus
+from src.app.services.receipt_tracker import (
+    ReceiptTracker,
+    TX_KIND_GRANT_ACCESS,
+    TX_KIND_MEDICAL_RECORD,
+    TX_KIND_REVOKE_ACCESS,
+)
+
+
+def make_tracker(status_result, timeout=60):
+    blockchain_service = MagicMock()
+    blockchain_service.get_transaction_status = AsyncMock(return_value=status_result)
+    session = MagicMock()
+    session.__aenter__.return_value = session
+    tracker = ReceiptTracker(
+        blockchain_service_factory=lambda: blockchain_service,
+        session_factory=lambda: session,
+        poll_interval=0,
+        timeout=timeout,
+    )
+    return tracker, session
+
+
+@pytest.mark.asyncio
+async def test_pending_transaction_stays_tracked():
+    tracker, _ = make_tracker({"success": True, "status": "PENDING"})
+    tracker.track("0xabc", TX_KIND_MEDICAL_RECORD)
+
+    assert await tracker.poll_once() == 0
+    assert tracker.pending_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_transaction_marks_record_failed():
+    tracker, session = make_tracker({"success": True, "status": "FAILED", "block_number": 3})
+    tracker.track("0xabc", TX_KIND_MEDICAL_RECORD)
+
+    with patch(
+        "src.app.services.receipt_tracker.crud_medical_record.update_medical_record_blockchain_status_async",
+        new_callable=AsyncMock,
+    ) as update:
+        assert await tracker.poll_once() == 1
+
+    update.assert_awaited_once_with(session, blockchain_tx_hash="0xabc", status=BlockchainStatus.FAILED)
+    assert tracker.pending_count == 0
+
+
+@pytest.mark.asyncio
+async def test_transaction_dropped_after_timeout():
+    tracker, _ = make_tracker({"success": True, "status": "PENDING"}, timeout=-1)
+    tracker.track("0xabc", TX_KIND_MEDICAL_RECORD)
+
+    await tracker.poll_once()
+    assert tracker.pending_count == 0
+
+
+def test_track_rejects_unknown_kind():
+    tracker, _ = make_tracker({"success": True, "status": "PENDING"})
+    with pytest.raises(ValueError):
+        tracker.track("0xabc", "unknown")
+
+
+@pytest.mark.asyncio
+async def test_settled_access_change_invalidates_access_cache():
+    tracker, _ = make_tracker({"success": True, "status": "CONFIRMED", "block_number": 3})
+    blockchain_service = tracker._blockchain_service_factory()
+    tracker.track("0xrevoke", TX_KIND_REVOKE_ACCESS, {
+        "actor_user_id": "owner", "owner_user_id": "owner", "record_id": "record",
+        "record_hash": "0x" + "ab" * 32, "target_address": "0xdoctor",
+    })
+
+    with patch("src.app.services.receipt_tracker.crud_audit_log.create_audit_log_async", new_callable=AsyncMock) as log:
+        assert await tracker.poll_once() == 1
+
+    blockchain_service.access_cache.invalidate.assert_called_once_with("0x" + "ab" * 32, "0xdoctor")
+    assert log.await_args.kwargs["action_type"] == "REVOKE_ACCESS_SUCCESS"
+
+
+@pytest.mark.asyncio
+async def test_reloaded_access_change_looks_up_record_hash_to_invalidate():
+    tracker, session = make_tracker({"success": True, "status": "CONFIRMED", "block_number": 3})
+    blockchain_service = tracker._blockchain_service_factory()
+    # Context as rebuilt by load_pending_records(), without the record hash
+    tracker.track("0xgrant", TX_KIND_GRANT_ACCESS, {
+        "actor_user_id": "owner", "owner_user_id": "owner", "record_id": "record", "target_address": "0xdoctor",
+    })
+
+    with patch("src.app.services.receipt_tracker.crud_audit_log.create_audit_log_async", new_callable=AsyncMock), \
+         patch(
+             "src.app.services.receipt_tracker.crud_medical_record.get_medical_record_by_id_async",
+             AsyncMock(return_value=MagicMock(data_hash="0xrecordhash")),
+         ) as get_record:
+        assert await tracker.poll_once() == 1
+
+    get_record.assert_awaited_once_with(session, "record")
+    blockchain_service.access_cache.invalidate.assert_called_once_with("0xrecordhash", "0xdoctor")
@@ -0,0 +1,134 @@
+import io
+import json
+import uuid
+import zipfile
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.app.core.database import Base
+from src.app.core.encryption import encrypt_data, hash_data
+from src.app.core.envelope import DataKeyManager, data_key_manager
+from src.app.core.key_provider import KeyProvider
+from src.app.core.metrics import MetricsRegistry
+from src.app.crud import crud_medical_record, crud_user
+from src.app.models.medical_record import MedicalRecordCreate, RecordType
+from src.app.schemas.user import UserCreate, UserRole
+from src.app.services.record_export import MedicalRecordExporter
+
+
+@pytest.fixture
+async def async_db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+
+async def create_records(db, contents, broken=()):
+    """Creates a patient with one record per content; records at `broken` indexes cannot be decrypted."""
+    user_id = uuid.uuid4()
+    user_in = UserCreate(
+        email=f"export_{user_id.hex[:8]}@example.com",
+        username=f"export_{user_id.hex[:8]}",
+        password="testpassword123",
+        full_name="Export Test User",
+        role=UserRole.PATIENT,
+    )
+    await crud_user.create_user_async(db, user_in=user_in, did=f"did:example:{user_id}", user_id_override=user_id)
+    record_ids = []
+    for i, content in enumerate(contents):
+        cipher, wrapped_data_key, key_version = data_key_manager.new_data_key()
+        encrypted_data = cipher.encrypt(content)
+        if i in broken:
+            encrypted_data = encrypted_data[:-1] + bytes([encrypted_data[-1] ^ 1])
+        record = await crud_medical_record.create_medical_record_async(
+            db,
+            medical_record_in=MedicalRecordCreate(record_type=RecordType.DIAGNOSIS, raw_data=content),
+            patient_id=user_id,
+            encrypted_data=encrypted_data,
+            data_hash=hash_data(content),
+            wrapped_data_key=wrapped_data_key,
+            key_version=key_version,
+        )
+        record_ids.append(str(record.id))
+    return user_id, record_ids
+
+
+async def expected_order(db, patient_id):
+    records = await crud_medical_record.get_medical_records_for_export_async(db, patient_id, 100)
+    return [str(record.id) for record in records]
+
+
+async def test_records_are_paged_and_decrypted_in_order(async_db):
+    contents = [f"Record {i}" for i in range(7)]
+    patient_id, record_ids = await create_records(async_db, contents, broken={3})
+    order = await expected_order(async_db, patient_id)
+    async_db.expunge_all()
+
+    exporter = MedicalRecordExporter(async_db, patient_id, page_size=3, decrypt_chunk_size=2)
+    entries = [entry async for entry in exporter.records()]
+
+    assert [entry["id"] for entry in entries] == order
+    by_id = {entry["id"]: entry for entry in entries}
+    assert set(by_id[record_ids[3]]) == {"id", "error"}
+    assert [by_id[record_id].get("raw_data") for record_id in record_ids] == [
+        content if i != 3 else None for i, content in enumerate(contents)
+    ]
+    assert exporter.summary() == {"records": 6, "failed": 1}
+
+
+async def test_other_patients_are_not_exported(async_db):
+    patient_id, _ = await create_records(async_db, ["Mine"])
+    await create_records(async_db, ["Someone else's"])
+
+    exporter = MedicalRecordExporter(async_db, patient_id, page_size=1)
+    lines = [json.loads(line) async for line in exporter.ndjson()]
+
+    assert [line.get("raw_data") for line in lines[:-1]] == ["Mine"]
+    assert lines[-1] == {"summary": {"records": 1, "failed": 0}}
+
+
+async def test_zip_export(async_db):
+    patient_id, record_ids = await create_records(async_db, ["First", "Second " * 500, "Third"], broken={2})
+    order = await expected_order(async_db, patient_id)
+
+    exporter = MedicalRecordExporter(async_db, patient_id, page_size=2, decrypt_chunk_size=1)
+    data = b"".join([chunk async for chunk in exporter.zip()])
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        suffixes = [".error.json" if record_id == record_ids[2] else ".json" for record_id in order]
+        assert archive.namelist() == [
+            f"records/{n:06d}_{record_id}{suffix}" for n, (record_id, suffix) in enumerate(zip(order, suffixes), 1)
+        ] + ["summary.json"]
+        second = json.loads(archive.read(f"records/{order.index(record_ids[1]) + 1:06d}_{record_ids[1]}.json"))
+        assert second["raw_data"] == "Second " * 500
+        assert json.loads(archive.read("summary.json")) == {"records": 2, "failed": 1}
+
+
+async def test_legacy_records_export_after_key_version_bump(async_db):
+    registry = MetricsRegistry()
+    provider = KeyProvider(
+        secret_resolver=lambda version: f"secret-v{version}", salt=b"test_salt", iterations=1000,
+        current_version=1, registry=registry,
+    )
+    manager = DataKeyManager(provider=provider, registry=registry)
+    patient_id, _ = await create_records(async_db, [])
+    # Stored before envelope encryption: no data key and no key version
+    await crud_medical_record.create_medical_record_async(
+        async_db,
+        medical_record_in=MedicalRecordCreate(record_type=RecordType.DIAGNOSIS, raw_data="Legacy"),
+        patient_id=patient_id,
+        encrypted_data=encrypt_data("Legacy", provider.get_key(1)),
+        data_hash=hash_data("Legacy"),
+    )
+
+    provider.current_version = 2
+    exporter = MedicalRecordExporter(async_db, patient_id, manager=manager)
+    entries = [entry async for entry in exporter.records()]
+
+    assert [entry.get("raw_data") for entry in entries] == ["Legacy"]
+    assert exporter.summary() == {"records": 1, "failed": 0}
@@ -0,0 +1,60 @@
+import json
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.app.core.database import Base
+from src.app.crud import crud_user
+from src.app.schemas.user import UserCreate, UserRole
+from src.app.services.record_import import MedicalRecordImporter, iter_lines
+
+
+@pytest.fixture
+async def async_db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+
+async def chunked(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(chunks, max_line_bytes=100):
+    return [item async for item in iter_lines(chunks, max_line_bytes)]
+
+
+async def test_iter_lines_joins_lines_split_across_chunks():
+    lines = await collect(chunked(b'{"a": ', b'1}\n{"b"', b": 2}\n\n", b'{"c": 3}'))
+    assert lines == [(1, b'{"a": 1}'), (2, b'{"b": 2}'), (3, b""), (4, b'{"c": 3}')]
+
+
+async def test_iter_lines_reports_oversized_lines_without_buffering_them():
+    lines = await collect(chunked(b"x" * 8, b"x" * 8, b"\nok\n", b"y" * 20), max_line_bytes=10)
+    assert lines == [(1, None), (2, b"ok"), (3, None)]
+
+
+async def test_results_are_yielded_per_batch(async_db):
+    user_id = uuid.uuid4()
+    user_in = UserCreate(
+        email="import@example.com", username="import_user", password="testpassword123",
+        full_name="Import Test User", role=UserRole.PATIENT,
+    )
+    importer_user = await crud_user.create_user_async(async_db, user_in=user_in, did=f"did:example:{user_id}", user_id_override=user_id)
+    batcher = MagicMock()
+    lines = [json.dumps({"record_type": "LAB_RESULT", "raw_data": f"Record {i}"}) for i in range(5)]
+    lines[3] = "not json"
+    importer = MedicalRecordImporter(async_db, importer_user, batcher, batch_size=2)
+
+    batches = [[result["line"] for result in results] async for results in importer.results(chunked("\n".join(lines).encode()))]
+
+    assert batches == [[1, 2], [3, 4], [5]]
+    assert importer.summary() == {"lines": 5, "created": 4, "failed": 1}
+    assert [call.args for call in batcher.notify_queued.call_args_list] == [(2,), (1,), (1,)]